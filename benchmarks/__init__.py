@@ -0,0 +1,6 @@
+"""
+benchmarks
+~~~~~~~~~~
+
+Performance benchmarks for PSPL.
+"""
@@ -0,0 +1,114 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Benchmark suite measuring each phase of PSPL on generated workloads.
+
+Usage: ``python -m benchmarks [--workload NAME] [--engine NAME] [--scale N]
+[--repeat N] [--warmup N] [--output FILE]``
+
+Comparing two result files: ``python -m benchmarks --compare BASE NEW
+[--threshold FRACTION]``; exits with status 1 if regressions are found.
+"""
+
+from __future__ import annotations
+
+from benchmarks import suite
+from benchmarks.workloads import WORKLOADS
+from pspl.state import ENGINES
+from pspl.parser.descent import PARSER_BACKENDS
+
+import argparse
+import sys
+
+
+def _format_row(m: suite.Measurement) -> str:
+    name = f'{m.workload}/{m.phase}' + (f'[{m.engine}]' if m.engine else '')
+    return (
+        f'{name:<36} {m.median * 1000:>10.3f} ms '
+        f'± {m.stdev * 1000:>8.3f} ms {m.ops_per_sec:>14,.0f} {m.unit}/s'
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    print(f'scale {args.scale}, median of {args.repeat} runs ({args.warmup} warmup)')
+    measurements = []
+    results = suite.run_suite(
+        args.workload or list(WORKLOADS),
+        engines=args.engine or ENGINES,
+        parser=args.parser,
+        scale=args.scale,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        phases=args.phase or suite.PHASES,
+    )
+    for m in results:
+        measurements.append(m)
+        print(_format_row(m), flush=True)
+
+    if args.output:
+        suite.save(args.output, measurements, scale=args.scale, repeat=args.repeat, parser=args.parser)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    _, base = suite.load(args.compare[0])
+    _, new = suite.load(args.compare[1])
+    comparisons = suite.compare(base, new, args.threshold)
+
+    regressions = 0
+    for c in comparisons:
+        m = c.new
+        name = f'{m.workload}/{m.phase}' + (f'[{m.engine}]' if m.engine else '')
+        flag = ''
+        if c.regression:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif c.change < -args.threshold:
+            flag = 'improved'
+        print(
+            f'{name:<36} {c.base.ops_per_sec:>14,.0f} -> {m.ops_per_sec:>14,.0f} {m.unit}/s '
+            f'{c.change:>+8.1%} {flag}'
+        )
+
+    print(f'{len(comparisons)} compared, {regressions} regressions (threshold {args.threshold:.0%})')
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workload', action='append', choices=list(WORKLOADS))
+    parser.add_argument('--engine', action='append', choices=ENGINES)
+    parser.add_argument('--phase', action='append', choices=suite.PHASES)
+    parser.add_argument('--parser', default='lr', choices=list(PARSER_BACKENDS))
+    parser.add_argument('--scale', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--output', metavar='FILE')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.05)
+    args = parser.parse_args()
+
+    sys.exit(compare(args) if args.compare else run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Micro-benchmark of two nested FOR loops.
+
+Usage: ``python -m benchmarks.for_loop [--size N] [--engine ENGINE ...]``
+"""
+
+from __future__ import annotations
+
+from pspl.state import ENGINES
+from pspl import PSPLRunner
+
+import argparse
+import time
+
+SOURCE = '''
+total <- 0
+FOR i <- 1 TO {size}
+    FOR j <- 1 TO {size}
+        total <- total + j
+    ENDFOR
+ENDFOR
+'''
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1000)
+    parser.add_argument('--engine', choices=ENGINES, nargs='+', default=['tree'])
+    args = parser.parse_args()
+
+    source = SOURCE.format(size=args.size)
+    iterations = args.size * args.size
+    for engine in args.engine:
+        runner = PSPLRunner(source, engine=engine)
+        start = time.perf_counter()
+        runner.run()
+        elapsed = time.perf_counter() - start
+        print(f'{engine:>8}: {elapsed:.3f}s ({iterations / elapsed:,.0f} iterations/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Benchmark comparing the throughput of the lexer backends.
+
+Usage: ``python -m benchmarks.lexer [--lines N] [--repeat N]``
+"""
+
+from __future__ import annotations
+
+from typing import List
+from pspl import lexer
+
+import argparse
+import time
+
+_STATEMENTS = (
+    'DECLARE count_{n} : INTEGER',
+    'value_{n} <- (value_{m} + 42) * 3 / 7 - 1.5',
+    'OUTPUT "Line " + value_{n}',
+    'IF value_{n} >= 100 THEN',
+    '    total <- total + value_{n}',
+    'ELSE',
+    '    total <- total - 1',
+    'ENDIF',
+    'FOR i <- 1 TO 10 STEP 2',
+    '    OUTPUT i <> value_{m}',
+    'ENDFOR',
+)
+
+
+def generate(lines: int) -> str:
+    """Generates a PSPL program with roughly the given number of lines."""
+    out: List[str] = []
+    for n in range(0, lines, len(_STATEMENTS)):
+        out.extend(stmt.format(n=n, m=n // 2) for stmt in _STATEMENTS)
+    return '\n'.join(out[:lines])
+
+
+def measure(backend: str, source: str, repeat: int) -> float:
+    """Returns the best tokens per second over the given number of runs."""
+    lex = lexer.get_lexer(backend)
+    best = float('inf')
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in lex.lex(source))
+        best = min(best, time.perf_counter() - start)
+    return count / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    source = generate(args.lines)
+    results = {backend: measure(backend, source, args.repeat) for backend in lexer.LEXER_BACKENDS}
+    baseline = results['rply']
+
+    print(f'{args.lines} lines, best of {args.repeat} runs')
+    for backend, tps in results.items():
+        print(f'{backend:>10}: {tps:>14,.0f} tokens/s ({tps / baseline:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Micro-benchmark of loops doing integer and floating point arithmetic.
+
+Usage: ``python -m benchmarks.numeric [--iterations N] [--engine ENGINE ...]``
+"""
+
+from __future__ import annotations
+
+from pspl.state import ENGINES
+from pspl import PSPLRunner
+
+import argparse
+import time
+
+SOURCES = {
+    'int': '''
+i <- 0
+total <- 0
+WHILE i < {iterations} DO
+    i <- i + 1
+    total <- total + i * 3 - (i - 1) * 2
+ENDWHILE
+''',
+    'float': '''
+i <- 0
+x <- 0.5
+WHILE i < {iterations} DO
+    i <- i + 1
+    x <- x * 0.5 + i / 4
+ENDWHILE
+''',
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=1_000_000)
+    parser.add_argument('--engine', choices=ENGINES, nargs='+', default=['tree'])
+    args = parser.parse_args()
+
+    for kind, source in SOURCES.items():
+        source = source.format(iterations=args.iterations)
+        for engine in args.engine:
+            runner = PSPLRunner(source, engine=engine)
+            start = time.perf_counter()
+            runner.run()
+            elapsed = time.perf_counter() - start
+            print(f'{kind:>5} {engine:>8}: {elapsed:.3f}s ({args.iterations / elapsed:,.0f} iterations/s)')
+
+
+if __name__ == '__main__':
+    main()
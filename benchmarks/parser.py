@@ -0,0 +1,118 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Benchmark comparing the throughput of the parser backends.
+
+The programs are lexed before timing so only the parsing is measured.
+The syntax trees produced by all backends are checked to be identical.
+
+Usage: ``python -m benchmarks.parser [--statements N ...] [--repeat N]``
+
+The tokens of programs are kept in memory, so 1M statements (``--statements
+1000000``) need several gigabytes of memory.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+from rply.token import SourcePosition
+from pspl.parser import PARSER_BACKENDS, get_parser
+from pspl.state import RuntimeState
+from pspl import ast, lexer
+
+import argparse
+import time
+
+_STATEMENTS = (
+    'DECLARE count_{n} : INTEGER',
+    'value_{n} <- (value_{m} + 42) * 3 / 7 - -1.5',
+    'OUTPUT "Line " + value_{n}',
+    'IF value_{n} >= 100 THEN total <- total + value_{n} ELSE total <- total - 1 ENDIF',
+    'FOR i <- 1 TO 10 STEP 2 OUTPUT i <> value_{m} ENDFOR',
+    'WHILE total > 0 DO total <- total - 1 ENDWHILE',
+    'CONSTANT limit_{n} = 100 * 2',
+)
+
+
+def generate(statements: int) -> str:
+    """Generates a PSPL program with the given number of top level statements."""
+    out: List[str] = []
+    for n in range(0, statements, len(_STATEMENTS)):
+        out.extend(stmt.format(n=n, m=n // 2) for stmt in _STATEMENTS)
+    return '\n'.join(out[:statements])
+
+
+def _fields(node: ast.Node) -> List[Any]:
+    fields = []
+    for key, value in vars(node).items():
+        if isinstance(value, SourcePosition):
+            value = (value.idx, value.lineno, value.colno)
+        elif isinstance(value, (ast.Node, list)):
+            continue
+        fields.append((key, value))
+    return fields
+
+
+def identical(left: ast.Node, right: ast.Node) -> bool:
+    """Returns whether the two syntax trees are identical."""
+    nodes = zip(left.walk(), right.walk())
+    return all(type(a) is type(b) and _fields(a) == _fields(b) for a, b in nodes) and \
+        sum(1 for _ in left.walk()) == sum(1 for _ in right.walk())
+
+
+def parse(backend: str, tokens: List[Any]) -> ast.Block:
+    state = RuntimeState(source='', parser=backend)
+    return get_parser(backend).parse(iter(tokens), state=state)
+
+
+def measure(backend: str, tokens: List[Any], repeat: int) -> float:
+    """Returns the best parsing time in seconds over the given number of runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(backend, tokens)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--statements', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backends = list(PARSER_BACKENDS)
+    print(f'{"statements":>10} ' + ' '.join(f'{backend + " (s)":>12}' for backend in backends) + f' {"speedup":>8}')
+    for statements in args.statements:
+        tokens = list(lexer.get_lexer().lex(generate(statements)))
+        expected = parse(backends[0], tokens)
+        for backend in backends[1:]:
+            if not identical(expected, parse(backend, tokens)):
+                raise AssertionError(f'{backend} parser produced a different tree')
+        del expected
+
+        times = [measure(backend, tokens, args.repeat) for backend in backends]
+        print(f'{statements:>10} ' + ' '.join(f'{t:>12.3f}' for t in times) + f' {times[0] / times[-1]:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
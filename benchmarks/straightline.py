@@ -0,0 +1,82 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Benchmark parsing and evaluating very long straight-line programs.
+
+Usage: ``python -m benchmarks.straightline [--lines N ...] [--repeat N]``
+"""
+
+from __future__ import annotations
+
+from typing import Callable, List
+from pspl.state import RuntimeState
+
+import argparse
+import pspl
+import time
+
+
+def generate(lines: int) -> str:
+    """Generates a straight-line program with the given number of statements."""
+    out: List[str] = ['v0 <- 0']
+    for n in range(1, lines):
+        out.append(f'v{n} <- v{n - 1} + {n}')
+    return '\n'.join(out)
+
+
+def best(func: Callable[[], object], repeat: int) -> float:
+    """Returns the best time of calling the function in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"lines":>8} {"parse (s)":>10} {"eval (s)":>10}')
+    for lines in args.lines:
+        source = generate(lines)
+
+        def parse():
+            state = RuntimeState(source=source)
+            return state._parse(state._get_parser(), state._get_lexer().lex(source))
+
+        try:
+            program = pspl.compile(source)
+            parse_time = best(parse, args.repeat)
+            eval_time = best(program.run, args.repeat)
+        except RecursionError:
+            print(f'{lines:>8} {"recursion limit exceeded":>21}')
+            continue
+
+        print(f'{lines:>8} {parse_time:>10.3f} {eval_time:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
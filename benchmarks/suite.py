@@ -0,0 +1,272 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Measurement, storage and comparison of benchmark suite results."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from pspl.parser import generator
+from pspl.state import RuntimeState
+from pspl import lexer
+from benchmarks.workloads import WORKLOADS
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import pspl
+
+__all__ = (
+    'PHASES',
+    'Measurement',
+    'Comparison',
+    'run_suite',
+    'save',
+    'load',
+    'compare',
+)
+
+PHASES = ('lexer_build', 'table_build', 'lex', 'parse', 'eval')
+"""The measured phases.
+
+``lexer_build`` and ``table_build`` construct the lexer and the LR parse
+tables (bypassing rply's on disk cache) and don't depend on workloads.
+``lex`` tokenizes, ``parse`` parses the tokens (including the AST passes)
+and ``eval`` runs the compiled program on every engine.
+"""
+
+STARTUP = 'startup'
+"""The workload name of the phases that don't depend on workloads."""
+
+
+class Measurement(NamedTuple):
+    """The timings of a phase of a workload."""
+
+    workload: str
+    """The name of workload."""
+
+    phase: str
+    """The measured phase, one of :data:`PHASES`."""
+
+    engine: Optional[str]
+    """The execution engine for ``eval`` phase, None otherwise."""
+
+    ops: int
+    """The number of operations performed in a single repetition."""
+
+    unit: str
+    """The name of operations, e.g. ``tokens``."""
+
+    times: List[float]
+    """The seconds taken by each repetition."""
+
+    @property
+    def key(self) -> Tuple[str, str, Optional[str]]:
+        """Tuple[:class:`str`, :class:`str`, Optional[:class:`str`]]: The key matching measurements across runs."""
+        return (self.workload, self.phase, self.engine)
+
+    @property
+    def median(self) -> float:
+        """:class:`float`: The median time in seconds."""
+        return statistics.median(self.times)
+
+    @property
+    def mean(self) -> float:
+        """:class:`float`: The mean time in seconds."""
+        return statistics.fmean(self.times)
+
+    @property
+    def stdev(self) -> float:
+        """:class:`float`: The standard deviation of times in seconds."""
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+
+    @property
+    def ops_per_sec(self) -> float:
+        """:class:`float`: The operations per second at the median time."""
+        return self.ops / self.median if self.median else float('inf')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the measurement as a JSON serializable dictionary."""
+        data = self._asdict()
+        data.update(median=self.median, mean=self.mean, stdev=self.stdev, ops_per_sec=self.ops_per_sec)
+        return data
+
+
+class Comparison(NamedTuple):
+    """The comparison of a measurement between two result files."""
+
+    base: Measurement
+    """The measurement of baseline results."""
+
+    new: Measurement
+    """The measurement of new results."""
+
+    change: float
+    """The relative change of median time; positive values are slowdowns."""
+
+    regression: bool
+    """Whether the slowdown exceeds the threshold and the noise of both measurements."""
+
+
+def _repeat(func: Callable[[], Any], repeat: int, warmup: int) -> List[float]:
+    for _ in range(warmup):
+        func()
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _build_lexer() -> None:
+    lexer.reset_lexer()
+    lexer.get_lexer()
+
+
+def _build_tables() -> None:
+    gen = generator.get()
+    cache_id = gen.cache_id
+    gen.cache_id = None
+    try:
+        gen.build()
+    finally:
+        gen.cache_id = cache_id
+
+
+def _discard(text: str) -> None:
+    pass
+
+
+def run_suite(
+    workloads: Iterable[str],
+    *,
+    engines: Iterable[str] = ('tree', 'vm', 'python'),
+    parser: str = 'lr',
+    scale: int = 1,
+    repeat: int = 5,
+    warmup: int = 1,
+    phases: Iterable[str] = PHASES,
+) -> Iterable[Measurement]:
+    """Runs the benchmarks and yields the measurements as they finish.
+
+    Parameters
+    ----------
+    workloads: Iterable[:class:`str`]
+        The names of workloads from :data:`benchmarks.workloads.WORKLOADS`.
+    engines: Iterable[:class:`str`]
+        The engines to measure ``eval`` phase with.
+    parser: :class:`str`
+        The parser backend to measure ``parse`` phase with.
+    scale: :class:`int`
+        The scale of generated workloads.
+    repeat: :class:`int`
+        The number of timed repetitions of each phase.
+    warmup: :class:`int`
+        The number of untimed repetitions before timing.
+    phases: Iterable[:class:`str`]
+        The phases to measure.
+    """
+    phases = set(phases)
+    if 'lexer_build' in phases:
+        yield Measurement(STARTUP, 'lexer_build', None, 1, 'builds', _repeat(_build_lexer, repeat, warmup))
+    if 'table_build' in phases:
+        yield Measurement(STARTUP, 'table_build', None, 1, 'builds', _repeat(_build_tables, repeat, warmup))
+
+    tokenizer = lexer.get_lexer()
+    for name in workloads:
+        source = WORKLOADS[name](scale)
+        tokens = list(tokenizer.lex(source))
+
+        if 'lex' in phases:
+            times = _repeat(lambda: list(tokenizer.lex(source)), repeat, warmup)
+            yield Measurement(name, 'lex', None, len(tokens), 'tokens', times)
+
+        if 'parse' in phases:
+            def parse() -> None:
+                state = RuntimeState(source=source, parser=parser)
+                state._parse(state._get_parser(), iter(tokens))
+
+            yield Measurement(name, 'parse', None, len(tokens), 'tokens', _repeat(parse, repeat, warmup))
+
+        if 'eval' in phases:
+            statements = pspl.compile(source).run(output=_discard, counters=True).statements
+            for engine in engines:
+                program = pspl.compile(source, engine=engine)
+                times = _repeat(lambda: program.run(output=_discard, buffering='block'), repeat, warmup)
+                yield Measurement(name, 'eval', engine, statements or 0, 'statements', times)
+
+
+def save(filename: str, measurements: List[Measurement], **meta: Any) -> None:
+    """Writes the measurements to a JSON result file.
+
+    The keyword arguments are stored along with the details of
+    environment in the ``meta`` object of file.
+    """
+    meta.update(
+        pspl=pspl.__version__,
+        python=sys.version.split()[0],
+        implementation=sys.implementation.name,
+        platform=platform.platform(),
+        time=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    )
+    with open(filename, 'w') as f:
+        json.dump({'meta': meta, 'results': [m.to_dict() for m in measurements]}, f, indent=2)
+
+
+def load(filename: str) -> Tuple[Dict[str, Any], List[Measurement]]:
+    """Reads a result file written by :func:`save`.
+
+    Returns the ``meta`` object and the measurements.
+    """
+    with open(filename, 'r') as f:
+        data = json.load(f)
+
+    fields = Measurement._fields
+    measurements = [Measurement(**{k: v for k, v in r.items() if k in fields}) for r in data['results']]
+    return data.get('meta', {}), measurements
+
+
+def compare(base: List[Measurement], new: List[Measurement], threshold: float = 0.05) -> List[Comparison]:
+    """Compares the measurements present in both results.
+
+    A measurement is flagged as a regression if its median time is slower
+    by more than ``threshold`` (a fraction of the baseline median) and the
+    slowdown is larger than the sum of standard deviations of both, so
+    that noisy measurements are not reported.
+    """
+    base_by_key = {m.key: m for m in base}
+    comparisons = []
+    for m in new:
+        b = base_by_key.get(m.key)
+        if b is None:
+            continue
+        delta = m.median - b.median
+        change = delta / b.median if b.median else 0.0
+        regression = change > threshold and delta > b.stdev + m.stdev
+        comparisons.append(Comparison(b, m, change, regression))
+    return comparisons
@@ -0,0 +1,143 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Generators of representative PSPL programs used by the benchmark suite.
+
+Every generator takes a ``scale`` and returns the source of a program whose
+size (or running time) grows linearly with it. At scale 1, every phase of
+a workload takes between a few milliseconds and a second.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+__all__ = (
+    'WORKLOADS',
+    'generate',
+)
+
+
+def deep_arithmetic(scale: int) -> str:
+    """Statements with deeply nested arithmetic expressions."""
+    out: List[str] = ['a <- 1', 'b <- 2']
+    for n in range(200 * scale):
+        expr = 'a'
+        for depth in range(40):
+            op = '+-*/'[depth % 4]
+            expr = f'({expr} {op} {"b" if depth % 3 else depth + 1})'
+        out.append(f'a <- {expr} / (a + 1)')
+    out.append('OUTPUT a')
+    return '\n'.join(out)
+
+
+def straightline(scale: int) -> str:
+    """A long sequence of assignments depending on the previous ones."""
+    out: List[str] = ['v0 <- 0']
+    for n in range(1, 5000 * scale):
+        out.append(f'v{n} <- v{n - 1} + {n}')
+    out.append(f'OUTPUT v{5000 * scale - 1}')
+    return '\n'.join(out)
+
+
+def nested_for(scale: int) -> str:
+    """Two nested FOR loops accumulating a sum."""
+    return '\n'.join((
+        'total <- 0',
+        f'FOR i <- 1 TO {100 * scale}',
+        '    FOR j <- 1 TO 100',
+        '        total <- total + i * j',
+        '    ENDFOR',
+        'ENDFOR',
+        'OUTPUT total',
+    ))
+
+
+def string_concat(scale: int) -> str:
+    """A loop building a string by repeated concatenation."""
+    return '\n'.join((
+        's <- ""',
+        f'FOR i <- 1 TO {5000 * scale}',
+        '    s <- s + "x" + i',
+        'ENDFOR',
+        'OUTPUT s',
+    ))
+
+
+def heavy_output(scale: int) -> str:
+    """A loop writing a line of output on every iteration."""
+    return '\n'.join((
+        f'FOR i <- 1 TO {20000 * scale}',
+        '    OUTPUT "Line " + i + ": " + i * 2',
+        'ENDFOR',
+    ))
+
+
+def long_while_condition(scale: int) -> str:
+    """A WHILE loop whose condition is a long arithmetic expression."""
+    names = [f'k{n}' for n in range(20)]
+    cond = ' + '.join(f'{name} * 0' for name in names)
+    out = [f'{name} <- {n}' for n, name in enumerate(names)]
+    out.extend((
+        'i <- 0',
+        f'WHILE (i + {cond}) < {5000 * scale} DO',
+        '    i <- i + 1',
+        'ENDWHILE',
+        'OUTPUT i',
+    ))
+    return '\n'.join(out)
+
+
+def numeric_loop(scale: int) -> str:
+    """A WHILE loop of integer and floating point arithmetic and comparisons."""
+    return '\n'.join((
+        'i <- 0',
+        'total <- 0',
+        'mean <- 0.0',
+        f'WHILE i < {20000 * scale} DO',
+        '    i <- i + 1',
+        '    total <- total + i * 3 - 1',
+        '    mean <- mean + (i - mean) / i',
+        '    IF total > 1000000 THEN',
+        '        total <- total - 1000000',
+        '    ENDIF',
+        'ENDWHILE',
+        'OUTPUT total',
+        'OUTPUT mean',
+    ))
+
+
+WORKLOADS: Dict[str, Callable[[int], str]] = {
+    'deep_arithmetic': deep_arithmetic,
+    'straightline': straightline,
+    'nested_for': nested_for,
+    'string_concat': string_concat,
+    'heavy_output': heavy_output,
+    'long_while_condition': long_while_condition,
+    'numeric_loop': numeric_loop,
+}
+"""The workloads of benchmark suite by their names."""
+
+
+def generate(name: str, scale: int = 1) -> str:
+    """Returns the source of workload with given name at given scale."""
+    return WORKLOADS[name](scale)
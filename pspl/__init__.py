@@ -18,3 +18,6 @@ __version__ = '0.1.0-alpha1'
 __license__ = 'MIT'
 
 from pspl.runner import *
+from pspl.program import *
+from pspl.profiler import *
+from pspl.stats import *
@@ -21,24 +21,329 @@
 # SOFTWARE.
 
 from __future__ import annotations
-from typing import Optional
+from typing import Any, List, Optional, TextIO, Tuple
 
+from pspl.state import ENGINES
+from pspl.output import BUFFERING_MODES
+from pspl.parser import PARSER_BACKENDS
+from pspl.parser.errors import PSPLParserError
+from pspl.profiler import Profiler
+from pspl import batch, cache, client, results, server
+
+import difflib
+import itertools
+import json
+import os
+import rply
+import socket
+import sys
 import pspl
 import click
 
-@click.command()
-@click.option('--version', help='Show PSPL version', flag_value='version', default=False)
-@click.argument('filename', type=str)
-def main(version: bool, filename: str):
-    """Command line interface for PSPL"""
+
+def _output_path(output_dir: str, filename: str) -> str:
+    rel = os.path.relpath(filename)
+    if rel.startswith(os.pardir):
+        rel = os.path.abspath(filename).lstrip(os.sep)
+    return os.path.join(output_dir, rel + '.out')
+
+
+def _run_batch(filenames: List[str], jobs: Optional[int], output_dir: Optional[str], **options: Any) -> int:
+    failed = 0
+    for result in batch.run_batch(batch.expand_paths(filenames), jobs=jobs, **options):
+        data = result.to_dict()
+        if output_dir is not None:
+            path = _output_path(output_dir, result.filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.writelines(line + '\n' for line in result.output)
+            del data['output']
+
+        failed += result.status != 'ok'
+        click.echo(json.dumps(data))
+    return 1 if failed else 0
+
+
+def _is_batch_path(path: str) -> bool:
+    # A directory or a glob pattern (quoted so the shell didn't expand it)
+    # selects the batch mode even if it's the only path given.
+    if os.path.isdir(path):
+        return True
+    return any(char in path for char in '*?[') and not os.path.exists(path)
+
+
+def _write_profile(profiler: Profiler, filename: str, fmt: str, output: Optional[str]) -> None:
+    with open(filename, 'r') as f:
+        source = f.read()
+
+    if fmt == 'json':
+        text = json.dumps(profiler.to_dict())
+    elif fmt == 'collapsed':
+        text = profiler.to_collapsed(source)
+    else:
+        text = profiler.report(source)
+
+    if output is None:
+        click.echo(text, err=True)
+    else:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+
+
+class _DefaultGroup(click.Group):
+    # Invokes the run command unless a command is given so that
+    # ``python -m pspl FILE`` keeps working.
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or (args[0] not in self.commands and args[0] != '--help'):
+            args = ['run', *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=_DefaultGroup)
+def main():
+    """Command line interface for PSPL
+
+    Without a command, the given files are run, e.g. python -m pspl test.pspl.
+    """
+
+
+@main.command()
+@click.option('--version', help='Show PSPL version', is_flag=True, default=False)
+@click.option('--engine', help='The execution engine', type=click.Choice(ENGINES), default='tree')
+@click.option('--parser', help='The parser backend', type=click.Choice(list(PARSER_BACKENDS)), default='lr')
+@click.option('--buffering', help='How the output is buffered', type=click.Choice(BUFFERING_MODES), default='line')
+@click.option('--cache', 'use_cache', help='Cache the compiled program next to the source file (not used in batch mode)', is_flag=True, default=False)
+@click.option('--cache-stats', help='Show the compiled program and result cache statistics', is_flag=True, default=False)
+@click.option('--result-cache', help='Replay the output of identical runs from results cached in this directory', default=None)
+@click.option('--result-cache-size', help='The maximum size of result cache in bytes', type=click.IntRange(min=0), default=results.DEFAULT_MAX_SIZE)
+@click.option('--max-steps', help='Stop the program after this many steps', type=click.IntRange(min=0), default=None)
+@click.option('--timeout', help='Stop the program after this many seconds', type=click.FloatRange(min=0), default=None)
+@click.option('--profile', help='Profile the time taken by each line of program', is_flag=True, default=False)
+@click.option('--profile-format', help='The format of profile', type=click.Choice(['text', 'json', 'collapsed']), default='text')
+@click.option('--profile-output', help='Write the profile to this file instead of standard error', default=None)
+@click.option('--stats', help='Show the time taken by each phase of the run (execution counts need --counters)', is_flag=True, default=False)
+@click.option('--counters', help='Count executed statements, loop iterations, variables and memory for --stats; evaluates the syntax tree whatever the engine', is_flag=True, default=False)
+@click.option('--jobs', help='Run the programs in batch mode using this many processes (0 for all processors)', type=click.IntRange(min=0), default=None)
+@click.option('--stdin-suffix', help='Batch mode: extension of the files that program inputs are read from', default='.in')
+@click.option('--output-dir', help='Batch mode: write program outputs to files in this directory', default=None)
+@click.argument('filenames', type=str, nargs=-1)
+def run(
+    version: bool,
+    engine: str,
+    parser: str,
+    buffering: str,
+    use_cache: bool,
+    cache_stats: bool,
+    result_cache: Optional[str],
+    result_cache_size: int,
+    max_steps: Optional[int],
+    timeout: Optional[float],
+    profile: bool,
+    profile_format: str,
+    profile_output: Optional[str],
+    stats: bool,
+    counters: bool,
+    jobs: Optional[int],
+    stdin_suffix: str,
+    output_dir: Optional[str],
+    filenames: Tuple[str, ...],
+):
+    """Run PSPL programs
+
+    Several files, directories or glob patterns can be given to run the
+    programs in batch mode, which a single directory or glob pattern also
+    selects. In batch mode, the result of each program is printed as a line
+    of JSON and the outputs are captured. The --stats, --counters, --profile,
+    --result-cache and --cache-stats options are not supported in batch mode.
+    """
     if version:
         return print(pspl.__version__)
+    if not filenames:
+        raise click.UsageError('no file name given')
 
-    runner = pspl.PSPLRunner(filename, file=True)
+    if jobs is not None or len(filenames) > 1 or _is_batch_path(filenames[0]):
+        unsupported = [
+            name
+            for name, value in (
+                ('--stats', stats),
+                ('--counters', counters),
+                ('--profile', profile),
+                ('--result-cache', result_cache is not None),
+                ('--cache-stats', cache_stats),
+            )
+            if value
+        ]
+        if unsupported:
+            raise click.UsageError('%s cannot be used in batch mode' % ', '.join(unsupported))
+
+        code = _run_batch(
+            list(filenames),
+            jobs or None,
+            output_dir,
+            engine=engine,
+            parser=parser,
+            stdin_suffix=stdin_suffix,
+            max_steps=max_steps,
+            timeout=timeout,
+        )
+        sys.exit(code)
+
+    filename = filenames[0]
+    results_cache = None if result_cache is None else results.ResultCache(result_cache, max_size=result_cache_size)
+    runner = pspl.PSPLRunner(
+        filename,
+        file=True,
+        engine=engine,
+        parser=parser,
+        buffering=buffering,
+        cache=use_cache,
+        result_cache=results_cache,
+    )
     try:
-        runner.run()
+        run_stats = runner.run(max_steps=max_steps, timeout=timeout, profile=profile, counters=counters)
     except FileNotFoundError:
         print('error: file of that name does not exist')
+    else:
+        if run_stats.profile is not None:
+            _write_profile(run_stats.profile, filename, profile_format, profile_output)
+        if stats or counters:
+            click.echo(run_stats.report(), err=True)
+
+    if cache_stats:
+        info = cache.cache_info()
+        click.echo(f'cache: {info.hits} hits, {info.misses} misses, {info.writes} writes', err=True)
+        if results_cache is not None:
+            r = results_cache.info()
+            click.echo(
+                f'result cache: {r.hits} hits, {r.misses} misses, {r.bypasses} bypasses, '
+                f'{r.writes} writes, {r.evictions} evictions',
+                err=True,
+            )
+
+
+@main.command()
+@click.option('--engine', help='The execution engine', type=click.Choice(ENGINES), default='tree')
+@click.option('--parser', help='The parser backend', type=click.Choice(list(PARSER_BACKENDS)), default='lr')
+@click.option('--jobs', help='The number of worker processes (defaults to the number of processors)', type=click.IntRange(min=1), default=None)
+@click.option('--max-steps', help='Stop the program after this many steps', type=click.IntRange(min=0), default=None)
+@click.option('--timeout', help='Stop the program after this many seconds', type=click.FloatRange(min=0), default=None)
+@click.option('--stdin-suffix', help='Extension of the files that the inputs of test cases are read from', default='.in')
+@click.option('--expected-suffix', help='Extension of the files holding the expected outputs', default=batch.EXPECTED_SUFFIX)
+@click.option('--json', 'as_json', help='Print the result of each test case as a line of JSON', is_flag=True, default=False)
+@click.argument('filename', type=str)
+@click.argument('cases_dir', type=click.Path(exists=True, file_okay=False))
+def test(
+    engine: str,
+    parser: str,
+    jobs: Optional[int],
+    max_steps: Optional[int],
+    timeout: Optional[float],
+    stdin_suffix: str,
+    expected_suffix: str,
+    as_json: bool,
+    filename: str,
+    cases_dir: str,
+):
+    """Run a program against the test cases in a directory
+
+    Each NAME.out file in the directory holds the expected output of a test
+    case and NAME.in holds its inputs, one per line. The program is compiled
+    once and the test cases are run in parallel. The exit status is 1 if any
+    test case does not pass.
+    """
+    try:
+        program = pspl.compile(filename, file=True, engine=engine, parser=parser)
+    except FileNotFoundError:
+        raise click.UsageError('file of that name does not exist')
+    except (rply.LexingError, PSPLParserError) as err:
+        error_type, message, line, column = batch.error_details(err)
+        location = f'{filename}:{line}:{column}' if line is not None else filename
+        click.echo(f'{location}: {error_type}: {message}')
+        sys.exit(1)
+
+    cases = batch.load_cases(cases_dir, stdin_suffix=stdin_suffix, expected_suffix=expected_suffix)
+    counts = {'pass': 0, 'fail': 0, 'error': 0}
+    for result in batch.run_cases(program, cases, jobs=jobs, max_steps=max_steps, timeout=timeout):
+        counts[result.status] += 1
+        if as_json:
+            click.echo(json.dumps(result.to_dict()))
+            continue
+
+        click.echo(f'{result.status.upper():<5} {result.name} ({result.time * 1000:.2f} ms)')
+        if result.status == 'error':
+            click.echo(f'      {result.error_type}: {result.error_message}')
+        elif result.status == 'fail':
+            diff = difflib.unified_diff(result.expected, result.output, 'expected', 'output', lineterm='')
+            for line in itertools.islice(diff, 20):
+                click.echo('      ' + line)
+
+    if not as_json:
+        click.echo(f'{len(cases)} test cases: {counts["pass"]} passed, {counts["fail"]} failed, {counts["error"]} errors')
+    sys.exit(0 if counts['pass'] == len(cases) else 1)
+
+
+@main.command()
+@click.option('--socket', 'path', help='The path of Unix socket to listen on', required=True)
+@click.option('--workers', help='The number of worker processes (defaults to the number of processors)', type=click.IntRange(min=1), default=None)
+@click.option('--engine', help='The default execution engine', type=click.Choice(ENGINES), default='tree')
+@click.option('--parser', help='The default parser backend', type=click.Choice(list(PARSER_BACKENDS)), default='lr')
+@click.option('--max-steps', help='Stop the programs after this many steps', type=click.IntRange(min=0), default=None)
+@click.option('--timeout', help='Stop the programs after this many seconds', type=click.FloatRange(min=0), default=None)
+def serve(
+    path: str,
+    workers: Optional[int],
+    engine: str,
+    parser: str,
+    max_steps: Optional[int],
+    timeout: Optional[float],
+):
+    """Run the programs submitted to a Unix socket on warm worker processes
+
+    Programs are submitted with the submit command. The execution limits
+    apply to every program; submissions can only lower them.
+    """
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        raise click.UsageError('serve requires fork and Unix sockets, which are unavailable on this platform')
+    try:
+        server.serve(path, workers=workers, engine=engine, parser=parser, max_steps=max_steps, timeout=timeout)
+    except FileExistsError as err:
+        raise click.UsageError(str(err))
+
+
+@main.command()
+@click.option('--socket', 'path', help='The path of Unix socket of server', required=True)
+@click.option('--engine', help='The execution engine (defaults to that of server)', type=click.Choice(ENGINES), default=None)
+@click.option('--parser', help='The parser backend (defaults to that of server)', type=click.Choice(list(PARSER_BACKENDS)), default=None)
+@click.option('--max-steps', help='Stop the program after this many steps', type=click.IntRange(min=0), default=None)
+@click.option('--timeout', help='Stop the program after this many seconds', type=click.FloatRange(min=0), default=None)
+@click.argument('filename', type=click.File('r'))
+def submit(
+    path: str,
+    engine: Optional[str],
+    parser: Optional[str],
+    max_steps: Optional[int],
+    timeout: Optional[float],
+    filename: TextIO,
+):
+    """Run a program on a server started by the serve command
+
+    The standard input is sent along with the program unless it is a
+    terminal, and the exit status is 1 if the program fails.
+    """
+    stdin = '' if sys.stdin.isatty() else sys.stdin.read()
+    result = client.submit(
+        path,
+        filename.read(),
+        stdin=stdin,
+        engine=engine,
+        parser=parser,
+        max_steps=max_steps,
+        timeout=timeout,
+    )
+    if result['error']:
+        sys.stdout.write(result['error'])
+    sys.exit(0 if result['status'] == 'ok' else 1)
+
 
 if __name__ == '__main__':
     main()
@@ -9,3 +9,4 @@ from pspl.ast.literals import *
 from pspl.ast.block import *
 from pspl.ast.statements import *
 from pspl.ast.expressions import *
+from pspl.ast.specialized import *
@@ -22,11 +22,11 @@
 
 from __future__ import annotations
 
-from typing import Any, TYPE_CHECKING
+from typing import Any, Iterator, List, Optional, TYPE_CHECKING
 from rply.token import BaseBox
 
 if TYPE_CHECKING:
-    from pspl.state import RuntimeState
+    from pspl.context import ExecutionContext
 
 __all__ = (
     "Node",
@@ -38,6 +38,26 @@ class Node(BaseBox):
 
     All subclasses of this class should implement the :meth:`.eval`
     method. By default, this method does nothing.
+
+    The nodes don't store any runtime data. The :class:`ExecutionContext`
+    of current run is passed to :meth:`.eval` instead, which is None when
+    evaluating nodes whose value is known before execution.
     """
-    def eval(self) -> Any:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
         pass
+
+    def walk(self) -> Iterator[Node]:
+        """Returns an iterator yielding this node and all its descendant nodes.
+
+        The child nodes are discovered from the public attributes of
+        nodes (and lists stored in them).
+        """
+        stack: List[Any] = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+            elif isinstance(node, Node):
+                yield node
+                children = [v for k, v in vars(node).items() if not k.startswith('_')]
+                stack.extend(reversed(children))
@@ -22,12 +22,18 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional
 from pspl.ast.base import Node
 from pspl.ast.statements import Statement
 
+if TYPE_CHECKING:
+    from pspl.context import ExecutionContext
+    from rply.token import SourcePosition
+
 __all__ = (
     'Block',
+    'LimitedBlock',
+    'CountedBlock',
 )
 
 
@@ -45,6 +51,89 @@ class Block(Node):
     def __init__(self, statements: List[Statement]) -> None:
         self.statements = statements
 
-    def eval(self) -> None:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
         for stmt in self.statements:
-            stmt.eval()
+            stmt.eval(ctx)
+
+    def eval_loop(self, ctx: ExecutionContext, slot: int, values: Iterable[Any]) -> None:
+        """Evaluates this block once for every value bound to the given slot.
+
+        This is used by :class:`For` loops and saves a method call per
+        iteration over calling :meth:`.eval` from the loop.
+        """
+        slots = ctx.slots
+        statements = self.statements
+        if len(statements) == 1:
+            stmt = statements[0]
+            for val in values:
+                slots[slot] = val
+                stmt.eval(ctx)
+        else:
+            for val in values:
+                slots[slot] = val
+                for stmt in statements:
+                    stmt.eval(ctx)
+
+
+class LimitedBlock(Block):
+    """Represents a loop body that counts towards the execution limits.
+
+    Every evaluation of this block charges the number of its statements
+    to :meth:`ExecutionContext.tick` before evaluating them. These blocks
+    are only created by :class:`pspl.passes.LimitInstrumenter`.
+
+    Attributes
+    ----------
+    statements: List[:class:`Statement`]
+        The list of statements in the block.
+    source_pos: Optional[:class:`rply.token.SourcePosition`]
+        The source position of loop statement that owns this block.
+    """
+    def __init__(self, statements: List[Statement], source_pos: Optional[SourcePosition] = None) -> None:
+        super().__init__(statements)
+        self.source_pos = source_pos
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
+        statements = self.statements
+        ctx.tick(len(statements), self.source_pos)  # type: ignore
+        for stmt in statements:
+            stmt.eval(ctx)
+
+    def eval_loop(self, ctx: ExecutionContext, slot: int, values: Iterable[Any]) -> None:
+        slots = ctx.slots
+        for val in values:
+            slots[slot] = val
+            self.eval(ctx)
+
+
+class CountedBlock(Node):
+    """Represents a block whose execution is counted in the run statistics.
+
+    These nodes wrap the blocks of statements and are only created by
+    :class:`pspl.passes.CountInstrumenter`. The counters are stored in
+    :attr:`ExecutionContext.stats`.
+
+    Attributes
+    ----------
+    block: :class:`Block`
+        The wrapped block.
+    loop: :class:`bool`
+        Whether the block is a loop body.
+    """
+    def __init__(self, block: Block, loop: bool = False) -> None:
+        self.block = block
+        self.loop = loop
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
+        stats = ctx.stats  # type: ignore
+        stats.statements += len(self.block.statements)
+        if self.loop:
+            stats.loop_iterations += 1
+
+        self.block.eval(ctx)
+
+    def eval_loop(self, ctx: ExecutionContext, slot: int, values: Iterable[Any]) -> None:
+        slots = ctx.slots
+        for val in values:
+            slots[slot] = val
+            self.eval(ctx)
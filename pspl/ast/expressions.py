@@ -22,14 +22,13 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Union
-from pspl.ast.literals import Boolean
+from typing import TYPE_CHECKING, Any, Optional, Union
 from pspl.ast.base import Node
 from pspl.parser.errors import IdentifierNotDefined
 from pspl import utils
 
 if TYPE_CHECKING:
-    from pspl.state import RuntimeState
+    from pspl.context import ExecutionContext
     from rply.token import SourcePosition
 
 __all__ = (
@@ -48,19 +47,32 @@ __all__ = (
     'LtEq',
 )
 
+MISSING = utils.MISSING
+
 
 class Ident(Node):
-    """Represents an identifier"""
-    def __init__(self, name: str, state: RuntimeState, pos: SourcePosition) -> None:
+    """Represents an identifier.
+
+    Attributes
+    ----------
+    name: :class:`str`
+        The identifier name.
+    pos: :class:`rply.token.SourcePosition`
+        The source position of identifier.
+    slot: :class:`int`
+        The index of slot storing the identifier's value. This is
+        set by :class:`pspl.passes.Resolver`.
+    """
+    def __init__(self, name: str, pos: SourcePosition) -> None:
         self.name = name
         self.pos = pos
-        self._state = state
+        self.slot = -1
 
-    def eval(self) -> Any:
-        try:
-            return self._state.get_def(self.name)
-        except KeyError:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
+        val = ctx.slots[self.slot]  # type: ignore
+        if val is MISSING:
             raise IdentifierNotDefined(self.pos, self.name)
+        return val
 
 
 class ArithmeticExpression(Node):
@@ -72,9 +84,9 @@ class ArithmeticExpression(Node):
 
 class Add(ArithmeticExpression):
     """Represents an addition expression."""
-    def eval(self) -> Union[int, str]:
-        lhs = utils.maybe_eval(self.left)
-        rhs = utils.maybe_eval(self.right)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Union[int, str]:
+        lhs = utils.maybe_eval(self.left, ctx)
+        rhs = utils.maybe_eval(self.right, ctx)
         if isinstance(lhs, str) or isinstance(rhs, str):
             return str(lhs) + str(rhs)
         return lhs + rhs
@@ -82,69 +94,66 @@ class Add(ArithmeticExpression):
 
 class Subtract(ArithmeticExpression):
     """Represents a subtraction expression."""
-    def eval(self) -> int:
-        return utils.maybe_eval(self.left) - utils.maybe_eval(self.right)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> int:
+        return utils.maybe_eval(self.left, ctx) - utils.maybe_eval(self.right, ctx)
 
 
 class Div(ArithmeticExpression):
     """Represents a division expression."""
-    def eval(self) -> int:
-        return utils.maybe_eval(self.left) / utils.maybe_eval(self.right)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> int:
+        return utils.maybe_eval(self.left, ctx) / utils.maybe_eval(self.right, ctx)
 
 
 class Mul(ArithmeticExpression):
     """Represents a multiplication expression."""
-    def eval(self) -> int:
-        return utils.maybe_eval(self.left) * utils.maybe_eval(self.right)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> int:
+        return utils.maybe_eval(self.left, ctx) * utils.maybe_eval(self.right, ctx)
 
 
 class BooleanExpression(Node):
-    """Base class for various boolean expressions."""
+    """Base class for various boolean expressions.
+
+    Boolean expressions evaluate to a :class:`bool`.
+    """
     def __init__(self, left: Any, right: Any) -> None:
         self.left = left
         self.right = right
 
-    def eval(self) -> Boolean:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
         ...
 
-    def __pspl_bool__(self) -> bool:
-        return self.eval().value
-
-    def __pspl_output__(self) -> str:
-        return self.eval().__pspl_output__()
-
 
 class Eq(BooleanExpression):
     """Represents an equality boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) == utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) == utils.maybe_eval(self.right, ctx)
 
 
 class NEq(BooleanExpression):
     """Represents an inequality boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) != utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) != utils.maybe_eval(self.right, ctx)
 
 
 class Gt(BooleanExpression):
     """Represents a greater than boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) > utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) > utils.maybe_eval(self.right, ctx)
 
 
 class GtEq(BooleanExpression):
     """Represents a greater than or equality boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) >= utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) >= utils.maybe_eval(self.right, ctx)
 
 
 class Lt(BooleanExpression):
     """Represents a less than boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) < utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) < utils.maybe_eval(self.right, ctx)
 
 
 class LtEq(BooleanExpression):
     """Represents an less than or equality boolean expression."""
-    def eval(self) -> Boolean:
-        return Boolean(utils.maybe_eval(self.left) <= utils.maybe_eval(self.right))
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return utils.maybe_eval(self.left, ctx) <= utils.maybe_eval(self.right, ctx)
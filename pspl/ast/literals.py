@@ -22,14 +22,19 @@
 
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Any, Optional
 from ast import literal_eval
 from pspl.ast.base import Node
 
+if TYPE_CHECKING:
+    from pspl.context import ExecutionContext
+
 __all__ = (
     'String',
     'Integer',
     'Float',
     'Boolean',
+    'Constant',
 )
 
 
@@ -44,7 +49,7 @@ class String(Node):
     def __init__(self, value: str) -> None:
         self.value = value
 
-    def eval(self) -> str:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> str:
         return literal_eval(self.value)
 
 
@@ -59,7 +64,7 @@ class Integer(Node):
     def __init__(self, value: str) -> None:
         self.value = value
 
-    def eval(self) -> int:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> int:
         return int(self.value)
 
 
@@ -74,7 +79,7 @@ class Float(Node):
     def __init__(self, value: str) -> None:
         self.value = value
 
-    def eval(self) -> float:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> float:
         return float(self.value)
 
 
@@ -89,11 +94,23 @@ class Boolean(Node):
     def __init__(self, value: bool) -> None:
         self.value = value
 
-    def __pspl_bool__(self) -> bool:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
         return self.value
 
-    def __pspl_output__(self) -> str:
-        return str(self.value).upper()
 
-    def eval(self) -> bool:
+class Constant(Node):
+    """Represents a value that is known before execution.
+
+    These nodes are not produced by the parser but by the optimization
+    passes, e.g. for pre-decoded literals and folded expressions.
+
+    Attributes
+    ----------
+    value:
+        The underlying value.
+    """
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
         return self.value
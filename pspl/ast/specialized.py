@@ -0,0 +1,141 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Union
+from pspl.ast.expressions import (
+    Add,
+    Subtract,
+    Div,
+    Mul,
+    Eq,
+    NEq,
+    Gt,
+    GtEq,
+    Lt,
+    LtEq,
+)
+
+if TYPE_CHECKING:
+    from pspl.context import ExecutionContext
+
+__all__ = (
+    'NumericAdd',
+    'StringAdd',
+    'NumericSubtract',
+    'NumericDiv',
+    'NumericMul',
+    'TypedEq',
+    'TypedNEq',
+    'TypedGt',
+    'TypedGtEq',
+    'TypedLt',
+    'TypedLtEq',
+)
+
+
+# Specialized nodes are created by :class:`pspl.passes.TypeSpecializer`
+# which ensures both operands are nodes, so they are evaluated directly
+# without checking for raw values.
+class NumericAdd(Add):
+    """Represents an addition expression of numeric operands.
+
+    If an operand turns out to be a string at runtime, the operands
+    are concatenated the same as :class:`Add`.
+    """
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Union[int, float, str]:
+        lhs = self.left.eval(ctx)
+        rhs = self.right.eval(ctx)
+        try:
+            return lhs + rhs
+        except TypeError:
+            # Adding a string and a number is the only failing case.
+            return str(lhs) + str(rhs)
+
+
+class StringAdd(Add):
+    """Represents a concatenation expression with a string operand.
+
+    If neither operand turns out to be a string at runtime, the
+    operands are added the same as :class:`Add`.
+    """
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Union[int, float, str]:
+        lhs = self.left.eval(ctx)
+        rhs = self.right.eval(ctx)
+        if lhs.__class__ is str or rhs.__class__ is str:
+            return str(lhs) + str(rhs)
+        return lhs + rhs
+
+
+class NumericSubtract(Subtract):
+    """Represents a subtraction expression of numeric operands."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Union[int, float]:
+        return self.left.eval(ctx) - self.right.eval(ctx)
+
+
+class NumericDiv(Div):
+    """Represents a division expression of numeric operands."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> float:
+        return self.left.eval(ctx) / self.right.eval(ctx)
+
+
+class NumericMul(Mul):
+    """Represents a multiplication expression of numeric operands."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Union[int, float]:
+        return self.left.eval(ctx) * self.right.eval(ctx)
+
+
+class TypedEq(Eq):
+    """Represents an equality expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) == self.right.eval(ctx)
+
+
+class TypedNEq(NEq):
+    """Represents an inequality expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) != self.right.eval(ctx)
+
+
+class TypedGt(Gt):
+    """Represents a greater than expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) > self.right.eval(ctx)
+
+
+class TypedGtEq(GtEq):
+    """Represents a greater than or equality expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) >= self.right.eval(ctx)
+
+
+class TypedLt(Lt):
+    """Represents a less than expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) < self.right.eval(ctx)
+
+
+class TypedLtEq(LtEq):
+    """Represents a less than or equality expression of operands of known type."""
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> bool:
+        return self.left.eval(ctx) <= self.right.eval(ctx)
@@ -27,7 +27,7 @@ from pspl.ast.base import Node
 from pspl import utils, lexer
 
 if TYPE_CHECKING:
-    from pspl.state import RuntimeState
+    from pspl.context import ExecutionContext
     from pspl.ast.block import Block
     from rply.token import SourcePosition
 
@@ -40,6 +40,7 @@ __all__ = (
     'If',
     'For',
     'ConditionalLoop',
+    'ProfiledStatement',
 )
 
 
@@ -47,7 +48,13 @@ class Statement(Node):
     """Represents a statement.
 
     This is a base class for other statements.
+
+    Attributes
+    ----------
+    source_pos: Optional[:class:`rply.token.SourcePosition`]
+        The source position of first token of the statement, if available.
     """
+    source_pos: Optional[SourcePosition] = None
 
 
 class Output(Statement):
@@ -57,18 +64,13 @@ class Output(Statement):
     ----------
     value:
         The value to print.
-    end:
-        The end of line.
     """
-    def __init__(self, value: Any) -> None:
+    def __init__(self, value: Any, source_pos: Optional[SourcePosition] = None) -> None:
         self.value = value
+        self.source_pos = source_pos
 
-    def eval(self) -> None:
-        if hasattr(self.value, '__pspl_output__'):
-            value = self.value.__pspl_output__()
-        else:
-            value = utils.maybe_eval(self.value)
-        print(value)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
+        ctx.output.write(utils.output_value(self.value.eval(ctx)))  # type: ignore
 
 
 class Declare(Statement):
@@ -81,12 +83,12 @@ class Declare(Statement):
     tp: :class:`str`
         The type of identifier.
     """
-    def __init__(self, ident: str, tp: str, state: RuntimeState) -> None:
+    def __init__(self, ident: str, tp: str, source_pos: Optional[SourcePosition] = None) -> None:
         self.ident = ident
         self.tp = tp
-        self._state = state
+        self.source_pos = source_pos
 
-    def eval(self) -> None:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
         pass
 
 
@@ -99,13 +101,18 @@ class Assignment(Statement):
         The identifier string.
     val: :class:`str`
         The value assigned to identifier.
+    slot: :class:`int`
+        The index of slot storing the identifier's value.
+    checked: :class:`bool`
+        Whether the identifier may be a constant at runtime and the
+        assignment has to be checked. Both of these attributes are set
+        by :class:`pspl.passes.Resolver`.
     """
     def __init__(
         self,
         ident: str,
         val: Any,
         is_update: bool,
-        state: RuntimeState,
         constant: bool,
         source_pos: Optional[SourcePosition],
     ) -> None:
@@ -114,15 +121,19 @@ class Assignment(Statement):
         self.is_update = is_update
         self.constant = constant
         self.source_pos = source_pos
-        self._state = state
-
-    def eval(self) -> None:
-        self._state.add_def(
-            self.ident,
-            utils.maybe_eval(self.val),
-            constant=self.constant,
-            source_pos=self.source_pos,
-        )
+        self.slot = -1
+        self.checked = True
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
+        if self.checked:
+            ctx.add_def(  # type: ignore
+                self.slot,
+                utils.maybe_eval(self.val, ctx),
+                constant=self.constant,
+                source_pos=self.source_pos,
+            )
+        else:
+            ctx.slots[self.slot] = utils.maybe_eval(self.val, ctx)  # type: ignore
 
 
 class Input(Statement):
@@ -134,28 +145,30 @@ class Input(Statement):
         The prompt to show.
     ident: :class:`Node`
         The identifier to store the input in.
+    slot: :class:`int`
+        The index of slot storing the identifier's value.
+    tp: Optional[:class:`str`]
+        The declared type of identifier or None if the type is not
+        declared. Both of these attributes are set by :class:`pspl.passes.Resolver`.
     """
-    def __init__(self, prompt: str, ident: str, state: RuntimeState) -> None:
+    def __init__(self, prompt: str, ident: str, source_pos: Optional[SourcePosition] = None) -> None:
         self.prompt = prompt
         self.ident = ident
-        self._state = state
+        self.source_pos = source_pos
+        self.slot = -1
+        self.tp: Optional[str] = None
 
-    def eval(self) -> None:
-        try:
-            tp = self._state.get_type_def(self.ident)
-        except KeyError:
-            cast = lambda v: v
-        else:
-            cast = lexer.INPUT_TYPE_CASTS.get(tp, lambda v: v)
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> None:
+        cast = lexer.INPUT_TYPE_CASTS.get(self.tp, str)  # type: ignore
 
         while True:
-            ipt = input(self.prompt)
+            ipt = ctx.read_input(self.prompt, self.source_pos)  # type: ignore
             try:
                 val = cast(ipt)
             except Exception:
                 continue
             else:
-                self._state.add_def(self.ident, val)
+                ctx.add_def(self.slot, val)  # type: ignore
                 break
 
 
@@ -169,20 +182,23 @@ class If(Statement):
     block: :class:`ast.Block`
         The block to execute.
     """
-    def __init__(self, expr: Any, block: Block, else_block: Optional[Block] = None) -> None:
+    def __init__(
+        self,
+        expr: Any,
+        block: Block,
+        else_block: Optional[Block] = None,
+        source_pos: Optional[SourcePosition] = None,
+    ) -> None:
         self.expr = expr
         self.block = block
         self.else_block = else_block
+        self.source_pos = source_pos
 
-    def eval(self) -> Any:
-        val = True
-        if hasattr(self.expr, '__pspl_bool__'):
-            val = self.expr.__pspl_bool__()
-        if val:
-            self.block.eval()
-        else:
-            if self.else_block:
-                self.else_block.eval()
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
+        if self.expr.eval(ctx):
+            self.block.eval(ctx)
+        elif self.else_block:
+            self.else_block.eval(ctx)
 
 
 class For(Statement):
@@ -194,8 +210,14 @@ class For(Statement):
         The start point.
     end:
         The end point.
+    step:
+        The value added to the loop identifier after every iteration.
     block: :class:`ast.Block`
         The block to execute.
+    ident: :class:`str`
+        The loop identifier. It is undefined after the loop.
+    source_pos: Optional[:class:`rply.token.SourcePosition`]
+        The source position of FOR keyword.
     """
     def __init__(
         self,
@@ -204,27 +226,36 @@ class For(Statement):
         step: Any,
         block: Block,
         ident: str,
-        keep_ident_after: bool,
-        state: RuntimeState,
+        source_pos: Optional[SourcePosition] = None,
     ) -> None:
         self.start = start
         self.end = end
         self.step = step
         self.block = block
         self.ident = ident
-        self.keep_ident_after = keep_ident_after
-        self._state = state
-
-    def eval(self) -> Any:
-        step = utils.maybe_eval(self.step)
-        start = utils.maybe_eval(self.start)
-        end = utils.maybe_eval(self.end) + step
-        ident = self.ident
-        for i in range(start, end, step):
-            self._state.add_def(self.ident, i)
-            self.block.eval()
-        if self.keep_ident_after:
-            self._state.remove_def(ident)
+        self.source_pos = source_pos
+        self.slot = -1
+        self.checked = True
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
+        # The step is checked before anything is bound to the identifier.
+        values = utils.loop_range(
+            utils.maybe_eval(self.start, ctx),
+            utils.maybe_eval(self.end, ctx),
+            utils.maybe_eval(self.step, ctx),
+            self.source_pos,
+        )
+        slot = self.slot
+        if self.checked:
+            # The identifier is defined as a constant somewhere, possibly
+            # in the loop body, so it is checked on every iteration.
+            block = self.block
+            for i in values:
+                ctx.add_def(slot, i)  # type: ignore
+                block.eval(ctx)
+        else:
+            self.block.eval_loop(ctx, slot, values)
+        ctx.remove_def(slot)  # type: ignore
 
 
 class ConditionalLoop(Statement):
@@ -233,21 +264,55 @@ class ConditionalLoop(Statement):
     A conditional loop is either a while loop or repeat-until
     loop. If `post_condition` is `True`, the loop is repeat-until
     loop.
+
+    The ``source_pos`` attribute is the source position of WHILE or
+    REPEAT keyword, if available.
     """
-    def __init__(self, cond: Any, block: Block, post_condition: bool) -> None:
+    def __init__(
+        self,
+        cond: Any,
+        block: Block,
+        post_condition: bool,
+        source_pos: Optional[SourcePosition] = None,
+    ) -> None:
         self.cond = cond
         self.block = block
         self.post_condition = post_condition
+        self.source_pos = source_pos
 
-    def eval(self) -> Any:
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
+        block = self.block
+        cond = self.cond
         if self.post_condition:
-            self.block.eval()
+            block.eval(ctx)
+        while cond.eval(ctx):
+            block.eval(ctx)
 
-        while True:
-            cond = utils.maybe_eval(self.cond)
-            if hasattr(cond, '__pspl_bool__'):
-                cond = cond.__pspl_bool__()
-            if cond:
-                self.block.eval()
-            else:
-                break
+
+class ProfiledStatement(Statement):
+    """Represents a statement whose execution is recorded by the profiler.
+
+    These nodes are only created by :class:`pspl.passes.ProfileInstrumenter`
+    and report the time taken by the wrapped statement to the
+    :class:`pspl.profiler.Profiler` of execution context.
+
+    Attributes
+    ----------
+    stmt: :class:`Statement`
+        The wrapped statement.
+    lineno: :class:`int`
+        The line number of wrapped statement or 0 if it's not known.
+    """
+    def __init__(self, stmt: Statement) -> None:
+        self.stmt = stmt
+        self.source_pos = stmt.source_pos
+        self.lineno = 0 if stmt.source_pos is None else stmt.source_pos.lineno
+
+    def eval(self, ctx: Optional[ExecutionContext] = None) -> Any:
+        profiler = ctx.profiler  # type: ignore
+        profiler.enter(self.lineno)
+        start = profiler.timer()
+        try:
+            self.stmt.eval(ctx)
+        finally:
+            profiler.exit(profiler.timer() - start)
@@ -0,0 +1,377 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Batch execution of several programs, or of a program against several test cases, on a process pool."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from pspl.parser.errors import PSPLParserError
+from pspl.parser import get_parser
+from pspl.runner import compile
+from pspl import lexer
+
+import functools
+import glob
+import os
+import rply
+import time
+
+if TYPE_CHECKING:
+    from pspl.program import Program
+
+__all__ = (
+    'SOURCE_SUFFIX',
+    'EXPECTED_SUFFIX',
+    'BatchResult',
+    'TestCase',
+    'CaseResult',
+    'error_details',
+    'expand_paths',
+    'run_file',
+    'run_batch',
+    'load_cases',
+    'run_case',
+    'run_cases',
+)
+
+SOURCE_SUFFIX = '.pspl'
+"""The file extension of programs collected from directories."""
+
+EXPECTED_SUFFIX = '.out'
+"""The file extension of the expected outputs of test cases."""
+
+
+class BatchResult(NamedTuple):
+    """The result of executing a program in batch mode."""
+
+    filename: str
+    """The file name of program."""
+
+    status: str
+    """``ok`` if the program executed successfully, ``error`` otherwise."""
+
+    error_type: Optional[str]
+    """The name of error type if the program failed."""
+
+    error_message: Optional[str]
+    """The error message if the program failed."""
+
+    line: Optional[int]
+    """The line number that the error occured at, if available."""
+
+    column: Optional[int]
+    """The column number that the error occured at, if available."""
+
+    time: float
+    """The wall time of compiling and executing the program in seconds."""
+
+    output: List[str]
+    """The output lines of program."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the result as a JSON serializable dictionary."""
+        return self._asdict()
+
+
+class TestCase(NamedTuple):
+    """A test case of a program."""
+
+    name: str
+    """The name of test case."""
+
+    inputs: List[str]
+    """The values used by INPUT statements."""
+
+    expected: List[str]
+    """The expected output lines."""
+
+
+class CaseResult(NamedTuple):
+    """The result of running a program against a test case."""
+
+    name: str
+    """The name of test case."""
+
+    status: str
+    """``pass`` if the output is as expected, ``fail`` if it is not and ``error`` if the program failed."""
+
+    error_type: Optional[str]
+    """The name of error type if the program failed."""
+
+    error_message: Optional[str]
+    """The error message if the program failed."""
+
+    line: Optional[int]
+    """The line number that the error occured at, if available."""
+
+    column: Optional[int]
+    """The column number that the error occured at, if available."""
+
+    time: float
+    """The wall time of executing the program in seconds."""
+
+    output: List[str]
+    """The output lines of program."""
+
+    expected: List[str]
+    """The expected output lines."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the result as a JSON serializable dictionary."""
+        return self._asdict()
+
+
+def error_details(error: BaseException) -> Tuple[str, str, Optional[int], Optional[int]]:
+    """Returns the error type name, message, line and column reported for an error of program."""
+    pos = getattr(error, 'source_pos', None)
+    if isinstance(error, rply.LexingError):
+        error_type, message = 'SyntaxError', 'Invalid syntax'
+    elif isinstance(error, PSPLParserError):
+        error_type, message = error.__class__.__name__, error.message
+    else:
+        error_type, message = error.__class__.__name__, str(error)
+    return error_type, message, pos.lineno if pos else None, pos.colno if pos else None
+
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """Expands the directories and glob patterns in given paths.
+
+    Directories are searched recursively for ``.pspl`` files. Paths
+    that are neither directories nor match any file are returned as is.
+    """
+    files: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            pattern = os.path.join(glob.escape(path), '**', '*' + SOURCE_SUFFIX)
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        elif any(char in path for char in '*?[') and not os.path.exists(path):
+            files.extend(sorted(glob.glob(path, recursive=True)) or [path])
+        else:
+            files.append(path)
+    return files
+
+
+def _read_inputs(filename: str, stdin_suffix: Optional[str]) -> List[str]:
+    if stdin_suffix is None:
+        return []
+    try:
+        with open(os.path.splitext(filename)[0] + stdin_suffix, 'r') as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def run_file(
+    filename: str,
+    *,
+    engine: str = 'tree',
+    parser: str = 'lr',
+    cache: bool = False,
+    stdin_suffix: Optional[str] = '.in',
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> BatchResult:
+    """Compiles and executes a program with its output captured.
+
+    The inputs of program are read from the file of same name with
+    ``stdin_suffix`` extension. If that file does not exist, INPUT
+    statements fail with :exc:`EOFError`. The ``max_steps`` and ``timeout``
+    limits are passed to :meth:`Program.run`.
+
+    This function doesn't raise errors; they are reported in the
+    returned :class:`BatchResult` instead.
+    """
+    output: List[str] = []
+    error: Optional[BaseException] = None
+    start = time.perf_counter()
+    try:
+        inputs = _read_inputs(filename, stdin_suffix)
+        program = compile(filename, file=True, engine=engine, parser=parser, cache=cache)
+        program.run(inputs=inputs, output=output, buffering='exit', max_steps=max_steps, timeout=timeout)
+    except Exception as err:
+        error = err
+    elapsed = time.perf_counter() - start
+
+    if error is None:
+        return BatchResult(filename, 'ok', None, None, None, None, elapsed, output)
+    return BatchResult(filename, 'error', *error_details(error), elapsed, output)
+
+
+def _init_worker(parser: str) -> None:
+    # Build the lexer and parser once per worker rather than per program.
+    lexer.get_lexer()
+    get_parser(parser)
+
+
+def run_batch(
+    filenames: List[str],
+    *,
+    jobs: Optional[int] = None,
+    engine: str = 'tree',
+    parser: str = 'lr',
+    cache: bool = False,
+    stdin_suffix: Optional[str] = '.in',
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Iterator[BatchResult]:
+    """Executes the programs on a pool of worker processes.
+
+    The lexer and parser are built once in each worker process. The
+    results are yielded in the order of given file names. See
+    :func:`run_file` for details about the other parameters.
+
+    Parameters
+    ----------
+    filenames: List[:class:`str`]
+        The file names of programs.
+    jobs: Optional[:class:`int`]
+        The number of worker processes. Defaults to the number of
+        processors. If this is 1, the programs are executed in the
+        current process.
+    """
+    func = functools.partial(
+        run_file,
+        engine=engine,
+        parser=parser,
+        cache=cache,
+        stdin_suffix=stdin_suffix,
+        max_steps=max_steps,
+        timeout=timeout,
+    )
+    if jobs == 1:
+        _init_worker(parser)
+        yield from map(func, filenames)
+        return
+
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, min(64, len(filenames) // (workers * 4)))
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(parser,)) as executor:
+        yield from executor.map(func, filenames, chunksize=chunksize)
+
+
+def load_cases(
+    directory: str,
+    *,
+    stdin_suffix: str = '.in',
+    expected_suffix: str = EXPECTED_SUFFIX,
+) -> List[TestCase]:
+    """Loads the test cases from a directory.
+
+    Every file with ``expected_suffix`` extension in the directory holds
+    the expected output of a test case named after the file. The inputs
+    of test case are read from the file of same name with ``stdin_suffix``
+    extension; if there is none, the test case has no inputs.
+    """
+    cases = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext != expected_suffix:
+            continue
+        path = os.path.join(directory, name)
+        with open(path, 'r') as f:
+            expected = f.read().splitlines()
+        cases.append(TestCase(stem, _read_inputs(path, stdin_suffix), expected))
+    return cases
+
+
+def run_case(
+    program: Program,
+    case: TestCase,
+    *,
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> CaseResult:
+    """Runs a compiled program against a test case.
+
+    The program is given the inputs of test case, which are cast to the
+    declared types of identifiers like input read from standard input,
+    and its output is compared with the expected output.
+
+    This function doesn't raise errors; they are reported in the
+    returned :class:`CaseResult` instead.
+    """
+    output: List[str] = []
+    error: Optional[BaseException] = None
+    start = time.perf_counter()
+    try:
+        program.run(inputs=case.inputs, output=output, buffering='exit', max_steps=max_steps, timeout=timeout)
+    except Exception as err:
+        error = err
+    elapsed = time.perf_counter() - start
+
+    if error is not None:
+        return CaseResult(case.name, 'error', *error_details(error), elapsed, output, case.expected)
+
+    status = 'pass' if output == case.expected else 'fail'
+    return CaseResult(case.name, status, None, None, None, None, elapsed, output, case.expected)
+
+
+_program: Optional[Program] = None
+
+
+def _init_case_worker(program: Program) -> None:
+    # The program is sent to each worker once rather than with every case.
+    global _program
+    _program = program
+
+
+def _run_worker_case(case: TestCase, **options: Any) -> CaseResult:
+    return run_case(_program, case, **options)  # type: ignore
+
+
+def run_cases(
+    program: Program,
+    cases: List[TestCase],
+    *,
+    jobs: Optional[int] = None,
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Iterator[CaseResult]:
+    """Runs a compiled program against the test cases on a pool of worker processes.
+
+    The program is only compiled once, by the caller, and is sent to each
+    worker process. The results are yielded in the order of given test
+    cases. See :func:`run_case` for details.
+
+    Parameters
+    ----------
+    program: :class:`pspl.program.Program`
+        The compiled program.
+    cases: List[:class:`TestCase`]
+        The test cases.
+    jobs: Optional[:class:`int`]
+        The number of worker processes. Defaults to the number of
+        processors. If this is 1, the test cases are run in the
+        current process.
+    """
+    if jobs == 1:
+        for case in cases:
+            yield run_case(program, case, max_steps=max_steps, timeout=timeout)
+        return
+
+    func = functools.partial(_run_worker_case, max_steps=max_steps, timeout=timeout)
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, min(64, len(cases) // (workers * 4)))
+    with ProcessPoolExecutor(workers, initializer=_init_case_worker, initargs=(program,)) as executor:
+        yield from executor.map(func, cases, chunksize=chunksize)
@@ -0,0 +1,306 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""On-disk cache of compiled programs.
+
+Compiled programs are stored in a ``__psplcache__`` directory next to the
+source file. Each cache file starts with a header holding the cache format
+version, PSPL and Python versions and the hash of source code. A cache file
+is only used if all of these match, otherwise the program is compiled again
+and the cache file is replaced.
+
+Cache files only hold the syntax tree as plain data written with
+:mod:`marshal`, never code or pickles, so loading a cache file can't run
+arbitrary code. The loaded nodes are checked to only have the attributes
+of their class, with values of the expected types and valid identifier
+names, before the code of ``vm`` and ``python`` engines is compiled from
+the tree again.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from rply.token import SourcePosition
+from pspl.program import Program
+from pspl.vm import Compiler
+from pspl import ast, lexer, transpiler
+
+import hashlib
+import marshal
+import os
+import pspl
+import re
+import sys
+import tempfile
+import threading
+
+__all__ = (
+    'CACHE_DIR',
+    'CACHE_SUFFIX',
+    'CacheInfo',
+    'get_cache_path',
+    'load',
+    'dump',
+    'cache_info',
+    'reset_cache_info',
+)
+
+CACHE_DIR = '__psplcache__'
+"""The name of directory that cache files are stored in."""
+
+CACHE_SUFFIX = '.psplc'
+"""The file extension of cache files."""
+
+_MAGIC = b'PSPLC\x00'
+_FORMAT_VERSION = 7
+
+# The only types of values, other than nodes and positions, that
+# attributes of nodes hold.
+_VALUE_TYPES = (int, float, str, bool, type(None))
+_NODES = {name: cls for name, cls in vars(ast).items() if isinstance(cls, type) and issubclass(cls, ast.Node)}
+
+# The identifier names are inserted into the source code of ``python``
+# engine, so they must be valid identifiers and nothing else.
+_IDENT_PATTERN = re.compile(lexer.TOKENS['IDENT'], re.ASCII)
+
+_IDENT = 'ident'
+_POS = (SourcePosition, type(None))
+_OPERAND = (ast.Node, int, float, str, bool)
+_BINARY = {'left': _OPERAND, 'right': _OPERAND}
+
+_SCHEMA: Dict[str, Dict[str, Any]] = {
+    'String': {'value': (str,)},
+    'Integer': {'value': (str,)},
+    'Float': {'value': (str,)},
+    'Boolean': {'value': (bool,)},
+    'Constant': {'value': (int, float, str, bool)},
+    'Block': {'statements': (list,)},
+    'Output': {'value': _OPERAND, 'source_pos': _POS},
+    'Declare': {'ident': _IDENT, 'tp': (str,), 'source_pos': _POS},
+    'Assignment': {
+        'ident': _IDENT,
+        'val': _OPERAND,
+        'is_update': (bool,),
+        'constant': (bool,),
+        'checked': (bool,),
+        'slot': (int,),
+        'source_pos': _POS,
+    },
+    'Input': {'prompt': (str,), 'ident': _IDENT, 'tp': (str, type(None)), 'slot': (int,), 'source_pos': _POS},
+    'If': {'expr': _OPERAND, 'block': (ast.Block,), 'else_block': (ast.Block, type(None)), 'source_pos': _POS},
+    'For': {
+        'start': _OPERAND,
+        'end': _OPERAND,
+        'step': _OPERAND,
+        'block': (ast.Block,),
+        'ident': _IDENT,
+        'checked': (bool,),
+        'slot': (int,),
+        'source_pos': _POS,
+    },
+    'ConditionalLoop': {'cond': _OPERAND, 'block': (ast.Block,), 'post_condition': (bool,), 'source_pos': _POS},
+    'Ident': {'name': _IDENT, 'pos': (SourcePosition,), 'slot': (int,)},
+    **dict.fromkeys(('Add', 'Subtract', 'Div', 'Mul', 'Eq', 'NEq', 'Gt', 'GtEq', 'Lt', 'LtEq'), _BINARY),
+    **dict.fromkeys(ast.specialized.__all__, _BINARY),
+}
+"""The attributes of cached node classes and the types of their values."""
+
+
+class CacheInfo(NamedTuple):
+    """The statistics of compiled program cache."""
+
+    hits: int
+    """The number of programs loaded from the cache."""
+
+    misses: int
+    """The number of programs that were not cached or had an outdated cache."""
+
+    writes: int
+    """The number of cache files written."""
+
+
+_lock = threading.Lock()
+_hits = _misses = _writes = 0
+
+
+def _record(hits: int = 0, misses: int = 0, writes: int = 0) -> None:
+    global _hits, _misses, _writes
+    with _lock:
+        _hits += hits
+        _misses += misses
+        _writes += writes
+
+
+def cache_info() -> CacheInfo:
+    """Returns the statistics of the cache in current process."""
+    with _lock:
+        return CacheInfo(_hits, _misses, _writes)
+
+
+def reset_cache_info() -> None:
+    """Resets the statistics returned by :func:`cache_info`."""
+    global _hits, _misses, _writes
+    with _lock:
+        _hits = _misses = _writes = 0
+
+
+def _header(source: str, engine: str) -> Tuple[Any, ...]:
+    return (
+        _FORMAT_VERSION,
+        pspl.__version__,
+        sys.implementation.cache_tag,
+        engine,
+        hashlib.sha256(source.encode()).hexdigest(),
+    )
+
+
+def get_cache_path(filename: str, engine: str) -> str:
+    """Returns the path of cache file for given source file and engine."""
+    head, tail = os.path.split(os.path.abspath(filename))
+    name = os.path.splitext(tail)[0]
+    return os.path.join(head, CACHE_DIR, f'{name}.{engine}{CACHE_SUFFIX}')
+
+
+def _encode(value: Any) -> Any:
+    # Converts the syntax tree to plain tuples, lists and dictionaries.
+    if isinstance(value, ast.Node):
+        return ('node', value.__class__.__name__, {key: _encode(val) for key, val in vars(value).items()})
+    if isinstance(value, list):
+        return [_encode(val) for val in value]
+    if isinstance(value, SourcePosition):
+        return ('pos', value.idx, value.lineno, value.colno)
+    if isinstance(value, _VALUE_TYPES):
+        return value
+    raise TypeError('Cannot cache value of type %r' % value.__class__.__name__)
+
+
+def _is_ident(value: Any) -> bool:
+    return isinstance(value, str) and _IDENT_PATTERN.fullmatch(value) is not None
+
+
+def _decode(value: Any) -> Any:
+    # Reverses _encode. Only the node classes of pspl.ast with the
+    # attributes of _SCHEMA are created.
+    if isinstance(value, list):
+        return [_decode(val) for val in value]
+    if isinstance(value, tuple):
+        tag = value[0]
+        if tag == 'node':
+            name, attrs = value[1], value[2]
+            schema = _SCHEMA[name]
+            if not isinstance(attrs, dict) or attrs.keys() != schema.keys():
+                raise ValueError('invalid attributes of %s' % name)
+            cls = _NODES[name]
+            node = cls.__new__(cls)
+            for key, val in attrs.items():
+                val = _decode(val)
+                expected = schema[key]
+                if expected is _IDENT:
+                    valid = _is_ident(val)
+                elif isinstance(val, list):
+                    valid = list in expected and all(isinstance(item, ast.Node) for item in val)
+                else:
+                    valid = isinstance(val, expected)
+                if not valid:
+                    raise ValueError('invalid value of %s.%s' % (name, key))
+                setattr(node, key, val)
+            return node
+        if tag == 'pos' and len(value) == 4 and all(type(v) is int for v in value[1:]):
+            return SourcePosition(*value[1:])
+        raise ValueError('unknown tag %r' % tag)
+    if isinstance(value, _VALUE_TYPES):
+        return value
+    raise ValueError('unexpected value of type %r' % value.__class__.__name__)
+
+
+def load(filename: str, source: str, engine: str) -> Optional[Program]:
+    """Loads the compiled program of given source file from the cache.
+
+    None is returned if the program is not cached or the cache
+    is outdated or unreadable.
+    """
+    path = get_cache_path(filename, engine)
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError('not a cache file')
+            # The payload is only read once the header is known to match.
+            header = marshal.load(f)
+            if header != _header(source, engine):
+                raise ValueError('outdated cache file')
+            names, tree = marshal.load(f)
+        names = tuple(names)
+        tree = _decode(tree)
+        if not isinstance(tree, ast.Block) or not all(name is None or _is_ident(name) for name in names):
+            raise ValueError('invalid cache file')
+
+        if engine == 'python':
+            code = transpiler.Transpiler().transpile(tree)
+        elif engine == 'vm':
+            code = Compiler().compile(tree)
+        else:
+            code = tree
+    except Exception:
+        # Missing, outdated and corrupted cache files are all handled by
+        # compiling the program again.
+        _record(misses=1)
+        return None
+
+    _record(hits=1)
+    return Program(engine=engine, names=names, tree=tree, code=code, filename=filename)
+
+
+def dump(filename: str, source: str, program: Program) -> bool:
+    """Writes the compiled program of given source file to the cache.
+
+    The cache file is written to a temporary file first and then renamed
+    so concurrent readers and writers never see a partially written file.
+
+    Returns whether the cache file was written. Errors such as unwritable
+    cache directory are ignored.
+    """
+    engine = program.engine
+    path = get_cache_path(filename, engine)
+    try:
+        data = marshal.dumps((program.names, _encode(program.tree)))
+    except (RecursionError, TypeError, ValueError):
+        return False
+
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='.tmp-', suffix=CACHE_SUFFIX, dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_MAGIC)
+                marshal.dump(_header(source, engine), f)
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        return False
+
+    _record(writes=1)
+    return True
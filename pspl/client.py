@@ -0,0 +1,144 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Client of the PSPL server started by ``python -m pspl serve``.
+
+A client connects to the Unix socket of server and sends a request as a
+single line of JSON::
+
+    {"source": "OUTPUT 1", "stdin": "", "engine": "vm", "max_steps": 1000}
+
+Only ``source`` is required. ``stdin`` holds the lines of input, and
+``engine``, ``parser``, ``max_steps`` and ``timeout`` override the defaults
+of server. The server replies with lines of JSON; an ``{"output": text}``
+line for each chunk of output as it is written and finally a
+``{"status": "ok" | "error", "error": text, "time": seconds}`` line.
+
+This module only depends on the standard library so that it can be run
+as a script (``python pspl/client.py``) without importing the interpreter.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, TextIO
+
+import argparse
+import json
+import socket
+import sys
+
+__all__ = (
+    'submit',
+)
+
+
+def submit(
+    path: str,
+    source: str,
+    *,
+    stdin: str = '',
+    output: Optional[TextIO] = None,
+    engine: Optional[str] = None,
+    parser: Optional[str] = None,
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Runs a program on the server listening on the given socket.
+
+    The output of program is written to ``output`` as it is received from
+    the server. Options that are None use the defaults of server, which
+    also caps the execution limits.
+
+    Parameters
+    ----------
+    path: :class:`str`
+        The path of Unix socket of server.
+    source: :class:`str`
+        The source code of program.
+    stdin: :class:`str`
+        The input of program; each line is used by an INPUT statement.
+    output: Optional[TextIO]
+        Where to write the output to. Defaults to standard output.
+
+    Returns
+    -------
+    Dict[:class:`str`, Any]
+        The final message of server with the ``status`` of program, the
+        ``error`` report if it failed and the ``time`` taken to run it.
+
+    Raises
+    ------
+    ConnectionError
+        The server closed the connection before sending the status.
+    """
+    if output is None:
+        output = sys.stdout
+
+    request: Dict[str, Any] = {'source': source, 'stdin': stdin}
+    options = {'engine': engine, 'parser': parser, 'max_steps': max_steps, 'timeout': timeout}
+    request.update((k, v) for k, v in options.items() if v is not None)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        with sock.makefile('rb') as f:
+            for line in f:
+                message = json.loads(line)
+                if 'output' in message:
+                    output.write(message['output'])
+                else:
+                    output.flush()
+                    return message
+
+    raise ConnectionError('Server closed the connection')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run a PSPL program on a PSPL server.')
+    parser.add_argument('--socket', required=True, help='The socket path of server')
+    parser.add_argument('--engine', default=None, help='The execution engine')
+    parser.add_argument('--parser', default=None, help='The parser backend')
+    parser.add_argument('--max-steps', type=int, default=None, help='Stop the program after this many steps')
+    parser.add_argument('--timeout', type=float, default=None, help='Stop the program after this many seconds')
+    parser.add_argument('filename')
+    args = parser.parse_args()
+
+    with open(args.filename, 'r') as f:
+        source = f.read()
+    stdin = '' if sys.stdin.isatty() else sys.stdin.read()
+
+    result = submit(
+        args.socket,
+        source,
+        stdin=stdin,
+        engine=args.engine,
+        parser=args.parser,
+        max_steps=args.max_steps,
+        timeout=args.timeout,
+    )
+    if result['error']:
+        sys.stdout.write(result['error'])
+    sys.exit(0 if result['status'] == 'ok' else 1)
+
+
+if __name__ == '__main__':
+    main()
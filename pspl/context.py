@@ -0,0 +1,285 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional
+from pspl.parser.errors import IdentifierAlreadyDefined, ExecutionLimitExceeded
+from pspl.output import OutputStream
+from pspl import utils
+
+import time
+
+if TYPE_CHECKING:
+    from rply.token import SourcePosition
+    from pspl.profiler import Profiler
+    from pspl.stats import RunStats
+
+__all__ = (
+    'ExecutionContext',
+)
+
+MISSING = utils.MISSING
+
+LIMIT_CHECK_INTERVAL = 1024
+"""The number of steps between checks of the execution time limit."""
+
+
+class ExecutionContext:
+    """The state of a single execution of a program.
+
+    Compiled programs don't hold any runtime data so every run gets a new
+    context storing the values of identifiers and the input/output streams.
+
+    Parameters
+    ----------
+    names: List[:class:`str`]
+        The identifier names indexed by their slots.
+    output: Optional[:class:`pspl.output.OutputStream`]
+        The stream to write output to. Defaults to a line buffered
+        stream writing to standard output.
+    inputs: Optional[Iterable[:class:`str`]]
+        The values to use for INPUT statements instead of reading them
+        from standard input. When given, the prompts are not shown and
+        :exc:`EOFError` is raised once the inputs are exhausted.
+    max_steps: Optional[:class:`int`]
+        The maximum number of steps the execution may take.
+    timeout: Optional[:class:`float`]
+        The maximum number of seconds the execution may take, measured
+        from creation of the context. Time spent waiting for input is
+        included, but a read that blocks is not interrupted; the limit is
+        only enforced once the input arrives.
+    profiler: Optional[:class:`pspl.profiler.Profiler`]
+        The profiler recording the execution, if it is profiled.
+    stats: Optional[:class:`pspl.stats.RunStats`]
+        The statistics to record the runtime counters in, if they are
+        counted.
+
+    Attributes
+    ----------
+    slots: List[Any]
+        The values of identifiers. Undefined identifiers have the
+        :data:`pspl.utils.MISSING` value.
+    constant_slots: List[:class:`bool`]
+        Whether the identifier in the slot is a constant.
+    output: :class:`pspl.output.OutputStream`
+        The output stream.
+    steps: :class:`int`
+        The number of steps taken so far. Steps are only counted when
+        the context has a step or time limit, in which case every
+        execution of a loop body takes as many steps as there are
+        statements in the body. The ``vm`` and ``python`` engines count
+        the steps locally and only update this when checking the limits.
+    """
+    __slots__ = (
+        'names',
+        'slots',
+        'constant_slots',
+        'output',
+        'steps',
+        'max_steps',
+        'timeout',
+        'profiler',
+        'stats',
+        '_inputs',
+        '_deadline',
+        '_next_check',
+        '_slice_end',
+    )
+
+    def __init__(
+        self,
+        names: List[str],
+        *,
+        output: Optional[OutputStream] = None,
+        inputs: Optional[Iterable[str]] = None,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        stats: Optional[RunStats] = None,
+    ) -> None:
+        self.names = names
+        self.slots: List[Any] = [MISSING] * len(names)
+        self.constant_slots: List[bool] = [False] * len(names)
+        self.output = OutputStream() if output is None else output
+        self.steps = 0
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.profiler = profiler
+        self.stats = stats
+        self._inputs: Optional[Iterator[str]] = None if inputs is None else iter(inputs)
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._next_check = 0
+        self._slice_end: Optional[int] = None
+        self._schedule_check()
+
+    @property
+    def limited(self) -> bool:
+        """:class:`bool`: Whether the execution has a step or time limit."""
+        return self.max_steps is not None or self.timeout is not None
+
+    def tick(self, steps: int, source_pos: Optional[SourcePosition] = None) -> None:
+        """Counts the given number of steps and enforces the limits.
+
+        The time limit is only checked every :data:`LIMIT_CHECK_INTERVAL`
+        steps so the cost of a call is mostly an addition.
+
+        Raises
+        ------
+        ExecutionLimitExceeded
+            The step or time limit has been exceeded.
+        """
+        self.steps += steps
+        if self.steps > self._next_check:
+            self._check_limits(source_pos)
+
+    @property
+    def step_budget(self) -> int:
+        """:class:`int`: The number of steps that can be taken before the limits have to be checked."""
+        return self._next_check - self.steps
+
+    def refill(self, budget: int, source_pos: Optional[SourcePosition] = None) -> int:
+        """Enforces the limits for an engine counting down the step budget.
+
+        Engines may count the steps in a local variable initialized to
+        :attr:`step_budget` rather than calling :meth:`tick`. Once the
+        variable drops below zero, this method is called with its value to
+        update :attr:`steps` and check the limits. The new budget is returned.
+
+        Raises
+        ------
+        ExecutionLimitExceeded
+            The step or time limit has been exceeded.
+        """
+        self.count_steps(budget)
+        self._check_limits(source_pos)
+        return self._next_check - self.steps
+
+    def count_steps(self, budget: int) -> None:
+        """Updates :attr:`steps` from the remaining budget of an engine without checking the limits.
+
+        This is used once the execution finishes with some budget left.
+        """
+        self.steps = self._next_check - budget
+
+    def start_slice(self, steps: int) -> int:
+        """Starts a time slice of the given number of steps.
+
+        The step budget is lowered so that an engine counting it down checks
+        the limits by the end of slice, after which :attr:`slice_over` is True.
+        This is used by :class:`pspl.runner.Scheduler` to preempt resumable
+        executions. The new step budget is returned.
+        """
+        self._slice_end = self.steps + steps
+        self._schedule_check()
+        return self._next_check - self.steps
+
+    @property
+    def slice_over(self) -> bool:
+        """:class:`bool`: Whether the steps of the time slice started by :meth:`start_slice` are taken."""
+        return self._slice_end is not None and self.steps >= self._slice_end
+
+    def _check_limits(self, source_pos: Optional[SourcePosition]) -> None:
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise ExecutionLimitExceeded(
+                source_pos,
+                'max_steps',
+                'Execution exceeded the limit of %d steps' % self.max_steps,
+            )
+        self.check_timeout(source_pos)
+        self._schedule_check()
+
+    def check_timeout(self, source_pos: Optional[SourcePosition] = None) -> None:
+        """Raises :exc:`ExecutionLimitExceeded` if the time limit is exceeded.
+
+        The error is reported at ``source_pos``.
+        """
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise ExecutionLimitExceeded(
+                source_pos,
+                'timeout',
+                'Execution exceeded the time limit of %g seconds' % self.timeout,
+            )
+
+    def _schedule_check(self) -> None:
+        next_check = self.steps + LIMIT_CHECK_INTERVAL
+        if self.max_steps is not None and self.max_steps < next_check:
+            next_check = self.max_steps
+        if self._slice_end is not None and self._slice_end < next_check:
+            next_check = self._slice_end
+        self._next_check = next_check
+
+    def add_def(
+        self,
+        slot: int,
+        val: Any,
+        *,
+        constant: bool = False,
+        source_pos: Optional[SourcePosition] = None,
+    ) -> None:
+        """Stores the value of identifier in given slot.
+
+        Raises
+        ------
+        IdentifierAlreadyDefined
+            The identifier is a constant.
+        """
+        if self.constant_slots[slot]:
+            raise IdentifierAlreadyDefined(source_pos, self.names[slot])
+        if constant:
+            self.constant_slots[slot] = True
+        self.slots[slot] = val
+
+    def remove_def(self, slot: int) -> None:
+        """Undefines the identifier in given slot."""
+        if self.stats is not None:
+            self.record_peak_variables()
+        self.slots[slot] = MISSING
+
+    def record_peak_variables(self) -> None:
+        """Updates the peak variable count of :attr:`stats` with the current count.
+
+        The number of defined identifiers only decreases when they are
+        undefined, so calling this before that and at the end of execution
+        is enough to find the peak.
+        """
+        slots = self.slots
+        defined = len(slots) - slots.count(MISSING)
+        if defined > self.stats.peak_variables:  # type: ignore
+            self.stats.peak_variables = defined  # type: ignore
+
+    def read_input(self, prompt: str, source_pos: Optional[SourcePosition] = None) -> str:
+        """Reads a line of input, flushing the output first.
+
+        The time limit is checked once the line is read, with the error
+        reported at ``source_pos``, so waiting for input can't exceed it.
+        """
+        self.output.flush()
+        if self._inputs is None:
+            line = input(prompt)
+        else:
+            try:
+                line = str(next(self._inputs))
+            except StopIteration:
+                raise EOFError('No more inputs available') from None
+        self.check_timeout(source_pos)
+        return line
@@ -24,22 +24,34 @@
 
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Tuple, Union
+from rply.token import Token, SourcePosition
+
+import re
+import threading
+import rply
+
+if TYPE_CHECKING:
+    from rply.lexer import Lexer
 
 __all__ = (
     'TOKENS',
     'IGNORED_TOKENS',
     'BUILTIN_TYPES',
     'INPUT_TYPE_CASTS',
+    'LEXER_BACKENDS',
+    'Tokenizer',
+    'get_lexer',
+    'reset_lexer',
 )
 
 TOKENS: Dict[str, str] = {
     # Literals
-    'LT_STRING': r'(".+")|(\'.+\')|(\'\')|("")',
-    'LT_FLOAT': r'[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)',
+    'LT_STRING': r'"([^"\\\n]|\\.)*"|\'([^\'\\\n]|\\.)*\'',
+    'LT_FLOAT': r'[0-9]+[.][0-9]*|[.][0-9]+',
     'LT_INTEGER': r'\d+',
-    'LT_BOOLEAN_TRUE': r'TRUE',
-    'LT_BOOLEAN_FALSE': r'FALSE',
+    'LT_BOOLEAN_TRUE': r'TRUE\b',
+    'LT_BOOLEAN_FALSE': r'FALSE\b',
 
     # Operators
     'OP_ASSIGN': r'<-',
@@ -50,10 +62,10 @@ TOKENS: Dict[str, str] = {
     'OP_MUL': r'\*',
     'OP_EQ': r'=',
     'OP_NEQ': r'<>',
-    'OP_GT': r'>',
-    'OP_LT': r'<',
     'OP_GTEQ': r'>=',
     'OP_LTEQ': r'<=',
+    'OP_GT': r'>',
+    'OP_LT': r'<',
 
     # Symbols
     'SYM_COLON': r':',
@@ -61,23 +73,23 @@ TOKENS: Dict[str, str] = {
     'SYM_RPAREN': r'\)',
 
     # Statements
-    'ST_OUTPUT': r'OUTPUT',
-    'ST_DECLARE': r'DECLARE',
-    'ST_CONSTANT': r'CONSTANT',
-    'ST_INPUT': r'INPUT',
-    'ST_THEN': r'THEN',
-    'ST_IF': r'IF',
-    'ST_ENDIF': r'ENDIF',
-    'ST_ELSE': r'ELSE',
-    'ST_FOR': r'FOR',
-    'ST_ENDFOR': r'ENDFOR',
-    'ST_TO': r'TO',
-    'ST_STEP': r'STEP',
-    'ST_WHILE': r'WHILE',
-    'ST_DO': r'DO',
-    'ST_ENDWHILE': r'ENDWHILE',
-    'ST_REPEAT': r'REPEAT',
-    'ST_UNTIL': r'UNTIL',
+    'ST_OUTPUT': r'OUTPUT\b',
+    'ST_DECLARE': r'DECLARE\b',
+    'ST_CONSTANT': r'CONSTANT\b',
+    'ST_INPUT': r'INPUT\b',
+    'ST_THEN': r'THEN\b',
+    'ST_IF': r'IF\b',
+    'ST_ENDIF': r'ENDIF\b',
+    'ST_ELSE': r'ELSE\b',
+    'ST_FOR': r'FOR\b',
+    'ST_ENDFOR': r'ENDFOR\b',
+    'ST_TO': r'TO\b',
+    'ST_STEP': r'STEP\b',
+    'ST_WHILE': r'WHILE\b',
+    'ST_DO': r'DO\b',
+    'ST_ENDWHILE': r'ENDWHILE\b',
+    'ST_REPEAT': r'REPEAT\b',
+    'ST_UNTIL': r'UNTIL\b',
 
     # Identifier
     'IDENT': r'[a-zA-Z_][a-zA-Z\d_]*',
@@ -114,3 +126,147 @@ INPUT_TYPE_CASTS: Dict[str, Callable[[str], Any]] = {
     'FLOAT': float,
     'BOOLEAN': _bool_type_cast,
 }
+
+
+_KEYWORD_PATTERN = re.compile(r'([a-zA-Z_][a-zA-Z\d_]*)\\b')
+_WORD_CHAR = re.compile(r'\w')
+
+
+class Tokenizer:
+    """A lexer that matches all the token rules using a single regular expression.
+
+    Unlike :class:`rply.lexer.Lexer` which tries every rule one by one at each
+    position, this lexer compiles all the rules in a single alternation of
+    named groups. Keyword rules (rules whose pattern is a plain word followed
+    by ``\\b``) are not part of the alternation and are instead resolved
+    using a dictionary lookup on the matched ``IDENT`` tokens.
+
+    The produced tokens are identical to the ones produced by the rply lexer
+    for the same rules.
+
+    Parameters
+    ----------
+    tokens: Dict[:class:`str`, :class:`str`]
+        The mapping of token names to their patterns.
+    ignored_tokens: Tuple[:class:`str`, ...]
+        The patterns to ignore.
+    """
+    def __init__(self, tokens: Dict[str, str], ignored_tokens: Tuple[str, ...]) -> None:
+        self.keywords: Dict[str, str] = {}
+        rules: List[str] = []
+
+        for token, pattern in tokens.items():
+            match = _KEYWORD_PATTERN.fullmatch(pattern)
+            if match:
+                self.keywords[match.group(1)] = token
+            else:
+                rules.append('(?P<%s>%s)' % (token, pattern))
+
+        # Ignored patterns are wrapped in non capturing groups and are
+        # placed first so that they are always matched before tokens.
+        ignored = ['(?:%s)' % pattern for pattern in ignored_tokens]
+        self.regex = re.compile('|'.join(ignored + rules))
+
+    def lex(self, source: str) -> Iterator[Token]:
+        """Returns an iterator yielding the tokens in the given source.
+
+        Raises
+        ------
+        rply.LexingError
+            Invalid token encountered. This is raised lazily upon
+            iteration.
+        """
+        match = self.regex.match
+        word_char = _WORD_CHAR.match
+        keywords = self.keywords
+        idx = 0
+        lineno = 1
+        line_start = 0
+        end = len(source)
+
+        while idx < end:
+            m = match(source, idx)
+            if m is None:
+                raise rply.LexingError(None, SourcePosition(idx, lineno, idx - line_start + 1))
+
+            token = m.lastgroup
+            value = m.group()
+            if token is not None:
+                if token == 'IDENT' and value in keywords:
+                    # IDENT only matches ASCII letters so a keyword may be
+                    # followed by another word character, in which case the
+                    # keyword pattern's \b does not match.
+                    if not word_char(source, m.end()):
+                        token = keywords[value]
+                yield Token(token, value, SourcePosition(idx, lineno, idx - line_start + 1))
+            if '\n' in value:
+                lineno += value.count('\n')
+                line_start = idx + value.rindex('\n') + 1
+
+            idx = m.end()
+
+
+def _build_rply_lexer() -> Lexer:
+    lg = rply.LexerGenerator()
+    for token, pattern in TOKENS.items():
+        lg.add(token, pattern)
+    for pattern in IGNORED_TOKENS:
+        lg.ignore(pattern)
+    return lg.build()
+
+
+def _build_tokenizer() -> Tokenizer:
+    return Tokenizer(TOKENS, IGNORED_TOKENS)
+
+
+LEXER_BACKENDS: Dict[str, Callable[[], Any]] = {
+    'combined': _build_tokenizer,
+    'rply': _build_rply_lexer,
+}
+"""The available lexer backends.
+
+``combined`` is the default backend and uses :class:`Tokenizer`. ``rply``
+uses the :class:`rply.lexer.Lexer`.
+"""
+
+_lexers: Dict[str, Union[Lexer, Tokenizer]] = {}
+_lexer_lock = threading.Lock()
+
+
+def get_lexer(backend: str = 'combined') -> Union[Lexer, Tokenizer]:
+    """Returns the lexer built from the token definitions.
+
+    The lexer is built (and the token patterns are compiled) only once
+    per process for each backend and is shared by all runtime states.
+    This function is thread safe.
+
+    If :data:`TOKENS` or :data:`IGNORED_TOKENS` are modified after the
+    lexer has been built, :func:`reset_lexer` must be called for the
+    changes to take effect.
+
+    Parameters
+    ----------
+    backend: :class:`str`
+        The lexer backend to use. See :data:`LEXER_BACKENDS` for the
+        possible values. Defaults to ``combined``.
+    """
+    try:
+        return _lexers[backend]
+    except KeyError:
+        pass
+
+    with _lexer_lock:
+        if backend not in _lexers:
+            _lexers[backend] = LEXER_BACKENDS[backend]()
+
+    return _lexers[backend]
+
+
+def reset_lexer() -> None:
+    """Resets the lexer cache.
+
+    After calling this method, :func:`get_lexer` rebuilds the lexers from
+    the current token definitions rather than returning the cached ones.
+    """
+    with _lexer_lock:
+        _lexers.clear()
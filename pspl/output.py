@@ -0,0 +1,134 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Output stream used by the OUTPUT statement."""
+
+from __future__ import annotations
+
+from typing import Any, List, Tuple
+
+import sys
+
+__all__ = (
+    'BUFFERING_MODES',
+    'OutputStream',
+)
+
+BUFFERING_MODES: Tuple[str, ...] = (
+    'line',
+    'block',
+    'exit',
+)
+"""The available buffering modes of :class:`OutputStream`.
+
+``line`` writes every line to the sink as soon as it is output, ``block``
+writes the lines once they exceed the buffer size and ``exit`` writes all
+the lines at the end of execution.
+"""
+
+
+class OutputStream:
+    """The stream that OUTPUT statements write lines to.
+
+    The stream buffers the output lines according to the buffering mode and
+    writes them to the sink in chunks. Regardless of the mode, the stream is
+    always flushed before an INPUT statement prompts for input and at the end
+    of the execution.
+
+    Parameters
+    ----------
+    sink:
+        Where to write the output to. This can either be a file-like object
+        (an object with a ``write`` method), a :class:`list` that the lines
+        (without trailing newline) are appended to or a callable that is
+        called with each chunk of text. Defaults to :data:`sys.stdout`.
+    buffering: :class:`str`
+        The buffering mode, one of :data:`BUFFERING_MODES`. Defaults to ``line``.
+    buffer_size: :class:`int`
+        The number of characters to buffer before writing in ``block``
+        mode. Defaults to 8192.
+    """
+    def __init__(self, sink: Any = None, *, buffering: str = 'line', buffer_size: int = 8192) -> None:
+        if buffering not in BUFFERING_MODES:
+            raise ValueError('Unknown buffering mode %r' % buffering)
+        if not (sink is None or isinstance(sink, list) or hasattr(sink, 'write') or callable(sink)):
+            raise TypeError('sink must be a file-like object, list or callable')
+
+        self.sink = sink
+        self.buffering = buffering
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._size = 0
+
+        if buffering == 'line':
+            self.write = self._write_line  # type: ignore
+
+    def _write_text(self, text: str) -> None:
+        sink = self.sink
+        if sink is None:
+            sys.stdout.write(text)
+        elif hasattr(sink, 'write'):
+            sink.write(text)
+        else:
+            sink(text)
+
+    def _write_line(self, value: Any) -> None:
+        line = str(value)
+        if isinstance(self.sink, list):
+            self.sink.append(line)
+        else:
+            self._write_text(line + '\n')
+
+    def write(self, value: Any) -> None:
+        """Writes a line to the stream."""
+        line = str(value)
+        self._buffer.append(line)
+        self._size += len(line) + 1
+        if self._size >= self.buffer_size and self.buffering == 'block':
+            self.flush()
+
+    def write_error(self, text: str) -> None:
+        """Writes an error report to the sink after the buffered lines.
+
+        The report is written as is, so it should end with a newline. If
+        the sink is a :class:`list`, which only collects the output lines,
+        the report is written to :data:`sys.stderr` instead.
+        """
+        self.flush()
+        if isinstance(self.sink, list):
+            sys.stderr.write(text)
+        else:
+            self._write_text(text)
+
+    def flush(self) -> None:
+        """Writes the buffered lines to the sink."""
+        if not self._buffer:
+            return
+
+        lines = self._buffer
+        self._buffer = []
+        self._size = 0
+        if isinstance(self.sink, list):
+            self.sink.extend(lines)
+        else:
+            self._write_text('\n'.join(lines) + '\n')
+
@@ -8,3 +8,4 @@ from .program import *
 from .expressions import *
 from .statements import *
 from .generator import *
+from .descent import *
@@ -0,0 +1,347 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Hand-written recursive descent parser.
+
+This parser is an alternative to the :class:`rply.parser.LRParser` built by
+:func:`pspl.parser.build`. It accepts the same grammar, produces identical
+syntax trees and reports syntax errors at the same tokens with the same
+messages, but avoids the overhead of table driven parsing.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional
+from rply.token import Token
+from pspl.parser import expressions, generator, program, statements
+from pspl import ast, lexer
+
+import gc
+import threading
+
+if TYPE_CHECKING:
+    from pspl.state import RuntimeState
+
+__all__ = (
+    'PARSER_BACKENDS',
+    'RecursiveDescentParser',
+    'get_parser',
+    'reset_parser',
+)
+
+_STATEMENT_TOKENS = frozenset((
+    'ST_OUTPUT',
+    'ST_DECLARE',
+    'ST_INPUT',
+    'ST_CONSTANT',
+    'ST_IF',
+    'ST_FOR',
+    'ST_WHILE',
+    'ST_REPEAT',
+    'IDENT',
+))
+
+_LITERAL_NODES: Dict[str, Callable[[str], ast.Node]] = {
+    'LT_INTEGER': ast.Integer,
+    'LT_FLOAT': ast.Float,
+    'LT_STRING': ast.String,
+}
+
+_OPERATOR_NODES: Dict[str, Callable[[Any, Any], ast.Node]] = {
+    **expressions.ARITHMETIC_EXPRESSION_NODES,
+    **expressions.BOOLEAN_EXPRESSION_NODES,
+}
+
+
+def _binding_powers() -> Dict[str, int]:
+    # Like rply, later precedence levels bind tighter.
+    powers = {}
+    for level, (assoc, tokens) in enumerate(lexer.PRECEDENCE, start=1):
+        if assoc != 'left':
+            raise ValueError('Only left associative operators are supported')
+        for token in tokens:
+            powers[token] = level
+    return powers
+
+
+class RecursiveDescentParser:
+    """A hand-written parser for PSPL.
+
+    Statements are parsed by recursive descent and the expressions are
+    parsed by precedence climbing using the binding powers derived from
+    :data:`pspl.lexer.PRECEDENCE`. Like the productions of LR parser,
+    a unary operator binds the operators with higher precedence than
+    its own to its operand, e.g. ``-a * b`` is parsed as ``-(a * b)``.
+
+    The statement nodes are created by the same production functions that
+    are used by the LR parser and syntax errors are reported using the
+    same error handler.
+
+    The cyclic garbage collector is paused while parsing. Parsing only
+    allocates long lived objects without reference cycles so the collections
+    triggered by the allocations are pure overhead on large programs.
+
+    This class has the same interface as :class:`rply.parser.LRParser`.
+    """
+    def __init__(self) -> None:
+        self.binding_powers = _binding_powers()
+
+    def parse(self, tokenizer: Iterator[Token], state: Optional[RuntimeState] = None) -> ast.Block:
+        """Parses the tokens and returns the program block.
+
+        Raises
+        ------
+        PSPLParserError
+            The tokens could not be parsed.
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return _Parser(self.binding_powers, tokenizer, state).parse_program()
+        finally:
+            if enabled:
+                gc.enable()
+
+
+class _Parser:
+    # Holds the state of parsing a single token stream.
+
+    def __init__(self, binding_powers: Dict[str, int], tokenizer: Iterator[Token], state: Any) -> None:
+        self.powers = binding_powers
+        self.state = state
+        self.next_token = tokenizer.__next__
+        self.lookahead: Optional[Token] = None
+
+    def peek(self) -> Token:
+        # Tokens are only read when needed so that the productions are
+        # called in same order relative to lexing as with LR parser.
+        tok = self.lookahead
+        if tok is None:
+            try:
+                tok = self.next_token()
+            except StopIteration:
+                tok = Token('$end', '$end')
+            self.lookahead = tok
+        return tok
+
+    def advance(self) -> Token:
+        tok = self.peek()
+        self.lookahead = None
+        return tok
+
+    def expect(self, tp: str) -> Token:
+        tok = self.peek()
+        if tok.name != tp:
+            self.error(tok)
+        self.lookahead = None
+        return tok
+
+    def error(self, tok: Token) -> None:
+        program.generator_error_handler(self.state, tok)
+
+    def parse_program(self) -> ast.Block:
+        block = self.parse_stmt_list()
+        tok = self.peek()
+        if tok.name != '$end':
+            self.error(tok)
+        return program.prod_program(self.state, [block])
+
+    def parse_stmt_list(self) -> ast.Block:
+        state = self.state
+        block = None
+        while self.peek().name in _STATEMENT_TOKENS:
+            stmt = self.parse_stmt()
+            if block is None:
+                block = statements.prod_stmt_list(state, [stmt])
+            else:
+                block = statements.prod_stmt_list(state, [block, stmt])
+
+        if block is None:
+            self.error(self.peek())
+        return block  # type: ignore
+
+    def parse_stmt(self) -> Any:
+        tok = self.advance()
+        return getattr(self, 'parse_' + tok.name)(tok)
+
+    def parse_ST_OUTPUT(self, tok: Token) -> Any:
+        return statements.prod_stmt_output(self.state, [tok, self.parse_expr()])
+
+    def parse_ST_DECLARE(self, tok: Token) -> Any:
+        ident = self.expect('IDENT')
+        colon = self.expect('SYM_COLON')
+        tp = self.expect('IDENT')
+        return statements.prod_stmt_declare(self.state, [tok, ident, colon, tp])
+
+    def parse_ST_INPUT(self, tok: Token) -> Any:
+        if self.peek().name == 'IDENT':
+            ident = self.advance()
+            tp = self.peek().name
+            if tp != 'OP_SEP' and tp not in self.powers:
+                return statements.prod_stmt_input(self.state, [tok, ident])
+            prompt = self.parse_expr(0, ast.Ident(name=ident.value, pos=ident.source_pos))
+        else:
+            prompt = self.parse_expr()
+
+        sep = self.expect('OP_SEP')
+        ident = self.expect('IDENT')
+        return statements.prod_stmt_input(self.state, [tok, prompt, sep, ident])
+
+    def parse_IDENT(self, tok: Token) -> Any:
+        op = self.expect('OP_ASSIGN')
+        return statements.prod_assign(self.state, [tok, op, self.parse_expr()])
+
+    def parse_ST_CONSTANT(self, tok: Token) -> Any:
+        ident = self.expect('IDENT')
+        op = self.expect('OP_EQ')
+        return statements.prod_assign(self.state, [tok, ident, op, self.parse_expr()])
+
+    def parse_ST_IF(self, tok: Token) -> Any:
+        expr = self.parse_expr()
+        then = self.expect('ST_THEN')
+        block = self.parse_stmt_list()
+        if self.peek().name == 'ST_ELSE':
+            else_ = self.advance()
+            else_block = self.parse_stmt_list()
+            end = self.expect('ST_ENDIF')
+            return statements.prod_if(self.state, [tok, expr, then, block, else_, else_block, end])
+
+        end = self.expect('ST_ENDIF')
+        return statements.prod_if(self.state, [tok, expr, then, block, end])
+
+    def parse_ST_FOR(self, tok: Token) -> Any:
+        start = self.advance()
+        if start.name == 'IDENT':
+            assign = self.parse_IDENT(start)
+        elif start.name == 'ST_CONSTANT':
+            assign = self.parse_ST_CONSTANT(start)
+        else:
+            self.error(start)
+
+        to = self.expect('ST_TO')
+        end = self.parse_expr()
+        if self.peek().name == 'ST_STEP':
+            step_tok = self.advance()
+            step = self.parse_expr()
+            block = self.parse_stmt_list()
+            endfor = self.expect('ST_ENDFOR')
+            return statements.prod_for(self.state, [tok, assign, to, end, step_tok, step, block, endfor])
+
+        block = self.parse_stmt_list()
+        endfor = self.expect('ST_ENDFOR')
+        return statements.prod_for(self.state, [tok, assign, to, end, block, endfor])
+
+    def parse_ST_WHILE(self, tok: Token) -> Any:
+        cond = self.parse_expr()
+        do = self.expect('ST_DO')
+        block = self.parse_stmt_list()
+        end = self.expect('ST_ENDWHILE')
+        return statements.prod_while(self.state, [tok, cond, do, block, end])
+
+    def parse_ST_REPEAT(self, tok: Token) -> Any:
+        block = self.parse_stmt_list()
+        until = self.expect('ST_UNTIL')
+        return statements.prod_repeat(self.state, [tok, block, until, self.parse_expr()])
+
+    def parse_expr(self, power: int = 0, left: Any = None) -> Any:
+        # Parses an expression whose operators bind tighter than the given
+        # power. If left is given, it is used as the first operand.
+        if left is None:
+            tok = self.lookahead or self.peek()
+            self.lookahead = None
+            tp = tok.name
+            if tp == 'IDENT':
+                left = ast.Ident(name=tok.value, pos=tok.source_pos)
+            elif tp in _LITERAL_NODES:
+                left = _LITERAL_NODES[tp](tok.value)
+            elif tp == 'LT_BOOLEAN_TRUE':
+                left = ast.Boolean(True)
+            elif tp == 'LT_BOOLEAN_FALSE':
+                left = ast.Boolean(False)
+            elif tp == 'SYM_LPAREN':
+                left = self.parse_expr()
+                self.expect('SYM_RPAREN')
+            elif tp == 'OP_MINUS':
+                left = ast.Subtract(0, self.parse_expr(self.powers[tp]))
+            elif tp == 'OP_PLUS':
+                left = ast.Add(0, self.parse_expr(self.powers[tp]))
+            else:
+                self.error(tok)
+
+        powers = self.powers
+        while True:
+            tp = (self.lookahead or self.peek()).name
+            op_power = powers.get(tp, 0)
+            if op_power <= power:
+                return left
+
+            self.lookahead = None
+            left = _OPERATOR_NODES[tp](left, self.parse_expr(op_power))
+
+
+PARSER_BACKENDS: Dict[str, Callable[[], Any]] = {
+    'lr': generator.build,
+    'descent': RecursiveDescentParser,
+}
+"""The available parser backends.
+
+``lr`` is the default backend and uses the :class:`rply.parser.LRParser`
+built from the grammar productions. ``descent`` uses the hand-written
+:class:`RecursiveDescentParser`.
+"""
+
+_parsers: Dict[str, Any] = {}
+_parser_lock = threading.Lock()
+
+
+def get_parser(backend: str = 'lr') -> Any:
+    """Returns the parser for the given backend.
+
+    The parser is created only once per process for each backend and is
+    shared by all runtime states. This function is thread safe.
+
+    Parameters
+    ----------
+    backend: :class:`str`
+        The parser backend to use. See :data:`PARSER_BACKENDS` for the
+        possible values. Defaults to ``lr``.
+    """
+    try:
+        return _parsers[backend]
+    except KeyError:
+        pass
+
+    with _parser_lock:
+        if backend not in _parsers:
+            _parsers[backend] = PARSER_BACKENDS[backend]()
+
+    return _parsers[backend]
+
+
+def reset_parser() -> None:
+    """Resets the parser cache.
+
+    After calling this method, :func:`get_parser` creates the parsers
+    again rather than returning the cached ones.
+    """
+    with _parser_lock:
+        _parsers.clear()
@@ -22,7 +22,7 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 if TYPE_CHECKING:
     from rply.token import SourcePosition
@@ -32,6 +32,8 @@ __all__ = (
     'IdentifierNotDefined',
     'UnknownType',
     'SyntaxError',
+    'ExecutionLimitExceeded',
+    'InvalidStep',
 )
 
 
@@ -93,4 +95,29 @@ class IdentifierAlreadyDefined(PSPLParserError):
 
 
 class SyntaxError(PSPLParserError):
-    """Error indicating a syntax error."""
\ No newline at end of file
+    """Error indicating a syntax error."""
+
+class ExecutionLimitExceeded(PSPLParserError):
+    """Error indicating that execution exceeded the step or time limit.
+
+    Attributes
+    ----------
+    limit: :class:`str`
+        The limit that was exceeded, either ``'max_steps'`` or ``'timeout'``.
+    """
+    def __init__(self, source_pos: Optional[SourcePosition], limit: str, message: str) -> None:
+        self.limit = limit
+        super().__init__(source_pos, message)
+
+
+class InvalidStep(PSPLParserError):
+    """Error indicating that the step of a FOR loop is zero.
+
+    Attributes
+    ----------
+    step:
+        The invalid step.
+    """
+    def __init__(self, source_pos: Optional[SourcePosition], step: Any) -> None:
+        self.step = step
+        super().__init__(source_pos, 'FOR loop step must not be zero')
@@ -72,7 +72,7 @@ def prod_expr(state: RuntimeState, tokens: Any):
     if tok == 'LT_BOOLEAN_FALSE':
         return ast.Boolean(False)
     if tok == 'IDENT':
-        return ast.Ident(name=val, state=state, pos=tokens[0].getsourcepos())
+        return ast.Ident(name=val, pos=tokens[0].getsourcepos())
 
     assert False
 
@@ -24,17 +24,36 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from pspl import lexer
 
+import threading
 import rply
 
+if TYPE_CHECKING:
+    from rply.parser import LRParser
+
 __all__ = (
+    "CACHE_ID",
     "get",
+    "build",
     "reset",
 )
 
+CACHE_ID: Optional[str] = "pspl"
+"""The ID used by rply for caching the parse tables on disk.
+
+rply stores the generated LALR tables in the user's cache directory in
+a file named after this ID and a hash of the grammar (the tokens in
+:data:`pspl.lexer.TOKENS`, :data:`pspl.lexer.PRECEDENCE` and all the
+registered productions) so a stale table is never loaded after the grammar
+changes. Set this to None before the generator is created to disable the
+on disk cache.
+"""
+
 _gen: Optional[rply.ParserGenerator] = None
+_parser: Optional[LRParser] = None
+_lock = threading.Lock()
 
 
 def get() -> rply.ParserGenerator:
@@ -46,15 +65,45 @@ def get() -> rply.ParserGenerator:
     global _gen
     if _gen:
         return _gen
-    _gen = rply.ParserGenerator(lexer.TOKENS, precedence=lexer.PRECEDENCE)
+    _gen = rply.ParserGenerator(lexer.TOKENS, precedence=lexer.PRECEDENCE, cache_id=CACHE_ID)
     return _gen
 
 
+def build() -> LRParser:
+    """Returns the :class:`rply.parser.LRParser` built from the generator.
+
+    The parser is built only once per process and shared by all
+    runtime states. The parse tables are loaded from rply's on disk
+    cache if available (see :data:`CACHE_ID`).
+    """
+    global _parser
+    if _parser:
+        return _parser
+
+    with _lock:
+        if _parser:
+            return _parser
+
+        gen = get()
+        try:
+            _parser = gen.build()
+        except OSError:
+            # The cache directory is not writable; build the
+            # tables without persisting them.
+            gen.cache_id = None
+            _parser = gen.build()
+
+    return _parser
+
+
 def reset() -> None:
     """Resets the generator cache.
 
-    After calling this method, :func:`get_generator` constructs a new
-    generator instance rather than returning a cached one.
+    After calling this method, :func:`get` constructs a new generator
+    instance rather than returning a cached one and :func:`build` builds
+    a new parser.
     """
-    global _gen
-    _gen = None
+    global _gen, _parser
+    with _lock:
+        _gen = None
+        _parser = None
@@ -37,7 +37,7 @@ gen = generator.get()
 
 @gen.production('program : stmt_list')
 def prod_program(state: RuntimeState, tokens: Any):
-    return ast.Block(tokens)
+    return tokens[0]
 
 @gen.error
 def generator_error_handler(state: RuntimeState, token: Token):
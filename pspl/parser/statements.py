@@ -37,12 +37,19 @@ gen = generator.get()
 @gen.production('stmt_list : stmt')
 @gen.production('stmt_list : stmt_list stmt')
 def prod_stmt_list(state: RuntimeState, tokens: Any):
-    return ast.Block(tokens)
+    if len(tokens) == 1:
+        return ast.Block(tokens)
+
+    # Statements are appended to the same block rather than nesting
+    # blocks so a block always holds a flat list of its statements.
+    block = tokens[0]
+    block.statements.append(tokens[1])
+    return block
 
 @gen.production('stmt : ST_OUTPUT expr')
 def prod_stmt_output(state: RuntimeState, tokens: Any):
     value = tokens[1]
-    return ast.Output(value)
+    return ast.Output(value, source_pos=tokens[0].getsourcepos())
 
 @gen.production('stmt : ST_DECLARE IDENT SYM_COLON IDENT')
 def prod_stmt_declare(state: RuntimeState, tokens: Any):
@@ -53,7 +60,7 @@ def prod_stmt_declare(state: RuntimeState, tokens: Any):
         raise UnknownType(tokens[3].getsourcepos(), tp)
 
     state.add_type_def(ident, tp)
-    return ast.Declare(ident, tp, state)
+    return ast.Declare(ident, tp, source_pos=tokens[0].getsourcepos())
 
 @gen.production('stmt : ST_INPUT IDENT')
 @gen.production('stmt : ST_INPUT expr OP_SEP IDENT')
@@ -66,7 +73,7 @@ def prod_stmt_input(state: RuntimeState, tokens: Any):
         prompt = ''
         ident = maybe_ident.getstr()
 
-    return ast.Input(prompt, ident, state)
+    return ast.Input(prompt, ident, source_pos=tokens[0].getsourcepos())
 
 @gen.production('stmt : IDENT OP_ASSIGN expr')
 @gen.production('stmt : ST_CONSTANT IDENT OP_EQ expr')
@@ -82,17 +89,12 @@ def prod_assign(state: RuntimeState, tokens: Any):
         ident = tokens[0].getstr()
         val = tokens[2]
 
-    is_update = True
-    try:
-        state.get_def(ident)
-    except KeyError:
-        is_update = False
-
+    # Identifiers are only defined at runtime so whether this
+    # assignment updates an existing identifier isn't known here.
     return ast.Assignment(
         ident=ident,
         val=val,
-        state=state,
-        is_update=is_update,
+        is_update=False,
         constant=constant,
         source_pos=tokens[0].getsourcepos(),
     )
@@ -104,7 +106,12 @@ def prod_if(state: RuntimeState, tokens: Any):
     else_block = None
     if tokens[4].gettokentype() == 'ST_ELSE':
         else_block = tokens[5]
-    return ast.If(expr=tokens[1], block=tokens[3], else_block=else_block)
+    return ast.If(
+        expr=tokens[1],
+        block=tokens[3],
+        else_block=else_block,
+        source_pos=tokens[0].getsourcepos(),
+    )
 
 
 @gen.production('stmt : ST_FOR assign ST_TO expr stmt_list ST_ENDFOR')
@@ -125,8 +132,7 @@ def prod_for(state: RuntimeState, tokens: Any):
         step=step,
         end=tokens[3],
         block=block,
-        keep_ident_after=not assign.is_update,
-        state=state,
+        source_pos=tokens[0].getsourcepos(),
     )
 
 
@@ -136,6 +142,7 @@ def prod_while(state: RuntimeState, tokens: Any):
         cond=tokens[1],
         block=tokens[3],
         post_condition=False,
+        source_pos=tokens[0].getsourcepos(),
     )
 
 
@@ -145,4 +152,5 @@ def prod_repeat(state: RuntimeState, tokens: Any):
         cond=tokens[3],
         block=tokens[1],
         post_condition=True,
+        source_pos=tokens[0].getsourcepos(),
     )
@@ -0,0 +1,13 @@
+"""
+pspl.passes
+~~~~~~~~~~~
+
+Passes that process the AST after parsing and before execution.
+"""
+from pspl.passes.resolver import *
+from pspl.passes.transformer import *
+from pspl.passes.folding import *
+from pspl.passes.limits import *
+from pspl.passes.profiling import *
+from pspl.passes.counting import *
+from pspl.passes.specializing import *
@@ -0,0 +1,124 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict
+from pspl.passes.transformer import Transformer
+from pspl import ast, utils
+
+if TYPE_CHECKING:
+    from pspl.state import RuntimeState
+
+__all__ = (
+    'ConstantFolder',
+)
+
+
+def _is_constant(node: Any) -> bool:
+    return not isinstance(node, ast.Node) or isinstance(node, (ast.Constant, ast.Boolean))
+
+
+def _constant(value: Any) -> ast.Node:
+    if isinstance(value, bool):
+        return ast.Boolean(value)
+    return ast.Constant(value)
+
+
+class ConstantFolder(Transformer):
+    """Pre-evaluates the literals and constant expressions in AST.
+
+    This pass replaces string and numeric literals with :class:`ast.Constant`
+    nodes holding their decoded values, and arithmetic and boolean expressions
+    whose operands are all known before execution with their result.
+
+    Identifiers defined with a ``CONSTANT`` statement in the top level block
+    are replaced with their value if the value is known before execution
+    and the identifier is used after the definition.
+
+    Parameters
+    ----------
+    state: :class:`RuntimeState`
+        The runtime state used while parsing the AST.
+
+    Attributes
+    ----------
+    folded: :class:`int`
+        The number of expression and identifier nodes that were folded.
+    """
+    def __init__(self, state: RuntimeState) -> None:
+        self.folded = 0
+        self._state = state
+        self._nesting = 0
+        self._constants: Dict[str, ast.Node] = {}
+
+    def fold(self, node: ast.Node) -> ast.Node:
+        """Folds the given node and returns the resulting node."""
+        return self.visit(node)
+
+    def visit_String(self, node: ast.String) -> ast.Node:
+        return ast.Constant(node.eval())
+
+    visit_Integer = visit_Float = visit_String
+
+    def visit_Ident(self, node: ast.Ident) -> ast.Node:
+        try:
+            value = self._constants[node.name]
+        except KeyError:
+            return node
+        self.folded += 1
+        return _constant(value.eval())
+
+    def visit_Assignment(self, node: ast.Assignment) -> ast.Node:
+        self.generic_visit(node)
+
+        # The value of constant can only be relied on when the definition
+        # is executed unconditionally; redefinitions fail at runtime.
+        if node.constant and self._nesting == 0 and _is_constant(node.val):
+            self._constants[node.ident] = _constant(utils.maybe_eval(node.val))
+        return node
+
+    def _visit_nested(self, node: ast.Node) -> ast.Node:
+        self._nesting += 1
+        try:
+            return self.generic_visit(node)
+        finally:
+            self._nesting -= 1
+
+    visit_If = visit_For = visit_ConditionalLoop = _visit_nested
+
+    def _visit_expression(self, node: Any) -> ast.Node:
+        self.generic_visit(node)
+        if not (_is_constant(node.left) and _is_constant(node.right)):
+            return node
+
+        try:
+            value = node.eval()
+        except Exception:
+            # Errors such as division by zero are left to be raised at runtime.
+            return node
+
+        self.folded += 1
+        return _constant(value)
+
+    visit_Add = visit_Subtract = visit_Mul = visit_Div = _visit_expression
+    visit_Eq = visit_NEq = visit_Gt = visit_GtEq = visit_Lt = visit_LtEq = _visit_expression
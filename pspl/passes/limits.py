@@ -0,0 +1,58 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from pspl.passes.transformer import Transformer
+from pspl import ast
+
+import copy
+
+__all__ = (
+    'LimitInstrumenter',
+)
+
+
+class LimitInstrumenter(Transformer):
+    """Instruments the AST for enforcing the execution limits.
+
+    The bodies of loops are replaced with :class:`ast.LimitedBlock` nodes
+    that count the steps taken and check the limits on every iteration.
+    Programs without loops always terminate so nothing else needs to
+    be instrumented.
+    """
+    def instrument(self, node: ast.Node) -> ast.Node:
+        """Returns the instrumented copy of the given node.
+
+        The given node itself is not modified.
+        """
+        return self.visit(copy.deepcopy(node))
+
+    def visit_For(self, node: ast.For) -> ast.Node:
+        self.generic_visit(node)
+        node.block = ast.LimitedBlock(node.block.statements, node.source_pos)
+        return node
+
+    def visit_ConditionalLoop(self, node: ast.ConditionalLoop) -> ast.Node:
+        self.generic_visit(node)
+        node.block = ast.LimitedBlock(node.block.statements, node.source_pos)
+        return node
@@ -0,0 +1,54 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from pspl.passes.transformer import Transformer
+from pspl import ast
+
+import copy
+
+__all__ = (
+    'ProfileInstrumenter',
+)
+
+
+class ProfileInstrumenter(Transformer):
+    """Instruments the AST for profiling.
+
+    Every statement is wrapped in a :class:`ast.ProfiledStatement` node
+    that records its execution in the :class:`pspl.profiler.Profiler`
+    of execution context.
+    """
+    def instrument(self, node: ast.Node) -> ast.Node:
+        """Returns the instrumented copy of the given node.
+
+        The given node itself is not modified.
+        """
+        return self.visit(copy.deepcopy(node))
+
+    def visit_Block(self, node: ast.Block) -> ast.Node:
+        self.generic_visit(node)
+        node.statements = [ast.ProfiledStatement(stmt) for stmt in node.statements]
+        return node
+
+    visit_LimitedBlock = visit_Block
@@ -0,0 +1,106 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterator, Set
+from pspl.parser.errors import IdentifierAlreadyDefined
+from pspl import ast
+
+if TYPE_CHECKING:
+    from pspl.state import RuntimeState
+
+__all__ = (
+    'Resolver',
+)
+
+
+class Resolver:
+    """Resolves the identifiers in AST to slots.
+
+    This pass assigns every identifier a fixed slot index in
+    :attr:`ExecutionContext.slots` so that evaluating the identifiers
+    is a simple list index rather than a dictionary lookup.
+
+    Assignments to identifiers that are never defined as a constant
+    are marked as unchecked so they skip constant redefinition check at
+    runtime. Redefinitions of constants that are unconditionally defined
+    in the top level block are reported before execution.
+
+    Parameters
+    ----------
+    state: :class:`RuntimeState`
+        The runtime state used while parsing the AST.
+    """
+    def __init__(self, state: RuntimeState) -> None:
+        self._state = state
+
+    def resolve(self, node: ast.Node) -> None:
+        """Resolves the identifiers in given node and its descendants.
+
+        Raises
+        ------
+        IdentifierAlreadyDefined
+            A constant is redefined.
+        """
+        state = self._state
+        nodes = list(node.walk())
+        constants = {n.ident for n in nodes if isinstance(n, ast.Assignment) and n.constant}
+
+        for n in nodes:
+            if isinstance(n, ast.Ident):
+                n.slot = state.get_slot(n.name)
+            elif isinstance(n, (ast.Assignment, ast.For)):
+                n.slot = state.get_slot(n.ident)
+                n.checked = n.ident in constants
+            elif isinstance(n, ast.Input):
+                n.slot = state.get_slot(n.ident)
+                n.tp = state.type_defs.get(n.ident)
+
+        if constants:
+            self._check_redefinitions(node, set(), top_level=True)
+
+    def _check_redefinitions(self, node: ast.Node, defined: Set[str], top_level: bool) -> None:
+        for stmt in _statements(node):
+            if isinstance(stmt, (ast.Assignment, ast.For, ast.Input)):
+                if stmt.ident in defined:
+                    raise IdentifierAlreadyDefined(getattr(stmt, 'source_pos', None), stmt.ident)
+                if top_level and isinstance(stmt, ast.Assignment) and stmt.constant:
+                    defined.add(stmt.ident)
+
+            if isinstance(stmt, ast.If):
+                self._check_redefinitions(stmt.block, defined, top_level=False)
+                if stmt.else_block:
+                    self._check_redefinitions(stmt.else_block, defined, top_level=False)
+            elif isinstance(stmt, (ast.For, ast.ConditionalLoop)):
+                self._check_redefinitions(stmt.block, defined, top_level=False)
+
+
+def _statements(node: Any) -> Iterator[Any]:
+    # Yields the statements of a block in order, flattening nested blocks.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Block):
+            stack.extend(reversed(node.statements))
+        else:
+            yield node
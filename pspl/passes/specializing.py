@@ -0,0 +1,199 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, List, Type
+from pspl.passes.transformer import Transformer
+from pspl import ast
+
+__all__ = (
+    'TypeSpecializer',
+)
+
+Types = FrozenSet[Type[Any]]
+
+_NONE: Types = frozenset()
+_STR: Types = frozenset((str,))
+_BOOL: Types = frozenset((bool,))
+_NUMERIC: Types = frozenset((int, float, bool))
+
+_INPUT_TYPES: Dict[str, Type[Any]] = {
+    'STRING': str,
+    'INTEGER': int,
+    'FLOAT': float,
+    'BOOLEAN': bool,
+}
+
+_SPECIALIZED_NODES: Dict[Type[ast.Node], Type[ast.Node]] = {
+    ast.Subtract: ast.NumericSubtract,
+    ast.Mul: ast.NumericMul,
+    ast.Div: ast.NumericDiv,
+    ast.Eq: ast.TypedEq,
+    ast.NEq: ast.TypedNEq,
+    ast.Gt: ast.TypedGt,
+    ast.GtEq: ast.TypedGtEq,
+    ast.Lt: ast.TypedLt,
+    ast.LtEq: ast.TypedLtEq,
+}
+
+
+def _node(value: Any) -> ast.Node:
+    return value if isinstance(value, ast.Node) else ast.Constant(value)
+
+
+class TypeSpecializer(Transformer):
+    """Replaces the expressions of operands of known types with specialized nodes.
+
+    The types that identifiers may hold are inferred from all their
+    definitions: the values assigned, the ``FOR`` loops and the
+    ``DECLARE`` statements of ``INPUT`` identifiers. Arithmetic expressions
+    of numeric operands, additions with a string operand and comparisons
+    of operands of same kind are then replaced with the nodes in
+    :mod:`pspl.ast.specialized`, which evaluate the operands directly and
+    skip the type checks of generic nodes.
+
+    The inference assumes the identifiers are only defined by the program
+    itself; the specialized additions check the type of operands again
+    and fall back to generic behaviour if it differs at runtime.
+
+    This pass should run after :class:`pspl.passes.Resolver` and
+    :class:`pspl.passes.ConstantFolder`.
+
+    Attributes
+    ----------
+    specialized: :class:`int`
+        The number of expression nodes that were specialized.
+    """
+    def __init__(self) -> None:
+        self.specialized = 0
+        self._types: Dict[str, Types] = {}
+
+    def specialize(self, node: ast.Node) -> ast.Node:
+        """Specializes the given node and returns the resulting node."""
+        self._infer(node)
+        return self.visit(node)
+
+    def _infer(self, node: ast.Node) -> None:
+        types = self._types
+        definitions: List[Any] = []
+        for n in node.walk():
+            if isinstance(n, ast.Input):
+                types[n.ident] = types.get(n.ident, _NONE) | {_INPUT_TYPES.get(n.tp, str)}  # type: ignore
+            elif isinstance(n, (ast.Assignment, ast.For)):
+                definitions.append(n)
+
+        # The types of identifiers only grow, so this stops once
+        # the assigned values can't have any new types.
+        changed = True
+        while changed:
+            changed = False
+            for n in definitions:
+                current = types.get(n.ident, _NONE)
+                if isinstance(n, ast.For):
+                    new = current | self._loop_type(n)
+                else:
+                    new = current | self._type(n.val)
+                if new != current:
+                    types[n.ident] = new
+                    changed = True
+
+    def _type(self, node: Any) -> Types:
+        # Returns the types the given expression may evaluate to.
+        if not isinstance(node, ast.Node):
+            return frozenset((type(node),))
+        if isinstance(node, (ast.Constant, ast.Boolean)):
+            return frozenset((type(node.value),))
+        if isinstance(node, ast.String):
+            return _STR
+        if isinstance(node, ast.Integer):
+            return frozenset((int,))
+        if isinstance(node, ast.Float):
+            return frozenset((float,))
+        if isinstance(node, ast.Ident):
+            return self._types.get(node.name, _NONE)
+        if isinstance(node, ast.BooleanExpression):
+            return _BOOL
+        if isinstance(node, ast.ArithmeticExpression):
+            return self._arithmetic_type(node)
+        return _NONE
+
+    def _loop_type(self, node: ast.For) -> Types:
+        # The identifier is bound to the start and then the step is added
+        # to it repeatedly. Loops over strings fail at runtime.
+        start = self._type(node.start) - _STR
+        result = {int if tp is bool else tp for tp in start}
+        for lhs in start:
+            for rhs in self._type(node.step) - _STR:
+                result.add(float if lhs is float or rhs is float else int)
+        return frozenset(result)
+
+    def _arithmetic_type(self, node: ast.ArithmeticExpression) -> Types:
+        result = set()
+        for lhs in self._type(node.left):
+            for rhs in self._type(node.right):
+                if lhs is str or rhs is str:
+                    # Other operations on strings fail at runtime.
+                    if isinstance(node, ast.Add):
+                        result.add(str)
+                elif isinstance(node, ast.Div) or lhs is float or rhs is float:
+                    result.add(float)
+                else:
+                    result.add(int)
+        return frozenset(result)
+
+    def _replace(self, node: Any, cls: Type[ast.Node]) -> ast.Node:
+        self.specialized += 1
+        return cls(_node(node.left), _node(node.right))  # type: ignore
+
+    def visit_Add(self, node: ast.Add) -> ast.Node:
+        self.generic_visit(node)
+        lhs = self._type(node.left)
+        rhs = self._type(node.right)
+        if not (lhs and rhs):
+            # An operand is never defined and fails at runtime.
+            return node
+        if lhs <= _NUMERIC and rhs <= _NUMERIC:
+            return self._replace(node, ast.NumericAdd)
+        if lhs == _STR or rhs == _STR:
+            return self._replace(node, ast.StringAdd)
+        return node
+
+    def _visit_arithmetic(self, node: ast.ArithmeticExpression) -> ast.Node:
+        self.generic_visit(node)
+        lhs = self._type(node.left)
+        rhs = self._type(node.right)
+        if lhs and rhs and lhs <= _NUMERIC and rhs <= _NUMERIC:
+            return self._replace(node, _SPECIALIZED_NODES[node.__class__])
+        return node
+
+    visit_Subtract = visit_Mul = visit_Div = _visit_arithmetic
+
+    def _visit_compare(self, node: ast.BooleanExpression) -> ast.Node:
+        self.generic_visit(node)
+        lhs = self._type(node.left)
+        rhs = self._type(node.right)
+        if lhs and rhs and ((lhs <= _NUMERIC and rhs <= _NUMERIC) or lhs == rhs == _STR):
+            return self._replace(node, _SPECIALIZED_NODES[node.__class__])
+        return node
+
+    visit_Eq = visit_NEq = visit_Gt = visit_GtEq = visit_Lt = visit_LtEq = _visit_compare
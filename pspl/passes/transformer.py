@@ -0,0 +1,63 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Any, List
+from pspl.ast import Node
+
+__all__ = (
+    'Transformer',
+)
+
+
+class Transformer:
+    """Base class for passes that replace nodes in the AST.
+
+    Subclasses define ``visit_<NodeClassName>`` methods returning the
+    node to replace the visited node with. Nodes without a visitor method
+    have their children visited using :meth:`generic_visit`.
+    """
+    def visit(self, node: Node) -> Any:
+        """Visits the given node and returns its replacement."""
+        method = getattr(self, 'visit_' + node.__class__.__name__, None)
+        if method is None:
+            return self.generic_visit(node)
+        return method(node)
+
+    def generic_visit(self, node: Node) -> Node:
+        """Replaces the children of given node by visiting them.
+
+        The children are visited in the order they are defined in the
+        node's attributes.
+        """
+        for key, value in list(vars(node).items()):
+            if key.startswith('_'):
+                continue
+            if isinstance(value, Node):
+                setattr(node, key, self.visit(value))
+            elif isinstance(value, list):
+                value[:] = self._visit_list(value)
+        return node
+
+    def _visit_list(self, values: List[Any]) -> List[Any]:
+        return [self.visit(v) if isinstance(v, Node) else v for v in values]
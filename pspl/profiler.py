@@ -0,0 +1,215 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import os
+import time
+
+__all__ = (
+    'LineProfile',
+    'Profiler',
+)
+
+SORT_KEYS = ('self', 'cumulative', 'hits', 'line')
+"""The keys that profile statistics can be sorted by."""
+
+
+class LineProfile(NamedTuple):
+    """The profile statistics of a source line.
+
+    Attributes
+    ----------
+    lineno: :class:`int`
+        The line number. This is 0 for statements without a known position.
+    hits: :class:`int`
+        The number of times the statements on this line were executed.
+    self_time: :class:`float`
+        The seconds spent in statements on this line, excluding the
+        statements nested in their blocks.
+    cumulative_time: :class:`float`
+        The seconds spent in statements on this line, including the
+        statements nested in their blocks.
+    """
+    lineno: int
+    hits: int
+    self_time: float
+    cumulative_time: float
+
+
+class Profiler:
+    """Records the time taken by each line of a PSPL program.
+
+    A profiler is passed to :meth:`Program.run` to profile the run.
+    Profiling always evaluates the syntax tree of program, regardless
+    of its engine, so the times are only meaningful relative to each
+    other.
+
+    Parameters
+    ----------
+    filename: Optional[:class:`str`]
+        The name of file that the profiled program was compiled from.
+    timer: Callable[[], :class:`float`]
+        The function returning the current time in seconds. Defaults
+        to :func:`time.perf_counter`.
+
+    Attributes
+    ----------
+    filename: Optional[:class:`str`]
+        The name of file that the profiled program was compiled from.
+    total_time: :class:`float`
+        The seconds spent executing the top level statements.
+    """
+    def __init__(self, filename: Optional[str] = None, *, timer: Callable[[], float] = time.perf_counter) -> None:
+        self.filename = filename
+        self.timer = timer
+        self.total_time = 0.0
+        self._hits: Dict[int, int] = {}
+        self._self_times: Dict[int, float] = {}
+        self._cumulative_times: Dict[int, float] = {}
+        self._stacks: Dict[Tuple[int, ...], float] = {}
+        self._stack: List[int] = []
+        self._children: List[float] = []
+
+    def enter(self, lineno: int) -> None:
+        """Records the start of a statement on given line."""
+        self._stack.append(lineno)
+        self._children.append(0.0)
+
+    def exit(self, elapsed: float) -> None:
+        """Records the end of the last started statement that took ``elapsed`` seconds."""
+        stack = self._stack
+        key = tuple(stack)
+        lineno = stack.pop()
+        self_time = elapsed - self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        else:
+            self.total_time += elapsed
+
+        self._hits[lineno] = self._hits.get(lineno, 0) + 1
+        self._self_times[lineno] = self._self_times.get(lineno, 0.0) + self_time
+        # Time of statements nested in a statement on the same
+        # line is already included in the outer statement.
+        if lineno not in stack:
+            self._cumulative_times[lineno] = self._cumulative_times.get(lineno, 0.0) + elapsed
+        self._stacks[key] = self._stacks.get(key, 0.0) + self_time
+
+    def stats(self, sort: str = 'self') -> List[LineProfile]:
+        """Returns the statistics of profiled lines.
+
+        Parameters
+        ----------
+        sort: :class:`str`
+            The order of statistics. ``self`` and ``cumulative`` sort by the
+            respective times and ``hits`` by hit counts, all in descending
+            order. ``line`` sorts by line numbers.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError('sort must be one of %s' % ', '.join(SORT_KEYS))
+
+        lines = [
+            LineProfile(lineno, hits, self._self_times[lineno], self._cumulative_times.get(lineno, 0.0))
+            for lineno, hits in self._hits.items()
+        ]
+        if sort == 'line':
+            lines.sort(key=lambda line: line.lineno)
+        elif sort == 'hits':
+            lines.sort(key=lambda line: (-line.hits, line.lineno))
+        elif sort == 'cumulative':
+            lines.sort(key=lambda line: (-line.cumulative_time, line.lineno))
+        else:
+            lines.sort(key=lambda line: (-line.self_time, line.lineno))
+        return lines
+
+    def report(self, source: Optional[str] = None, *, sort: str = 'self', limit: Optional[int] = None) -> str:
+        """Returns the human readable report of profile statistics.
+
+        Parameters
+        ----------
+        source: Optional[:class:`str`]
+            The source code of profiled program. When given, the source
+            of every line is shown in the report.
+        sort: :class:`str`
+            The order of lines. See :meth:`stats` for possible values.
+        limit: Optional[:class:`int`]
+            The maximum number of lines to show.
+        """
+        source_lines = [] if source is None else source.splitlines()
+        total = self.total_time or 1.0
+        rows = [
+            'Total time: %.6f s' % self.total_time,
+            '',
+            '%6s %10s %12s %12s %7s  %s' % ('Line', 'Hits', 'Self (s)', 'Cumul. (s)', 'Self %', 'Source'),
+        ]
+        for line in self.stats(sort)[:limit]:
+            text = source_lines[line.lineno - 1].strip() if 0 < line.lineno <= len(source_lines) else ''
+            rows.append('%6d %10d %12.6f %12.6f %6.1f%%  %s' % (
+                line.lineno,
+                line.hits,
+                line.self_time,
+                line.cumulative_time,
+                100 * line.self_time / total,
+                text,
+            ))
+        return '\n'.join(rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the profile statistics as a JSON serializable dictionary."""
+        return {
+            'filename': self.filename,
+            'total_time': self.total_time,
+            'lines': [line._asdict() for line in self.stats('line')],
+            'stacks': [{'stack': list(stack), 'self_time': t} for stack, t in self._stacks.items()],
+        }
+
+    def to_collapsed(self, source: Optional[str] = None) -> str:
+        """Returns the profile in collapsed stack format.
+
+        Every line of output has the semicolon separated lines of nested
+        statements followed by the microseconds spent in the innermost
+        statement. This is the input format of flame graph tools such
+        as ``flamegraph.pl``.
+
+        Parameters
+        ----------
+        source: Optional[:class:`str`]
+            The source code of profiled program. When given, the source
+            of every line is included in the frame names.
+        """
+        source_lines = [] if source is None else source.splitlines()
+        name = '<string>' if self.filename is None else os.path.basename(self.filename)
+
+        def frame(lineno: int) -> str:
+            label = '%s:%d' % (name, lineno)
+            if 0 < lineno <= len(source_lines):
+                label += ' ' + source_lines[lineno - 1].strip().replace(';', ',')
+            return label
+
+        rows = []
+        for stack, self_time in self._stacks.items():
+            micros = round(self_time * 1e6)
+            if micros > 0:
+                rows.append('%s %d' % (';'.join(map(frame, stack)), micros))
+        return '\n'.join(rows)
@@ -0,0 +1,301 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Generator, Iterable, Optional, Tuple
+from pspl.context import ExecutionContext
+from pspl.output import OutputStream
+from pspl.passes import LimitInstrumenter, ProfileInstrumenter, CountInstrumenter
+from pspl.stats import RunStats
+from pspl.vm import VirtualMachine, Compiler
+from pspl import transpiler
+
+import marshal
+import tracemalloc
+
+if TYPE_CHECKING:
+    from pspl.ast import Block
+    from pspl.profiler import Profiler
+
+__all__ = (
+    'Program',
+)
+
+
+class Program:
+    """Represents a compiled PSPL program.
+
+    Programs are returned by :func:`pspl.compile`. A program holds the
+    parsed and optimized form of source code for its engine and doesn't
+    store any runtime data, so it can be run any number of times without
+    lexing and parsing the source again.
+
+    This class should not be initialized manually.
+    """
+    __slots__ = ('_engine', '_names', '_tree', '_code', '_filename', '_variants')
+
+    def __init__(
+        self,
+        *,
+        engine: str,
+        names: Tuple[str, ...],
+        tree: Optional[Block] = None,
+        code: Any = None,
+        filename: Optional[str] = None,
+    ) -> None:
+        self._engine = engine
+        self._names = names
+        self._tree = tree
+        self._code = code
+        self._filename = filename
+        self._variants: Dict[Tuple[bool, ...], Any] = {}
+
+    def __repr__(self) -> str:
+        return f'<Program engine={self._engine!r} filename={self._filename!r}>'
+
+    def __reduce__(self) -> Any:
+        # Python code objects can't be pickled, so they are marshalled. The
+        # compiled variants are left out and compiled again when needed.
+        code = marshal.dumps(self._code) if self._engine == 'python' else self._code
+        return (_unpickle, (self._engine, self._names, self._tree, code, self._filename))
+
+    @property
+    def engine(self) -> str:
+        """:class:`str`: The execution engine of this program."""
+        return self._engine
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        """Tuple[:class:`str`, ...]: The identifier names indexed by their slots."""
+        return self._names
+
+    @property
+    def tree(self) -> Optional[Block]:
+        """Optional[:class:`pspl.ast.Block`]: The syntax tree of this program.
+
+        The tree is used for compiling the program with execution limits
+        or profiling when it is run with them.
+        """
+        return self._tree
+
+    @property
+    def code(self) -> Any:
+        """The compiled code that the engine executes.
+
+        This is a :class:`pspl.vm.Code` for ``vm`` engine, a Python code object
+        for ``python`` engine and the syntax tree for ``tree`` engine.
+        """
+        return self._code
+
+    @property
+    def filename(self) -> Optional[str]:
+        """Optional[:class:`str`]: The name of file this program was compiled from."""
+        return self._filename
+
+    def create_context(
+        self,
+        *,
+        output: Optional[OutputStream] = None,
+        inputs: Optional[Iterable[str]] = None,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        stats: Optional[RunStats] = None,
+    ) -> ExecutionContext:
+        """Creates a new execution context for running this program."""
+        return ExecutionContext(
+            list(self._names),
+            output=output,
+            inputs=inputs,
+            max_steps=max_steps,
+            timeout=timeout,
+            profiler=profiler,
+            stats=stats,
+        )
+
+    def _get_code(self, *, limited: bool, profiled: bool, counted: bool, resumable: bool = False) -> Any:
+        # The instrumented variants of code are compiled on first use so
+        # the programs run without limits, profiling or counters don't
+        # pay for them.
+        key = (limited, profiled, counted, resumable)
+        code = self._variants.get(key)
+        if code is not None:
+            return code
+
+        tree = self._tree
+        if tree is None:
+            raise ValueError('Execution limits, profiling and counters require the syntax tree of program')
+
+        if resumable:
+            # The resumable code always counts the steps, so the limits
+            # don't need a variant of their own.
+            code = transpiler.Transpiler(resumable=True).transpile(tree)
+        elif profiled or counted:
+            # These are done by evaluating the syntax tree regardless of
+            # engine since the code of other engines has no statements left.
+            if limited:
+                tree = LimitInstrumenter().instrument(tree)  # type: ignore
+            if counted:
+                tree = CountInstrumenter().instrument(tree)  # type: ignore
+            if profiled:
+                tree = ProfileInstrumenter().instrument(tree)  # type: ignore
+            code = tree
+        elif self._engine == 'python':
+            code = transpiler.Transpiler(limits=True).transpile(tree)
+        elif self._engine == 'vm':
+            code = Compiler(limits=True).compile(tree)
+        else:
+            code = LimitInstrumenter().instrument(tree)
+
+        self._variants[key] = code
+        return code
+
+    def start(self, context: ExecutionContext) -> Generator[Tuple[Any, ...], Any, int]:
+        """Starts a resumable execution of the program in the given context.
+
+        The program is transpiled to a Python generator regardless of the
+        engine, and is executed only while the returned generator is
+        advanced. See :func:`pspl.transpiler.execute_resumable` for the
+        events it yields.
+
+        The caller is responsible for sending back the new step budget,
+        usually obtained from :meth:`ExecutionContext.refill` to enforce the
+        limits of context, and the lines of input. The output of context is
+        not flushed by the execution.
+        """
+        code = self._get_code(limited=False, profiled=False, counted=False, resumable=True)
+        return transpiler.execute_resumable(code, context)
+
+    def run(
+        self,
+        *,
+        inputs: Optional[Iterable[str]] = None,
+        output: Any = None,
+        buffering: str = 'line',
+        buffer_size: int = 8192,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        counters: bool = False,
+        stats: Optional[RunStats] = None,
+    ) -> RunStats:
+        """Runs the program.
+
+        Every run is executed in a new :class:`ExecutionContext` so the
+        identifiers defined by previous runs are not visible.
+
+        Parameters
+        ----------
+        inputs: Optional[Iterable[:class:`str`]]
+            The values to use for INPUT statements instead of reading from
+            standard input. :exc:`EOFError` is raised if the program requires
+            more inputs than given.
+        output:
+            Where to write the output. This can be an :class:`OutputStream`
+            or any sink accepted by it. Defaults to standard output.
+        buffering: :class:`str`
+            The buffering mode of output. Ignored if ``output`` is
+            an :class:`OutputStream`.
+        buffer_size: :class:`int`
+            The buffer size used by ``block`` buffering mode. Ignored
+            if ``output`` is an :class:`OutputStream`.
+        max_steps: Optional[:class:`int`]
+            The maximum number of steps the program may take. Every
+            iteration of a loop takes as many steps as there are
+            statements in the loop body.
+        timeout: Optional[:class:`float`]
+            The maximum number of seconds the program may run for.
+        profiler: Optional[:class:`pspl.profiler.Profiler`]
+            The profiler to record the time taken by each line in. The
+            profiled run always evaluates the syntax tree, regardless of
+            the engine of program.
+        counters: :class:`bool`
+            Whether to count the executed statements, loop iterations, peak
+            number of variables and peak traced memory of this run. Like
+            profiling, counting evaluates the syntax tree and it slows down
+            the execution considerably.
+        stats: Optional[:class:`pspl.stats.RunStats`]
+            The statistics to record this run in. Defaults to new statistics.
+
+        Returns
+        -------
+        :class:`pspl.stats.RunStats`
+            The statistics of this run.
+
+        Raises
+        ------
+        ExecutionLimitExceeded
+            The program exceeded ``max_steps`` or ``timeout``.
+        """
+        if not isinstance(output, OutputStream):
+            output = OutputStream(output, buffering=buffering, buffer_size=buffer_size)
+
+        if stats is None:
+            stats = RunStats()
+        if profiler is not None:
+            stats.profile = profiler
+        if counters:
+            stats.statements = stats.loop_iterations = stats.peak_variables = 0
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+
+        ctx = self.create_context(
+            output=output,
+            inputs=inputs,
+            max_steps=max_steps,
+            timeout=timeout,
+            profiler=profiler,
+            stats=stats if counters else None,
+        )
+        try:
+            if ctx.limited or profiler is not None or counters:
+                with stats.phase('compile'):
+                    code = self._get_code(limited=ctx.limited, profiled=profiler is not None, counted=counters)
+            else:
+                code = self._code
+
+            with stats.phase('execute'):
+                if profiler is not None or counters:
+                    code.eval(ctx)
+                elif self._engine == 'python':
+                    transpiler.execute(code, ctx)
+                elif self._engine == 'vm':
+                    VirtualMachine(code, ctx).run()
+                else:
+                    code.eval(ctx)
+        finally:
+            output.flush()
+            if counters:
+                ctx.record_peak_variables()
+                stats.peak_memory = tracemalloc.get_traced_memory()[1]
+                if not tracing:
+                    tracemalloc.stop()
+
+        return stats
+
+
+def _unpickle(engine: str, names: Tuple[str, ...], tree: Optional[Block], code: Any, filename: Optional[str]) -> Program:
+    if engine == 'python':
+        code = marshal.loads(code)
+    return Program(engine=engine, names=names, tree=tree, code=code, filename=filename)
@@ -0,0 +1,240 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""On-disk cache of the results of programs.
+
+PSPL programs are deterministic; the same source run with the same
+inputs always produces the same output and error. The results of runs
+are stored in a directory under a key hashed from the source, inputs and
+the options affecting the result, so that running an identical program
+again only replays its output.
+
+The source is normalized by removing the trailing whitespace. Other
+whitespace is kept since the error reports include source positions.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import hashlib
+import json
+import os
+import pspl
+import tempfile
+import threading
+
+__all__ = (
+    'RESULT_SUFFIX',
+    'DEFAULT_MAX_SIZE',
+    'CachedResult',
+    'ResultCacheInfo',
+    'ResultCache',
+)
+
+RESULT_SUFFIX = '.psplr'
+"""The file extension of result files."""
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+"""The default maximum total size of result files in bytes."""
+
+_FORMAT_VERSION = 3
+
+
+class CachedResult(NamedTuple):
+    """The result of a program run stored in :class:`ResultCache`."""
+
+    output: List[str]
+    """The output lines of program."""
+
+    error: Optional[str]
+    """The report of error that the program failed with, if any."""
+
+    error_type: Optional[str]
+    """The name of type of that error."""
+
+
+class ResultCacheInfo(NamedTuple):
+    """The statistics of a :class:`ResultCache`."""
+
+    hits: int
+    """The number of runs whose result was found in the cache."""
+
+    misses: int
+    """The number of runs whose result was not in the cache."""
+
+    bypasses: int
+    """The number of runs that could not use the cache."""
+
+    writes: int
+    """The number of result files written."""
+
+    evictions: int
+    """The number of result files removed to stay within the size limit."""
+
+
+class ResultCache:
+    """A size bounded on-disk cache of the results of programs.
+
+    Result files are evicted in least recently used order once their total
+    size exceeds ``max_size``. The cache can be shared by several runners,
+    threads and processes. The statistics are kept per instance.
+
+    Parameters
+    ----------
+    directory: :class:`str`
+        The directory to store result files in. It is created if needed.
+    max_size: :class:`int`
+        The maximum total size of result files in bytes. Defaults to
+        :data:`DEFAULT_MAX_SIZE`.
+    """
+    def __init__(self, directory: str, *, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self._hits = self._misses = self._bypasses = self._writes = self._evictions = 0
+
+    def __repr__(self) -> str:
+        return f'<ResultCache directory={self.directory!r} max_size={self.max_size}>'
+
+    def info(self) -> ResultCacheInfo:
+        """Returns the statistics of this cache."""
+        with self._lock:
+            return ResultCacheInfo(self._hits, self._misses, self._bypasses, self._writes, self._evictions)
+
+    def record_bypass(self) -> None:
+        """Counts a run that could not use the cache."""
+        with self._lock:
+            self._bypasses += 1
+
+    def get_key(
+        self,
+        source: str,
+        inputs: Iterable[str],
+        *,
+        engine: str,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Returns the key of the result of running a source with the given inputs and options."""
+        source_hash = hashlib.sha256(source.rstrip().encode()).hexdigest()
+        inputs_hash = hashlib.sha256(json.dumps([str(i) for i in inputs]).encode()).hexdigest()
+        key = json.dumps([_FORMAT_VERSION, pspl.__version__, engine, max_steps, timeout, source_hash, inputs_hash])
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + RESULT_SUFFIX)
+
+    def get(self, key: str) -> Optional[CachedResult]:
+        """Returns the cached result of given key or None if it is not cached."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            result = CachedResult(data['output'], data['error'], data['error_type'])
+            # The modification time orders the files for eviction.
+            os.utime(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+        return result
+
+    def put(self, key: str, result: CachedResult) -> None:
+        """Stores the result of given key, evicting old results if needed.
+
+        Errors such as an unwritable directory are ignored.
+        """
+        data = json.dumps(result._asdict()).encode()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-', suffix=RESULT_SUFFIX, dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            return
+
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += len(data)
+            size = self._size
+
+        if size is None or size > self.max_size:
+            self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        files = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(RESULT_SUFFIX) and not entry.name.startswith('.tmp-'):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, entry.path))
+        return files
+
+    def _evict(self) -> None:
+        # The directory is only scanned when the tracked size exceeds the
+        # limit, since other processes may add files too.
+        files = self._scan()
+        size = sum(f[1] for f in files)
+        evicted = 0
+        if size > self.max_size:
+            files.sort()
+            for _, file_size, path in files:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    continue
+                size -= file_size
+                evicted += 1
+                if size <= self.max_size:
+                    break
+
+        with self._lock:
+            self._size = size
+            self._evictions += evicted
+
+    def clear(self) -> None:
+        """Removes all the result files."""
+        try:
+            files = self._scan()
+        except FileNotFoundError:
+            return
+        for _, _, path in files:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._size = 0
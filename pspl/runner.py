@@ -22,16 +22,71 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Generator, Iterable, List, Optional, Tuple, Union
+from pspl.parser.errors import PSPLParserError
+from pspl.context import ExecutionContext
 from pspl.state import RuntimeState
+from pspl.output import OutputStream
+from pspl.program import Program
+from pspl.profiler import Profiler
+from pspl.results import CachedResult, ResultCache
+from pspl.stats import RunStats
+from pspl import ast, transpiler
 
+import asyncio
+import collections
+import rply
 import threading
+import time
 
 __all__ = (
     'PSPLRunner',
+    'ScheduledProgram',
+    'Scheduler',
+    'compile',
 )
 
 
+def compile(
+    source: str,
+    /,
+    *,
+    file: bool = False,
+    engine: str = 'tree',
+    parser: str = 'lr',
+    cache: bool = False,
+) -> Program:
+    """Compiles the PSPL source code to a :class:`Program`.
+
+    The returned program can be run several times, for example with
+    different inputs, without lexing and parsing the source again.
+
+    Parameters
+    ----------
+    source: :class:`str`
+        The source file name or code.
+    file: :class:`bool`
+        Whether the passed parameter is a file name. Defaults to False.
+    engine: :class:`str`
+        The execution engine to compile the program for. See
+        :class:`PSPLRunner` for details.
+    parser: :class:`str`
+        The parser backend to use. See :class:`PSPLRunner` for details.
+    cache: :class:`bool`
+        Whether to load the compiled program from or save it to the
+        ``__psplcache__`` directory next to the source file. Only
+        used when ``file`` is True. Defaults to False.
+
+    Raises
+    ------
+    rply.LexingError
+        The source has invalid syntax.
+    PSPLParserError
+        The source could not be parsed.
+    """
+    return RuntimeState(source=source, file=file, engine=engine, parser=parser, cache=cache).compile()
+
+
 class PSPLRunner:
     """The PSPL runner.
 
@@ -43,21 +98,85 @@ class PSPLRunner:
     the file name to execute. If it is a file, ``file`` keyword
     argument must be set to True.
 
+    The source is compiled on the first run and the compiled
+    program is reused by subsequent runs.
+
     Parameters
     ----------
     source: :class:`str`
         The source file name or code.
     file: :class:`bool`
         Whether the passed parameter is a file name. Defaults to False.
+    engine: :class:`str`
+        The execution engine to use. ``tree`` (the default) evaluates the
+        syntax tree directly, ``vm`` compiles it to bytecode first and
+        ``python`` transpiles it to Python code. The latter two are faster
+        for programs with long running loops.
+    parser: :class:`str`
+        The parser backend to use. ``lr`` (the default) uses the LR parser
+        generated by rply and ``descent`` uses a hand-written recursive
+        descent parser which is faster and produces identical results.
+    cache: :class:`bool`
+        Whether to cache the compiled program of source file in the
+        ``__psplcache__`` directory next to it. The cached program is
+        used as long as the source and PSPL version are unchanged.
+        Defaults to False.
+    output:
+        Where to write the output of program. This can be a file-like object,
+        a :class:`list` that the output lines are appended to or a callable
+        that is called with chunks of output text. Defaults to standard output.
+    buffering: :class:`str`
+        How the output is buffered. ``line`` (the default) writes each line
+        immediately, ``block`` writes once ``buffer_size`` characters are
+        buffered and ``exit`` writes everything at the end of execution.
+        The output is always flushed before prompting for input.
+    buffer_size: :class:`int`
+        The number of characters buffered in ``block`` mode. Defaults to 8192.
+    result_cache: Optional[:class:`pspl.results.ResultCache`]
+        The cache of results to replay the output of runs from, when the
+        same source has been run with the same inputs before. Runs that
+        may read standard input, are profiled or count statistics bypass
+        the cache, as do the runs stopped by an error with a ``timeout``.
     """
-    def __init__(self, source: str, /, *, file: bool = False) -> None:
-        self._state = self._get_state(source=source, file=file)
+    def __init__(
+        self,
+        source: str,
+        /,
+        *,
+        file: bool = False,
+        engine: str = 'tree',
+        parser: str = 'lr',
+        cache: bool = False,
+        output: Any = None,
+        buffering: str = 'line',
+        buffer_size: int = 8192,
+        result_cache: Optional[ResultCache] = None,
+    ) -> None:
+        self._state = self._get_state(
+            source=source,
+            file=file,
+            engine=engine,
+            parser=parser,
+            cache=cache,
+            output=OutputStream(output, buffering=buffering, buffer_size=buffer_size),
+        )
         self._lock = threading.Lock()
+        self._result_cache = result_cache
+        self._source: Optional[str] = None
 
     def _get_state(self, *args: Any, **kwargs: Any) -> RuntimeState:
         return RuntimeState(*args, **kwargs)
 
-    def run(self, *, wait: bool = True) -> None:
+    def run(
+        self,
+        *,
+        wait: bool = True,
+        inputs: Optional[Iterable[str]] = None,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        profile: bool = False,
+        counters: bool = False,
+    ) -> RunStats:
         """Runs the code.
 
         This method is thread safe as such if this method is called
@@ -70,6 +189,33 @@ class PSPLRunner:
             Whether to wait until previous task is finished. When False, raises
             a :exc:`RuntimeError` if the runner is already acquired. Defaults to
             True.
+        inputs: Optional[Iterable[:class:`str`]]
+            The values to use for INPUT statements instead of
+            reading them from standard input.
+        max_steps: Optional[:class:`int`]
+            The maximum number of steps the program may take. Every
+            iteration of a loop takes as many steps as there are
+            statements in the loop body.
+        timeout: Optional[:class:`float`]
+            The maximum number of seconds the program may run for.
+        profile: :class:`bool`
+            Whether to record the time taken by each line of program. The
+            profiled run always evaluates the syntax tree, regardless of
+            the engine.
+        counters: :class:`bool`
+            Whether to count the executed statements, loop iterations, peak
+            number of variables and peak traced memory. This evaluates the
+            syntax tree regardless of the engine and slows down the run.
+
+        The program is stopped with an ``ExecutionLimitExceeded`` error
+        reported like other errors once it exceeds either limit.
+
+        Returns
+        -------
+        :class:`pspl.stats.RunStats`
+            The statistics of this run. If ``profile`` is True, the profile
+            is available as :attr:`RunStats.profile`. If the program fails,
+            the statistics cover the execution up to the error.
 
         Raises
         ------
@@ -80,4 +226,428 @@ class PSPLRunner:
             raise RuntimeError('Runner is already acquired')
 
         with self._lock:
-            self._state.exec()
+            cache = self._result_cache
+            if cache is not None:
+                if not (profile or counters):
+                    return self._run_cached(cache, inputs, max_steps, timeout)
+                cache.record_bypass()
+
+            profiler = Profiler(self._state.filename) if profile else None
+            return self._state.exec(
+                inputs=inputs,
+                max_steps=max_steps,
+                timeout=timeout,
+                profiler=profiler,
+                counters=counters,
+            )
+
+    def _run_cached(
+        self,
+        cache: ResultCache,
+        inputs: Optional[Iterable[str]],
+        max_steps: Optional[int],
+        timeout: Optional[float],
+    ) -> RunStats:
+        # The source is read once, like the program is compiled once.
+        if self._source is None:
+            self._source = self._state.read_source()
+        if inputs is None and self._reads_input():
+            # The program may read standard input.
+            cache.record_bypass()
+            return self._state.exec(max_steps=max_steps, timeout=timeout)
+
+        inputs = [] if inputs is None else list(inputs)
+        key = cache.get_key(self._source, inputs, engine=self._state.engine, max_steps=max_steps, timeout=timeout)
+        result = cache.get(key)
+        output = self._state.output
+        if result is not None:
+            for line in result.output:
+                output.write(line)
+            if result.error is not None:
+                output.write_error(result.error)
+            output.flush()
+
+            stats = RunStats()
+            stats.error = result.error
+            stats.error_type = result.error_type
+            stats.cached = True
+            return stats
+
+        recorder = _RecordingStream(output)
+        stats = self._state.exec(inputs=inputs, max_steps=max_steps, timeout=timeout, output=recorder)
+        if timeout is not None and stats.error_type == 'ExecutionLimitExceeded':
+            # The result depends on the time taken if the program
+            # was stopped by the time limit.
+            return stats
+
+        cache.put(key, CachedResult(recorder.lines, stats.error, stats.error_type))
+        return stats
+
+    def _reads_input(self) -> bool:
+        # Whether the program has INPUT statements. Programs that fail to
+        # compile don't read anything, the error is reported by exec().
+        state = self._state
+        if state.program is None:
+            try:
+                state.program = state.compile()
+            except (rply.LexingError, PSPLParserError):
+                return False
+
+        tree = state.program.tree
+        return tree is None or any(isinstance(node, ast.Input) for node in tree.walk())
+
+    async def run_async(
+        self,
+        reader: Any,
+        writer: Any,
+        *,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> RunStats:
+        """Runs the code without blocking the event loop.
+
+        INPUT statements await a line from ``reader`` and the output is
+        written to ``writer`` rather than the output of runner. The execution
+        yields to the event loop every :data:`pspl.context.LIMIT_CHECK_INTERVAL`
+        steps, so a single event loop can run many programs concurrently
+        without a long running one starving the others. For this, the
+        program is always transpiled to a Python generator regardless of
+        the engine.
+
+        Unlike :meth:`run`, this method does not acquire the runner so it
+        can be awaited several times concurrently. Errors are reported to
+        ``writer`` the same way :meth:`run` reports them.
+
+        Parameters
+        ----------
+        reader:
+            Where to read the lines of input from. This can either be an
+            object with a ``readline`` coroutine method such as
+            :class:`asyncio.StreamReader`, which returns an empty line at
+            the end of input, or a coroutine function returning a line or
+            None at the end of input. Bytes are decoded as UTF-8.
+        writer:
+            Where to write the output and prompts to. This can either be
+            an object with ``write`` and ``drain`` methods such as
+            :class:`asyncio.StreamWriter`, which is written the UTF-8
+            encoded text, or a coroutine function called with the text.
+        max_steps: Optional[:class:`int`]
+            The maximum number of steps the program may take.
+        timeout: Optional[:class:`float`]
+            The maximum number of seconds the program may run for,
+            including the time spent awaiting input.
+
+        Returns
+        -------
+        :class:`pspl.stats.RunStats`
+            The statistics of this run.
+
+        Raises
+        ------
+        EOFError
+            The reader has no more lines for an INPUT statement.
+        """
+        stats = RunStats()
+        pending: List[str] = []
+        output = OutputStream(pending.append)
+
+        async def drain() -> None:
+            output.flush()
+            if pending:
+                text = ''.join(pending)
+                pending.clear()
+                await _write_text(writer, text)
+
+        try:
+            program = self._state.program
+            if program is None:
+                program = self._state.program = self._state.compile(stats)
+
+            ctx = program.create_context(output=output, max_steps=max_steps, timeout=timeout)
+            with stats.phase('compile'):
+                execution = program.start(ctx)
+
+            with stats.phase('execute'):
+                value = None
+                while True:
+                    try:
+                        event = execution.send(value)
+                    except StopIteration:
+                        break
+
+                    await drain()
+                    if event[0] == transpiler.CHECKPOINT:
+                        await asyncio.sleep(0)
+                        value = ctx.refill(event[1], event[2])
+                    else:
+                        if event[1]:
+                            await _write_text(writer, event[1])
+                        value = await _read_line(reader)
+                        ctx.check_timeout(event[2])
+        except (rply.LexingError, PSPLParserError) as err:
+            output.flush()
+            pending.append(self._state.describe_error(err))
+        finally:
+            await drain()
+
+        return stats
+
+
+class _RecordingStream(OutputStream):
+    # Writes to the sink of another stream while recording the lines.
+    def __init__(self, stream: OutputStream) -> None:
+        super().__init__(stream.sink, buffering=stream.buffering, buffer_size=stream.buffer_size)
+        self.lines: List[str] = []
+        self._write = self.write
+        self.write = self._record  # type: ignore
+
+    def _record(self, value: Any) -> None:
+        line = str(value)
+        self.lines.append(line)
+        self._write(line)
+
+
+class ScheduledProgram:
+    """A program submitted to a :class:`Scheduler`.
+
+    This class should not be initialized manually. Instances are
+    returned by :meth:`Scheduler.submit`.
+
+    Attributes
+    ----------
+    program: :class:`pspl.program.Program`
+        The program being executed.
+    context: :class:`pspl.context.ExecutionContext`
+        The context of execution.
+    priority: :class:`int`
+        The number of quanta the program runs for in each of its slices.
+    name: Optional[:class:`str`]
+        The name given on submission.
+    status: :class:`str`
+        ``pending`` until the program finishes, ``done`` if it finishes
+        successfully and ``error`` if it fails.
+    error: Optional[:class:`Exception`]
+        The error that the program failed with.
+    slices: :class:`int`
+        The number of slices the program has run for.
+    time: :class:`float`
+        The seconds spent executing the program, excluding the time
+        spent executing other programs.
+    """
+    __slots__ = ('program', 'context', 'priority', 'name', 'status', 'error', 'slices', 'time', '_execution')
+
+    def __init__(self, program: Program, context: ExecutionContext, priority: int, name: Optional[str]) -> None:
+        self.program = program
+        self.context = context
+        self.priority = priority
+        self.name = name
+        self.status = 'pending'
+        self.error: Optional[Exception] = None
+        self.slices = 0
+        self.time = 0.0
+        self._execution: Optional[Generator[Tuple[Any, ...], Any, int]] = None
+
+    def __repr__(self) -> str:
+        return f'<ScheduledProgram name={self.name!r} status={self.status!r} slices={self.slices}>'
+
+    @property
+    def done(self) -> bool:
+        """:class:`bool`: Whether the program has finished, successfully or not."""
+        return self.status != 'pending'
+
+    @property
+    def steps(self) -> int:
+        """:class:`int`: The number of steps the program has taken."""
+        return self.context.steps
+
+    def _run_slice(self, steps: int) -> None:
+        ctx = self.context
+        if self._execution is None:
+            # The execution reads the initial budget when started.
+            ctx.start_slice(steps)
+            self._execution = self.program.start(ctx)
+            value = None
+        else:
+            # The step of loop iteration that the program was preempted
+            # at has already been counted, so it belongs to this slice.
+            value = ctx.start_slice(steps - 1)
+
+        start = time.perf_counter()
+        try:
+            while True:
+                event = self._execution.send(value)
+                if event[0] == transpiler.CHECKPOINT:
+                    value = ctx.refill(event[1], event[2])
+                    if ctx.slice_over:
+                        break
+                else:
+                    value = ctx.read_input(event[1], event[2])
+        except StopIteration as stop:
+            ctx.count_steps(stop.value)
+            self.status = 'done'
+        except Exception as err:
+            self.error = err
+            self.status = 'error'
+        finally:
+            ctx.output.flush()
+            self.time += time.perf_counter() - start
+            self.slices += 1
+
+        if self.done:
+            self._execution = None
+
+
+class Scheduler:
+    """Interleaves the execution of many programs in the current thread.
+
+    Each program runs for a slice of steps at a time, after which it is
+    preempted at the start of next loop iteration and the next program
+    runs. The programs take turns in a round robin. Like
+    :meth:`PSPLRunner.run_async`, the programs are transpiled to Python
+    generators for this, regardless of their engine.
+
+    Parameters
+    ----------
+    quantum: :class:`int`
+        The number of steps a program of priority 1 runs for in a slice.
+        A step is counted for every statement of a loop body executed,
+        so the statements outside of loops don't count. Defaults to 1000.
+
+    Attributes
+    ----------
+    quantum: :class:`int`
+        The number of steps in a quantum.
+    slices: :class:`int`
+        The number of slices run so far.
+    """
+    def __init__(self, *, quantum: int = 1000) -> None:
+        if quantum < 1:
+            raise ValueError('quantum must be positive')
+
+        self.quantum = quantum
+        self.slices = 0
+        self._queue: Deque[ScheduledProgram] = collections.deque()
+
+    @property
+    def pending(self) -> int:
+        """:class:`int`: The number of programs that have not finished yet."""
+        return len(self._queue)
+
+    def submit(
+        self,
+        program: Union[Program, str],
+        *,
+        inputs: Optional[Iterable[str]] = None,
+        output: Any = None,
+        buffering: str = 'line',
+        priority: int = 1,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> ScheduledProgram:
+        """Adds a program to the end of the round robin.
+
+        Parameters
+        ----------
+        program: Union[:class:`pspl.program.Program`, :class:`str`]
+            The program or its source code, which is compiled by
+            :func:`compile` with the default options.
+        inputs: Optional[Iterable[:class:`str`]]
+            The values to use for INPUT statements. If not given, the input
+            is read from standard input, blocking the other programs.
+        output:
+            Where to write the output. See :meth:`pspl.program.Program.run`.
+        buffering: :class:`str`
+            The buffering mode of output. The output is flushed at the
+            end of every slice.
+        priority: :class:`int`
+            The number of quanta the program runs for in each slice, so
+            that it gets that many times the steps of a program with
+            priority 1 in every round. Defaults to 1.
+        max_steps: Optional[:class:`int`]
+            The maximum number of steps the program may take.
+        timeout: Optional[:class:`float`]
+            The maximum number of seconds the program may run for. This
+            is measured from submission and includes the time spent
+            running other programs.
+        name: Optional[:class:`str`]
+            A name identifying the program.
+
+        Raises
+        ------
+        rply.LexingError
+            The source has invalid syntax.
+        PSPLParserError
+            The source could not be parsed.
+        """
+        if priority < 1:
+            raise ValueError('priority must be positive')
+        if isinstance(program, str):
+            program = compile(program)
+        if not isinstance(output, OutputStream):
+            output = OutputStream(output, buffering=buffering)
+
+        ctx = program.create_context(output=output, inputs=inputs, max_steps=max_steps, timeout=timeout)
+        scheduled = ScheduledProgram(program, ctx, priority, name)
+        self._queue.append(scheduled)
+        return scheduled
+
+    def run_slice(self) -> Optional[ScheduledProgram]:
+        """Runs a slice of the program at the front of round robin.
+
+        The program is moved to the end of round robin unless it finishes.
+        Errors of the program are not raised but stored in its
+        :attr:`ScheduledProgram.error`.
+
+        Returns
+        -------
+        Optional[:class:`ScheduledProgram`]
+            The program that was run or None if there are no pending programs.
+        """
+        if not self._queue:
+            return None
+
+        scheduled = self._queue.popleft()
+        scheduled._run_slice(self.quantum * scheduled.priority)
+        self.slices += 1
+        if not scheduled.done:
+            self._queue.append(scheduled)
+        return scheduled
+
+    def run(self) -> List[ScheduledProgram]:
+        """Runs slices until every program finishes.
+
+        Returns
+        -------
+        List[:class:`ScheduledProgram`]
+            The programs in the order they finished.
+        """
+        finished = []
+        while self._queue:
+            scheduled = self.run_slice()
+            if scheduled is not None and scheduled.done:
+                finished.append(scheduled)
+        return finished
+
+
+async def _read_line(reader: Any) -> str:
+    if hasattr(reader, 'readline'):
+        line = await reader.readline()
+        if not line:
+            line = None
+    else:
+        line = await reader()
+
+    if line is None:
+        raise EOFError('No more inputs available')
+    if isinstance(line, bytes):
+        line = line.decode()
+    return line.rstrip('\r\n')
+
+
+async def _write_text(writer: Any, text: str) -> None:
+    if hasattr(writer, 'drain'):
+        writer.write(text.encode())
+        await writer.drain()
+    else:
+        await writer(text)
@@ -0,0 +1,227 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Server keeping warm interpreters that run the programs sent to a Unix socket.
+
+Starting the interpreter, importing its dependencies and building the
+lexer and parser takes far longer than running most programs. The server
+does this once and then forks worker processes that inherit the warm
+state and run the submitted programs one at a time. See :mod:`pspl.client`
+for the protocol and the client.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+from pspl.parser.errors import PSPLParserError
+from pspl.parser import PARSER_BACKENDS, get_parser
+from pspl.output import OutputStream
+from pspl.state import ENGINES, RuntimeState
+from pspl import lexer
+
+import json
+import os
+import rply
+import signal
+import socket
+import stat
+import time
+
+__all__ = (
+    'serve',
+)
+
+
+def _warm_up() -> None:
+    # Builds everything that is otherwise built lazily by the first
+    # program, so that the workers inherit it.
+    lexer.get_lexer()
+    for parser in PARSER_BACKENDS:
+        get_parser(parser)
+        for engine in ENGINES:
+            RuntimeState(source='x <- 1\nOUTPUT x', engine=engine, parser=parser).compile()
+
+
+def _min_limit(limit: Any, server_limit: Any) -> Any:
+    if limit is None:
+        return server_limit
+    if server_limit is None:
+        return limit
+    return min(limit, server_limit)
+
+
+def _run_request(request: Dict[str, Any], options: Dict[str, Any], send: Any) -> Dict[str, Any]:
+    output = OutputStream(lambda text: send(output=text), buffering='block')
+    error = None
+    start = time.perf_counter()
+    try:
+        state = RuntimeState(
+            source=request['source'],
+            engine=request.get('engine', options['engine']),
+            parser=request.get('parser', options['parser']),
+        )
+        program = state.compile()
+        program.run(
+            inputs=request.get('stdin', '').splitlines(),
+            output=output,
+            max_steps=_min_limit(request.get('max_steps'), options['max_steps']),
+            timeout=_min_limit(request.get('timeout'), options['timeout']),
+        )
+    except (rply.LexingError, PSPLParserError) as err:
+        error = state.describe_error(err)
+    except Exception as err:
+        error = f'{err.__class__.__name__}: {err}\n'
+    finally:
+        output.flush()
+
+    return {'status': 'ok' if error is None else 'error', 'error': error, 'time': time.perf_counter() - start}
+
+
+def _handle(conn: socket.socket, options: Dict[str, Any]) -> None:
+    with conn, conn.makefile('rwb') as f:
+        def send(**message: Any) -> None:
+            f.write(json.dumps(message).encode() + b'\n')
+            f.flush()
+
+        line = f.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            request['source']
+        except (ValueError, TypeError, KeyError):
+            send(status='error', error='Invalid request\n', time=0.0)
+            return
+        send(**_run_request(request, options, send))
+
+
+def _work(sock: socket.socket, options: Dict[str, Any]) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    while True:
+        conn, _ = sock.accept()
+        try:
+            _handle(conn, options)
+        except OSError:
+            # The client disconnected.
+            pass
+
+
+def _spawn(sock: socket.socket, options: Dict[str, Any]) -> int:
+    pid = os.fork()
+    if pid == 0:
+        try:
+            _work(sock, options)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def _stop(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def serve(
+    path: str,
+    *,
+    workers: Optional[int] = None,
+    engine: str = 'tree',
+    parser: str = 'lr',
+    max_steps: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """Runs the programs submitted to a Unix socket until interrupted.
+
+    The lexer and parsers are built and every engine is initialized before
+    forking the workers, each of which runs one program at a time. Workers
+    that exit are replaced. The server stops on :data:`signal.SIGINT` or
+    :data:`signal.SIGTERM`, terminating the workers and removing the socket.
+
+    This requires :func:`os.fork` and Unix sockets, so it is not available
+    on Windows.
+
+    Parameters
+    ----------
+    path: :class:`str`
+        The path of Unix socket to listen on. A stale socket at the path
+        is replaced.
+    workers: Optional[:class:`int`]
+        The number of worker processes. Defaults to the number of processors.
+    engine: :class:`str`
+        The default execution engine of programs.
+    parser: :class:`str`
+        The default parser backend of programs.
+    max_steps: Optional[:class:`int`]
+        The maximum number of steps any program may take. Requests
+        may only lower this limit.
+    timeout: Optional[:class:`float`]
+        The maximum number of seconds any program may run for. Requests
+        may only lower this limit.
+
+    Raises
+    ------
+    FileExistsError
+        The path exists and is not a socket.
+    """
+    if engine not in ENGINES:
+        raise ValueError('Unknown engine %r' % engine)
+    if parser not in PARSER_BACKENDS:
+        raise ValueError('Unknown parser %r' % parser)
+
+    _warm_up()
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise FileExistsError('%r exists and is not a socket' % path)
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    options = {'engine': engine, 'parser': parser, 'max_steps': max_steps, 'timeout': timeout}
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    children: List[int] = []
+    handler = signal.signal(signal.SIGTERM, _stop)
+    try:
+        sock.bind(path)
+        sock.listen(128)
+        for _ in range(workers or os.cpu_count() or 1):
+            children.append(_spawn(sock, options))
+
+        while True:
+            pid, _ = os.wait()
+            if pid in children:
+                children.remove(pid)
+                children.append(_spawn(sock, options))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, handler)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        sock.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
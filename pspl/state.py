@@ -22,22 +22,43 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Dict, Optional
-from pspl.parser.errors import PSPLParserError, IdentifierAlreadyDefined
-from pspl.parser import generator
-from pspl import lexer
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple, Union
+from pspl.parser.errors import PSPLParserError
+from pspl.parser import descent
+from pspl.vm import Compiler
+from pspl.passes import Resolver, ConstantFolder, TypeSpecializer
+from pspl.output import OutputStream
+from pspl.program import Program
+from pspl.stats import RunStats
+from pspl import cache, lexer, transpiler
 
 import rply
+import tracemalloc
 
 if TYPE_CHECKING:
     from rply.lexer import Lexer
     from rply.parser import LRParser
     from rply.token import SourcePosition
+    from pspl.ast import Block
+    from pspl.profiler import Profiler
 
 __all__ = (
+    'ENGINES',
     'RuntimeState',
 )
 
+ENGINES: Tuple[str, ...] = (
+    'tree',
+    'vm',
+    'python',
+)
+"""The available execution engines.
+
+``tree`` evaluates the AST directly. ``vm`` compiles the AST to bytecode
+and executes it on :class:`pspl.vm.VirtualMachine`. ``python`` transpiles
+the AST to a Python code object using :class:`pspl.transpiler.Transpiler`.
+"""
+
 
 class RuntimeState:
     """Internal state for PSPL runtime.
@@ -52,19 +73,44 @@ class RuntimeState:
         The source code or file name.
     file: :class:`bool`
         Whether :attr:`source` is a file name.
+    engine: :class:`str`
+        The execution engine, one of :data:`ENGINES`.
+    parser: :class:`str`
+        The parser backend, one of :data:`pspl.parser.PARSER_BACKENDS`.
+    cache: :class:`bool`
+        Whether to cache the compiled program of source file
+        in :data:`pspl.cache.CACHE_DIR` directory.
+    output: :class:`pspl.output.OutputStream`
+        The stream that the output is written to.
+    program: Optional[:class:`pspl.program.Program`]
+        The compiled program. This is set on first execution and reused
+        by later executions.
     """
     def __init__(
         self,
         *,
         source: str,
         file: bool = False,
+        engine: str = 'tree',
+        parser: str = 'lr',
+        cache: bool = False,
+        output: Optional[OutputStream] = None,
     ) -> None:
 
+        if engine not in ENGINES:
+            raise ValueError('Unknown engine %r' % engine)
+        if parser not in descent.PARSER_BACKENDS:
+            raise ValueError('Unknown parser %r' % parser)
+
         self.source = source
         self.file = file
+        self.engine = engine
+        self.parser = parser
+        self.cache = cache
+        self.output = OutputStream() if output is None else output
         self.type_defs: Dict[str, Any] = {}
-        self.defs: Dict[str, Any] = {}
-        self.constant_defs: Dict[str, Any] = {}
+        self.slot_map: Dict[str, int] = {}
+        self.program: Optional[Program] = None
 
     @property
     def filename(self) -> Optional[str]:
@@ -83,40 +129,60 @@ class RuntimeState:
     def remove_type_def(self, ident: str) -> Any:
         return self.type_defs.pop(ident)
 
-    def add_def(
+    def get_slot(self, ident: str) -> int:
+        """Returns the index of slot storing the value of given identifier.
+
+        A new slot is allocated if the identifier doesn't have one yet.
+        """
+        try:
+            return self.slot_map[ident]
+        except KeyError:
+            slot = self.slot_map[ident] = len(self.slot_map)
+            return slot
+
+    def _get_lexer(self) -> Union[Lexer, lexer.Tokenizer]:
+        return lexer.get_lexer()
+
+    def _get_parser(self) -> Any:
+        return descent.get_parser(self.parser)
+
+    def _parse(self, parser: LRParser, tokens: Any, stats: Optional[RunStats] = None) -> Block:
+        if stats is None:
+            stats = RunStats()
+
+        with stats.phase('parse'):
+            tree = parser.parse(tokens, state=self)
+        with stats.phase('resolve'):
+            Resolver(self).resolve(tree)  # type: ignore
+
+        folder = ConstantFolder(self)
+        with stats.phase('fold'):
+            tree = folder.fold(tree)  # type: ignore
+        stats.folded = folder.folded
+
+        specializer = TypeSpecializer()
+        with stats.phase('specialize'):
+            tree = specializer.specialize(tree)  # type: ignore
+        stats.specialized = specializer.specialized
+        return tree  # type: ignore
+
+    def format_error(
         self,
-        ident: str,
-        val: Any,
-        *,
-        constant: bool = False,
+        error_type: str,
+        error_message: str,
         source_pos: Optional[SourcePosition] = None,
-    ) -> None:
-        if ident in self.constant_defs:
-            raise IdentifierAlreadyDefined(source_pos, ident)
-        if constant:
-            self.constant_defs[ident] = val
-        else:
-            self.defs[ident] = val
-
-    def get_def(self, ident: str) -> Any:
-        if ident in self.constant_defs:
-            return self.constant_defs[ident]
-        return self.defs[ident]
-
-    def remove_def(self, ident: str) -> Any:
-        return self.defs.pop(ident)
-
-    def _get_lexer(self) -> Lexer:
-        lg = rply.LexerGenerator()
-        for token, pattern in lexer.TOKENS.items():
-            lg.add(token, pattern)
-        for pattern in lexer.IGNORED_TOKENS:
-            lg.ignore(pattern)
-        return lg.build()
-
-    def _get_parser(self) -> LRParser:
-        gen = generator.get()
-        return gen.build()
+    ) -> str:
+        """Returns the text reporting an error, as written by :meth:`log_error`."""
+        text = f'{error_type}: {error_message}\n'
+        if source_pos:
+            text = f'At line {source_pos.lineno}, column {source_pos.colno}, index {source_pos.idx}:\n' + text
+        return text
+
+    def describe_error(self, err: Union[rply.LexingError, PSPLParserError]) -> str:
+        """Returns the text reporting a syntax or runtime error of program."""
+        if isinstance(err, rply.LexingError):
+            return self.format_error('SyntaxError', 'Invalid syntax', err.source_pos)
+        return self.format_error(err.__class__.__name__, err.message, err.source_pos)
 
     def log_error(
         self,
@@ -124,33 +190,144 @@ class RuntimeState:
         error_message: str,
         source_pos: Optional[SourcePosition] = None,
     ) -> None:
-        if source_pos:
-            print(f'At line {source_pos.lineno}, column {source_pos.colno}, index {source_pos.idx}:')
-        print(f'{error_type}: {error_message}')
+        self.output.write_error(self.format_error(error_type, error_message, source_pos))
+
+    def read_source(self) -> str:
+        """Returns the source code, reading it from the file if :attr:`source` is a file name."""
+        if not self.file:
+            return self.source
+        with open(self.source, 'r') as f:
+            return f.read()
+
+    def compile(self, stats: Optional[RunStats] = None) -> Program:
+        """Compiles the source code to a :class:`Program`.
+
+        Parameters
+        ----------
+        stats: Optional[:class:`pspl.stats.RunStats`]
+            The statistics to record the compilation phases in.
+
+        Raises
+        ------
+        rply.LexingError
+            The source has invalid syntax.
+        PSPLParserError
+            The source could not be parsed.
+        """
+        if stats is None:
+            stats = RunStats()
 
-    def exec(self) -> None:
-        """Start the execution process."""
         src = self.source
         if self.file:
-            with open(src, 'r') as f:
-                src = f.read()
+            with stats.phase('read'):
+                src = self.read_source()
+
+        use_cache = self.cache and self.file
+        if use_cache:
+            with stats.phase('cache_load'):
+                program = cache.load(self.source, src, self.engine)
+            if program is not None:
+                return program
+
+        program = self._compile(src, stats)
+        if use_cache:
+            with stats.phase('cache_dump'):
+                cache.dump(self.source, src, program)
+        return program
 
-        lexer = self._get_lexer()
-        parser = self._get_parser()
-        tokens = lexer.lex(src)
+    def _compile(self, src: str, stats: RunStats) -> Program:
+        self.type_defs.clear()
+        self.slot_map.clear()
 
+        if self.engine == 'python':
+            # The transpiled code is cached so compiling the same
+            # source again skips lexing and parsing entirely.
+            with stats.phase('cache_load'):
+                cached = transpiler.get_cached(src)
+            if cached is not None:
+                code, tree, names = cached
+                return Program(engine=self.engine, names=names, tree=tree, code=code, filename=self.filename)
+
+        with stats.phase('lexer_build'):
+            tokenizer = self._get_lexer()
+        with stats.phase('parser_build'):
+            parser = self._get_parser()
+
+        # The tokens are collected before parsing, rather than lexed
+        # lazily by the parser, so the two phases are timed separately.
         try:
-            parser.parse(tokens, state=self).eval()  # type: ignore
-        except (rply.LexingError, PSPLParserError) as err:
-            if isinstance(err, rply.LexingError):
-                self.log_error(
-                    error_type='SyntaxError',
-                    error_message='Invalid syntax',
-                    source_pos=err.source_pos,
-                )
+            with stats.phase('lex'):
+                tokens = list(tokenizer.lex(src))
+        except rply.LexingError:
+            # Parse lazily so a syntax error before the invalid
+            # token is still reported first.
+            self._parse(parser, tokenizer.lex(src), stats)
+            raise
+
+        tree = self._parse(parser, iter(tokens), stats)
+        stats.tokens = len(tokens)
+        stats.nodes = sum(1 for _ in tree.walk())
+        del tokens
+
+        with stats.phase('compile'):
+            if self.engine == 'python':
+                code = transpiler.Transpiler(self).transpile(tree)  # type: ignore
+                names: Tuple[str, ...] = tuple(self.slot_map)
+                transpiler.add_cached(src, code, tree, names)
+            elif self.engine == 'vm':
+                code = Compiler(self).compile(tree)  # type: ignore
+                names = tuple(code.names)  # type: ignore
             else:
-                self.log_error(
-                    error_type=err.__class__.__name__,
-                    error_message=err.message,
-                    source_pos=err.source_pos,
-                )
+                code = tree
+                names = tuple(self.slot_map)
+
+        return Program(engine=self.engine, names=names, tree=tree, code=code, filename=self.filename)
+
+    def exec(
+        self,
+        *,
+        inputs: Optional[Iterable[str]] = None,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        counters: bool = False,
+        output: Optional[OutputStream] = None,
+    ) -> RunStats:
+        """Start the execution process.
+
+        The source is compiled on first execution only. The statistics of
+        execution are returned, including the compilation phases if the
+        source was compiled. With ``counters``, the traced memory includes
+        the compilation as well. The output is written to :attr:`output`
+        unless another ``output`` stream is given.
+        """
+        if output is None:
+            output = self.output
+
+        stats = RunStats()
+        tracing = counters and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+
+        try:
+            if self.program is None:
+                self.program = self.compile(stats)
+            self.program.run(
+                inputs=inputs,
+                output=output,
+                max_steps=max_steps,
+                timeout=timeout,
+                profiler=profiler,
+                counters=counters,
+                stats=stats,
+            )
+        except (rply.LexingError, PSPLParserError) as err:
+            stats.error_type = 'SyntaxError' if isinstance(err, rply.LexingError) else err.__class__.__name__
+            stats.error = self.describe_error(err)
+            output.write_error(stats.error)
+        finally:
+            output.flush()
+            if tracing:
+                tracemalloc.stop()
+
+        return stats
@@ -0,0 +1,180 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Statistics of program runs."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+import contextlib
+import time
+
+if TYPE_CHECKING:
+    from pspl.profiler import Profiler
+
+__all__ = (
+    'PHASES',
+    'RunStats',
+)
+
+PHASES = (
+    'read',
+    'cache_load',
+    'lexer_build',
+    'parser_build',
+    'lex',
+    'parse',
+    'resolve',
+    'fold',
+    'specialize',
+    'compile',
+    'cache_dump',
+    'execute',
+)
+"""The phases of a run in the order they are performed.
+
+``read`` reads the source file. ``cache_load`` and ``cache_dump`` load and
+save the compiled program cache. ``lexer_build`` and ``parser_build``
+construct the lexer and parser (which is only slow the first time in a
+process). ``lex`` tokenizes and ``parse`` parses the source, ``resolve``,
+``fold`` and ``specialize`` are the AST passes and ``compile`` lowers the
+AST for the engine. ``execute`` runs the program.
+"""
+
+
+class RunStats:
+    """The statistics of a single run of a program.
+
+    Stats are returned by :meth:`PSPLRunner.run` and :meth:`Program.run`.
+    The counts that require compiling the program are None if the program
+    was compiled by an earlier run or loaded from the cache. The runtime
+    counters are None unless the run was made with ``counters=True``.
+
+    Attributes
+    ----------
+    phases: Dict[:class:`str`, :class:`float`]
+        The seconds spent in each performed phase, in the order of
+        :data:`PHASES`.
+    tokens: Optional[:class:`int`]
+        The number of tokens in source.
+    nodes: Optional[:class:`int`]
+        The number of nodes in the syntax tree after optimization.
+    folded: Optional[:class:`int`]
+        The number of expression and identifier nodes that were folded
+        by :class:`pspl.passes.ConstantFolder`.
+    specialized: Optional[:class:`int`]
+        The number of expression nodes that were specialized by
+        :class:`pspl.passes.TypeSpecializer`.
+    statements: Optional[:class:`int`]
+        The number of statements executed.
+    loop_iterations: Optional[:class:`int`]
+        The number of loop iterations executed.
+    peak_variables: Optional[:class:`int`]
+        The largest number of identifiers defined at once.
+    peak_memory: Optional[:class:`int`]
+        The peak size of memory blocks allocated by Python during the run
+        in bytes, as traced by :mod:`tracemalloc`.
+    profile: Optional[:class:`pspl.profiler.Profiler`]
+        The profile of run, if it was profiled.
+    error: Optional[:class:`str`]
+        The report of syntax or runtime error that the run failed with, as
+        printed by :meth:`PSPLRunner.run`. Other errors are raised instead.
+    error_type: Optional[:class:`str`]
+        The name of type of that error.
+    cached: :class:`bool`
+        Whether the result of run was taken from a
+        :class:`pspl.results.ResultCache` rather than executing the program.
+    """
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.tokens: Optional[int] = None
+        self.nodes: Optional[int] = None
+        self.folded: Optional[int] = None
+        self.specialized: Optional[int] = None
+        self.statements: Optional[int] = None
+        self.loop_iterations: Optional[int] = None
+        self.peak_variables: Optional[int] = None
+        self.peak_memory: Optional[int] = None
+        self.profile: Optional[Profiler] = None
+        self.error: Optional[str] = None
+        self.error_type: Optional[str] = None
+        self.cached = False
+
+    def __repr__(self) -> str:
+        return f'<RunStats total_time={self.total_time:.6f} phases={len(self.phases)}>'
+
+    @property
+    def total_time(self) -> float:
+        """:class:`float`: The seconds spent in all phases."""
+        return sum(self.phases.values())
+
+    @property
+    def startup_time(self) -> float:
+        """:class:`float`: The seconds spent in all phases except ``execute``."""
+        return sum(t for name, t in self.phases.items() if name != 'execute')
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """A context manager adding the time spent in its body to given phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the statistics as a JSON serializable dictionary.
+
+        The profile is not included.
+        """
+        return {
+            'phases': {name: self.phases[name] for name in PHASES if name in self.phases},
+            'total_time': self.total_time,
+            'startup_time': self.startup_time,
+            'tokens': self.tokens,
+            'nodes': self.nodes,
+            'folded': self.folded,
+            'specialized': self.specialized,
+            'statements': self.statements,
+            'loop_iterations': self.loop_iterations,
+            'peak_variables': self.peak_variables,
+            'peak_memory': self.peak_memory,
+            'error_type': self.error_type,
+            'cached': self.cached,
+        }
+
+    def report(self) -> str:
+        """Returns the human readable report of statistics."""
+        rows = []
+        for name in PHASES:
+            if name in self.phases:
+                rows.append('%-16s %12.6f s' % (name, self.phases[name]))
+        rows.append('%-16s %12.6f s' % ('total', self.total_time))
+        rows.append('')
+
+        counts = self.to_dict()
+        for name in ('tokens', 'nodes', 'folded', 'specialized', 'statements', 'loop_iterations', 'peak_variables', 'peak_memory'):
+            value = counts[name]
+            if value is not None:
+                rows.append('%-16s %12d%s' % (name, value, ' bytes' if name == 'peak_memory' else ''))
+        return '\n'.join(rows).rstrip()
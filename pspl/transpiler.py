@@ -0,0 +1,500 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Transpiler from PSPL syntax tree to Python code objects.
+
+The generated Python code preserves the semantics of PSPL that are
+implemented by the syntax tree nodes. Identifiers are translated to local
+variables of a function, so they are accessed by index rather than by
+name lookups.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, List, Optional, Set, Tuple
+from collections import OrderedDict
+from types import CodeType
+from rply.token import SourcePosition
+from pspl.parser.errors import IdentifierNotDefined, IdentifierAlreadyDefined
+from pspl.context import ExecutionContext
+from pspl import ast, lexer, utils
+
+import functools
+import hashlib
+import re
+import threading
+
+if TYPE_CHECKING:
+    from pspl.state import RuntimeState
+
+__all__ = (
+    'CHECKPOINT',
+    'INPUT',
+    'Transpiler',
+    'execute',
+    'execute_resumable',
+    'MAX_CACHED',
+    'get_cached',
+    'add_cached',
+)
+
+FILENAME = '<pspl>'
+
+BINARY_OPERATORS = {
+    ast.Subtract: '-',
+    ast.Mul: '*',
+    ast.Div: '/',
+    ast.Eq: '==',
+    ast.NEq: '!=',
+    ast.Gt: '>',
+    ast.GtEq: '>=',
+    ast.Lt: '<',
+    ast.LtEq: '<=',
+    ast.NumericSubtract: '-',
+    ast.NumericMul: '*',
+    ast.NumericDiv: '/',
+    ast.TypedEq: '==',
+    ast.TypedNEq: '!=',
+    ast.TypedGt: '>',
+    ast.TypedGtEq: '>=',
+    ast.TypedLt: '<',
+    ast.TypedLtEq: '<=',
+}
+
+_UNBOUND_NAME = re.compile(r"'v_(\w+)'")
+
+CHECKPOINT = 0
+"""The event yielded by resumable code once its step budget is exhausted.
+
+The event is a ``(CHECKPOINT, budget, source_pos)`` tuple and the new
+step budget has to be sent back to continue the execution.
+"""
+
+INPUT = 1
+"""The event yielded by resumable code when an INPUT statement reads a line.
+
+The event is an ``(INPUT, prompt, source_pos)`` tuple and the line of input
+has to be sent back to continue the execution.
+"""
+
+
+def _input(
+    read: Callable[[str, Optional[SourcePosition]], str],
+    prompt: str,
+    cast: Any,
+    pos: Optional[Tuple[int, int, int]],
+) -> Any:
+    source_pos = SourcePosition(*pos) if pos else None
+    while True:
+        ipt = read(prompt, source_pos)
+        try:
+            return cast(ipt)
+        except Exception:
+            continue
+
+
+def _cast(value: str, cast: Any) -> Any:
+    try:
+        return cast(value)
+    except Exception:
+        return utils.MISSING
+
+
+def _range(start: Any, end: Any, step: Any, pos: Optional[Tuple[int, int, int]]) -> Any:
+    return utils.loop_range(start, end, step, SourcePosition(*pos) if pos else None)
+
+
+def _already_defined(pos: Optional[Tuple[int, int, int]], ident: str) -> None:
+    raise IdentifierAlreadyDefined(SourcePosition(*pos) if pos else None, ident)
+
+
+def _not_defined(err: NameError, positions: Dict[int, Dict[str, Tuple[int, int, int]]]) -> None:
+    tb = err.__traceback__
+    lineno = 0
+    while tb is not None:
+        if tb.tb_frame.f_code.co_filename == FILENAME:
+            lineno = tb.tb_lineno
+        tb = tb.tb_next
+
+    idents = positions.get(lineno, {})
+    match = _UNBOUND_NAME.search(str(err))
+    if match:
+        ident = match.group(1)
+    elif idents:
+        ident = next(iter(idents))
+    else:
+        raise err
+
+    pos = idents.get(ident)
+    raise IdentifierNotDefined(SourcePosition(*pos) if pos else None, ident) from None
+
+
+RUNTIME: Dict[str, Any] = {
+    '_output': utils.output_value,
+    '_range': _range,
+    '_casts': lexer.INPUT_TYPE_CASTS,
+    '_already_defined': _already_defined,
+    '_not_defined': _not_defined,
+    '_SourcePosition': SourcePosition,
+    '_cast': _cast,
+    '_MISSING': utils.MISSING,
+}
+"""The helpers available to the generated code.
+
+The ``_write``, ``_input``, ``_budget`` and ``_refill`` helpers are bound to
+the execution context by :func:`execute`.
+"""
+
+
+def _pos(pos: Optional[SourcePosition]) -> Optional[Tuple[int, int, int]]:
+    if pos is None:
+        return None
+    return (pos.idx, pos.lineno, pos.colno)
+
+
+class Transpiler:
+    """Transpiles the PSPL syntax tree to Python code.
+
+    Parameters
+    ----------
+    state: Optional[:class:`RuntimeState`]
+        The runtime state used while parsing the AST.
+    limits: :class:`bool`
+        Whether to generate the calls enforcing execution limits
+        at the start of every loop body.
+    resumable: :class:`bool`
+        Whether to generate a generator that yields the :data:`CHECKPOINT`
+        event at the start of loop bodies once the step budget is exhausted
+        and the :data:`INPUT` event for reading input, rather than calling
+        the helpers. The code must be executed using :func:`execute_resumable`.
+    """
+    def __init__(
+        self,
+        state: Optional[RuntimeState] = None,
+        *,
+        limits: bool = False,
+        resumable: bool = False,
+    ) -> None:
+        self._state = state
+        self._limits = limits or resumable
+        self._resumable = resumable
+        self._loop_positions: List[Optional[Tuple[int, int, int]]] = []
+        self._lines: List[str] = []
+        self._indent = 1
+        self._temps = 0
+        self._constants: Set[str] = set()
+        self._positions: Dict[int, Dict[str, Tuple[int, int, int]]] = {}
+        self._current: Dict[str, Tuple[int, int, int]] = {}
+
+    def to_source(self, node: ast.Node) -> str:
+        """Returns the Python source code for the given node."""
+        self._constants = {n.ident for n in node.walk() if isinstance(n, ast.Assignment) and n.constant}
+        self._lines = [
+            'def _main(isinstance=isinstance, str=str, _write=_write, _output=_output, '
+            '_input=_input, _range=_range, _casts=_casts, _already_defined=_already_defined, '
+            '_budget=_budget, _refill=_refill):',
+        ]
+        if self._limits:
+            # The steps are counted down in a local variable and the
+            # limits are only checked once the budget is exhausted.
+            self._line('_b = _budget')
+        for name in sorted(self._constants):
+            self._line('c_%s = False' % name)
+
+        self._block(node)
+        if self._resumable:
+            # The remaining budget is returned for counting the steps.
+            # The dead yield makes the function a generator even if
+            # the program never yields.
+            self._line('return _b')
+            self._line('yield')
+        self._lines.append('')
+        # The positions are defined after the function so the line
+        # numbers of its body are not shifted.
+        for idx, pos in enumerate(self._loop_positions):
+            self._lines.append('_l%d = %s' % (idx, 'None' if pos is None else '_SourcePosition(%d, %d, %d)' % pos))
+        if self._resumable:
+            self._lines.append('def _run():')
+            self._lines.append('    try:')
+            self._lines.append('        return (yield from _main())')
+            self._lines.append('    except NameError as err:')
+            self._lines.append('        _not_defined(err, %r)' % self._positions)
+        else:
+            self._lines.append('try:')
+            self._lines.append('    _main()')
+            self._lines.append('except NameError as err:')
+            self._lines.append('    _not_defined(err, %r)' % self._positions)
+        return '\n'.join(self._lines) + '\n'
+
+    def transpile(self, node: ast.Node) -> CodeType:
+        """Returns the Python code object for the given node.
+
+        The returned code object can be executed using :func:`execute`.
+        """
+        return compile(self.to_source(node), FILENAME, 'exec')
+
+    def _line(self, line: str) -> None:
+        self._lines.append('    ' * self._indent + line)
+        if self._current:
+            self._positions[len(self._lines)] = self._current
+            self._current = {}
+
+    def _temp(self) -> str:
+        self._temps += 1
+        return '_t%d' % self._temps
+
+    def _block(self, node: ast.Block) -> None:
+        start = len(self._lines)
+        for stmt in node.statements:
+            self._stmt(stmt)
+        if len(self._lines) == start:
+            self._line('pass')
+
+    def _store(
+        self,
+        ident: str,
+        value: str,
+        pos: Optional[SourcePosition] = None,
+        constant: bool = False,
+    ) -> None:
+        if ident not in self._constants:
+            self._line('v_%s = %s' % (ident, value))
+            return
+
+        # Like ExecutionContext.add_def, the value is evaluated before
+        # checking whether the identifier is already a constant.
+        temp = self._temp()
+        self._line('%s = %s' % (temp, value))
+        self._line('if c_%s: _already_defined(%r, %r)' % (ident, _pos(pos), ident))
+        self._line('v_%s = %s' % (ident, temp))
+        if constant:
+            self._line('c_%s = True' % ident)
+
+    def _stmt(self, node: ast.Node) -> None:
+        if isinstance(node, ast.Block):
+            self._block(node)
+        elif isinstance(node, ast.Output):
+            self._line('_write(_output(%s))' % self._expr(node.value))
+        elif isinstance(node, ast.Declare):
+            pass
+        elif isinstance(node, ast.Assignment):
+            self._store(node.ident, self._expr(node.val), node.source_pos, node.constant)
+        elif isinstance(node, ast.Input):
+            cast = '_casts[%r]' % node.tp if node.tp in lexer.INPUT_TYPE_CASTS else 'str'
+            if self._resumable:
+                # Like _input, the input is read again until it can be cast.
+                temp = self._temp()
+                pos = _pos(node.source_pos)
+                event = '%d, %r, %s' % (INPUT, node.prompt, 'None' if pos is None else '_SourcePosition(%d, %d, %d)' % pos)
+                read = '_cast((yield %s), %s)' % (event, cast)
+                self._line('%s = %s' % (temp, read))
+                self._line('while %s is _MISSING: %s = %s' % (temp, temp, read))
+                self._store(node.ident, temp)
+            else:
+                self._store(node.ident, '_input(%r, %s, %r)' % (node.prompt, cast, _pos(node.source_pos)))
+        elif isinstance(node, ast.If):
+            self._line('if %s:' % self._expr(node.expr))
+            self._suite(node.block)
+            if node.else_block:
+                self._line('else:')
+                self._suite(node.else_block)
+        elif isinstance(node, ast.For):
+            self._for(node)
+        elif isinstance(node, ast.ConditionalLoop):
+            if node.post_condition:
+                self._line('while True:')
+                self._indent += 1
+                self._tick(node.block, node.source_pos)
+                self._block(node.block)
+                self._line('if not (%s): break' % self._expr(node.cond))
+                self._indent -= 1
+            else:
+                self._line('while %s:' % self._expr(node.cond))
+                self._indent += 1
+                self._tick(node.block, node.source_pos)
+                self._block(node.block)
+                self._indent -= 1
+        else:
+            raise TypeError('Cannot transpile node %r' % node.__class__.__name__)
+
+    def _suite(self, node: ast.Block) -> None:
+        self._indent += 1
+        self._block(node)
+        self._indent -= 1
+
+    def _tick(self, node: ast.Block, pos: Optional[SourcePosition]) -> None:
+        # Called at the start of loop bodies.
+        if self._limits:
+            self._line('_b -= %d' % len(node.statements))
+            if self._resumable:
+                self._line('if _b < 0: _b = yield %d, _b, _l%d' % (CHECKPOINT, len(self._loop_positions)))
+            else:
+                self._line('if _b < 0: _b = _refill(_b, _l%d)' % len(self._loop_positions))
+            self._loop_positions.append(_pos(pos))
+
+    def _for(self, node: ast.For) -> None:
+        ident = node.ident
+        rng = '_range(%s, %s, %s, %r)' % (
+            self._expr(node.start), self._expr(node.end), self._expr(node.step), _pos(node.source_pos),
+        )
+        if ident in self._constants:
+            temp = self._temp()
+            self._line('for %s in %s:' % (temp, rng))
+            self._indent += 1
+            self._store(ident, temp)
+        else:
+            self._line('for v_%s in %s:' % (ident, rng))
+            self._indent += 1
+
+        self._tick(node.block, node.source_pos)
+        self._block(node.block)
+        self._indent -= 1
+        self._line('try: del v_%s' % ident)
+        self._line('except NameError: pass')
+
+    def _expr(self, node: Any) -> str:
+        if not isinstance(node, ast.Node):
+            return repr(node)
+        if isinstance(node, (ast.String, ast.Integer, ast.Float, ast.Boolean, ast.Constant)):
+            return repr(node.eval())
+        if isinstance(node, ast.Ident):
+            self._current.setdefault(node.name, _pos(node.pos))  # type: ignore
+            return 'v_%s' % node.name
+        if isinstance(node, ast.Add):
+            return self._add(node)
+
+        op = BINARY_OPERATORS[node.__class__]
+        return '(%s %s %s)' % (self._expr(node.left), op, self._expr(node.right))  # type: ignore
+
+    def _add(self, node: ast.Add) -> str:
+        left = _literal(node.left)
+        right = _literal(node.right)
+
+        if isinstance(left, str) or isinstance(right, str):
+            lhs = repr(left) if isinstance(left, str) else 'str(%s)' % self._expr(node.left)
+            rhs = repr(right) if isinstance(right, str) else 'str(%s)' % self._expr(node.right)
+            return '(%s + %s)' % (lhs, rhs)
+
+        # At most one operand is a numeric literal here so only the
+        # other operand has to be checked for being a string.
+        if left is not utils.MISSING:
+            temp = self._temp()
+            return '(%r + str(%s) if isinstance((%s := %s), str) else %r + %s)' % (
+                str(left), temp, temp, self._expr(node.right), left, temp,
+            )
+        if right is not utils.MISSING:
+            temp = self._temp()
+            return '(str(%s) + %r if isinstance((%s := %s), str) else %s + %r)' % (
+                temp, str(right), temp, self._expr(node.left), temp, right,
+            )
+
+        lhs, rhs = self._temp(), self._temp()
+        return '(str(%s) + str(%s) if isinstance((%s := %s), str) | isinstance((%s := %s), str) else %s + %s)' % (
+            lhs, rhs, lhs, self._expr(node.left), rhs, self._expr(node.right), lhs, rhs,
+        )
+
+
+def _literal(node: Any) -> Any:
+    # Returns the value of a literal or MISSING if node is not a literal.
+    if not isinstance(node, ast.Node):
+        return node
+    if isinstance(node, (ast.String, ast.Integer, ast.Float, ast.Boolean, ast.Constant)):
+        return node.eval()
+    return utils.MISSING
+
+
+
+def execute(code: CodeType, context: Optional[ExecutionContext] = None) -> None:
+    """Executes a code object returned by :meth:`Transpiler.transpile`.
+
+    The input and output of the code is handled by the given context. If
+    no context is given, standard input and output are used.
+    """
+    if context is None:
+        context = ExecutionContext([])
+
+    namespace = dict(RUNTIME)
+    namespace['_write'] = context.output.write
+    namespace['_input'] = functools.partial(_input, context.read_input)
+    namespace['_budget'] = context.step_budget
+    namespace['_refill'] = context.refill
+    exec(code, namespace)
+
+
+def execute_resumable(code: CodeType, context: ExecutionContext) -> Generator[Tuple[Any, ...], Any, int]:
+    """Returns a generator executing a code object transpiled with ``resumable``.
+
+    The execution only proceeds while the generator is advanced. It yields
+    the :data:`CHECKPOINT` and :data:`INPUT` events and expects the new step
+    budget and the line of input to be sent for them respectively. The
+    execution limits of context are not enforced unless the new budget
+    is obtained from :meth:`ExecutionContext.refill`. Once the execution
+    finishes, the remaining step budget is the value of :exc:`StopIteration`.
+    """
+    namespace = dict(RUNTIME)
+    namespace['_write'] = context.output.write
+    namespace['_input'] = None
+    namespace['_budget'] = context.step_budget
+    namespace['_refill'] = None
+    exec(code, namespace)
+    return namespace['_run']()
+
+
+MAX_CACHED = 128
+"""The number of most recently used transpiled programs kept by :func:`add_cached`."""
+
+_cache: OrderedDict[str, Tuple[CodeType, ast.Block, Tuple[str, ...]]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def get_cached(source: str) -> Optional[Tuple[CodeType, ast.Block, Tuple[str, ...]]]:
+    """Returns the cached code object, syntax tree and identifier names for the given PSPL source.
+
+    None is returned if the source has not been transpiled yet or its
+    code was evicted from the cache.
+    """
+    key = _source_hash(source)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+        return cached
+
+
+def add_cached(source: str, code: CodeType, tree: ast.Block, names: Tuple[str, ...]) -> None:
+    """Caches the code object transpiled from the given PSPL source.
+
+    The syntax tree and the names of identifiers indexed by their slots
+    are cached along with the code since they are needed for running
+    the tree with execution limits or profiling. Only the :data:`MAX_CACHED`
+    most recently used programs are kept.
+    """
+    with _cache_lock:
+        key = _source_hash(source)
+        _cache[key] = (code, tree, names)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
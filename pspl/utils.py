@@ -24,11 +24,17 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional
+from pspl.parser.errors import InvalidStep
+
+if TYPE_CHECKING:
+    from rply.token import SourcePosition
 
 __all__ = (
     'MISSING',
     'maybe_eval',
+    'output_value',
+    'loop_range',
 )
 
 
@@ -48,7 +54,41 @@ MISSING: Any = _Missing()
 """A type safe sentinel used where None may be ambiguous."""
 
 
-def maybe_eval(val: Any) -> Any:
+def maybe_eval(val: Any, ctx: Any = None) -> Any:
     if hasattr(val, 'eval'):
-        return val.eval()
+        return val.eval(ctx)
     return val
+
+
+def output_value(val: Any) -> Any:
+    """Returns the value formatted for the OUTPUT statement."""
+    if val is True:
+        return 'TRUE'
+    if val is False:
+        return 'FALSE'
+    return val
+
+
+def loop_range(start: Any, end: Any, step: Any, source_pos: Optional[SourcePosition] = None) -> Iterable[Any]:
+    """Returns the values of a FOR loop counter, ``end`` inclusive.
+
+    Integer loops return a :class:`range`. Otherwise the step is added
+    to the counter repeatedly, the same as updating it in the loop body.
+
+    Raises
+    ------
+    InvalidStep
+        The step is zero. The error is reported at ``source_pos``.
+    """
+    if step == 0:
+        raise InvalidStep(source_pos, step)
+    if isinstance(start, int) and isinstance(end, int) and isinstance(step, int):
+        return range(start, end + (1 if step > 0 else -1), step)
+    return _float_range(start, end, step)
+
+
+def _float_range(start: Any, end: Any, step: Any) -> Iterator[Any]:
+    val = start
+    while (val <= end) if step > 0 else (val >= end):
+        yield val
+        val += step
@@ -0,0 +1,8 @@
+"""
+pspl.vm
+~~~~~~~
+
+Implementation of PSPL bytecode compiler and virtual machine.
+"""
+from pspl.vm.compiler import *
+from pspl.vm.machine import *
@@ -0,0 +1,324 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+from pspl.vm import opcodes as op
+from pspl import ast, lexer
+
+import operator
+
+if TYPE_CHECKING:
+    from pspl.state import RuntimeState
+    from rply.token import SourcePosition
+
+__all__ = (
+    'Code',
+    'Compiler',
+)
+
+BINARY_OPERATORS = {
+    ast.Subtract: operator.sub,
+    ast.Mul: operator.mul,
+    ast.Div: operator.truediv,
+    ast.NumericSubtract: operator.sub,
+    ast.NumericMul: operator.mul,
+    ast.NumericDiv: operator.truediv,
+}
+
+COMPARISON_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NEq: operator.ne,
+    ast.Gt: operator.gt,
+    ast.GtEq: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtEq: operator.le,
+    ast.TypedEq: operator.eq,
+    ast.TypedNEq: operator.ne,
+    ast.TypedGt: operator.gt,
+    ast.TypedGtEq: operator.ge,
+    ast.TypedLt: operator.lt,
+    ast.TypedLtEq: operator.le,
+}
+
+
+class Code:
+    """Represents a compiled PSPL program.
+
+    Attributes
+    ----------
+    instructions: List[Tuple[:class:`int`, Any]]
+        The list of ``(opcode, argument)`` instructions.
+    names: List[Optional[:class:`str`]]
+        The identifier names indexed by their slots. Internal slots
+        (used by loops) are named None.
+    positions: Dict[:class:`int`, :class:`rply.token.SourcePosition`]
+        The mapping of instruction indices to source positions of
+        the instructions that can fail.
+    """
+    def __init__(
+        self,
+        instructions: List[Tuple[int, Any]],
+        names: List[Optional[str]],
+        positions: Dict[int, SourcePosition],
+    ) -> None:
+        self.instructions = instructions
+        self.names = names
+        self.positions = positions
+
+    @property
+    def nslots(self) -> int:
+        """:class:`int`: The number of slots used by the program."""
+        return len(self.names)
+
+    def dis(self) -> str:
+        """Returns the human readable listing of instructions."""
+        lines = []
+        for idx, (opcode, arg) in enumerate(self.instructions):
+            if opcode in (op.LOAD_SLOT, op.STORE_SLOT, op.STORE_CHECKED, op.STORE_CONSTANT, op.DELETE_SLOT):
+                arg = '%d (%s)' % (arg, self.names[arg])
+            elif opcode in (op.BINARY_OP, op.COMPARE):
+                arg = arg.__name__
+            elif opcode == op.BINARY_OP_CONST:
+                arg = '%s %r' % (arg[0].__name__, arg[1])
+            lines.append('%4d %-16s %s' % (idx, op.OPNAMES[opcode], '' if arg is None else arg))
+        return '\n'.join(lines)
+
+
+class Compiler:
+    """Compiles the AST to a :class:`Code` for the virtual machine.
+
+    Parameters
+    ----------
+    state: Optional[:class:`RuntimeState`]
+        The runtime state used while parsing the AST.
+    limits: :class:`bool`
+        Whether to emit the instructions enforcing execution limits
+        at the start of every loop body.
+    """
+    def __init__(self, state: Optional[RuntimeState] = None, *, limits: bool = False) -> None:
+        self._state = state
+        self._limits = limits
+        self._instructions: List[Tuple[int, Any]] = []
+        self._names: List[Optional[str]] = []
+        self._slots: Dict[str, int] = {}
+        self._positions: Dict[int, SourcePosition] = {}
+        self._constants: Set[str] = set()
+
+    def compile(self, node: ast.Node) -> Code:
+        """Compiles the given node and returns the code."""
+        self._constants = {n.ident for n in node.walk() if isinstance(n, ast.Assignment) and n.constant}
+        self._reserve_slots(node)
+        self._compile(node)
+        self._emit(op.HALT)
+        return Code(self._instructions, self._names, self._positions)
+
+    def _reserve_slots(self, node: ast.Node) -> None:
+        # The identifiers keep the slots assigned by the Resolver so
+        # the syntax tree can be evaluated in contexts created for the
+        # code. The slots of loops are allocated after these.
+        slots: Dict[str, int] = {}
+        for n in node.walk():
+            if isinstance(n, ast.Ident):
+                slots[n.name] = n.slot
+            elif isinstance(n, (ast.Assignment, ast.For, ast.Input)):
+                slots[n.ident] = n.slot
+
+        if not slots or min(slots.values()) < 0:
+            return
+
+        self._names = [None] * (max(slots.values()) + 1)
+        for name, slot in slots.items():
+            self._names[slot] = name
+        self._slots = slots
+
+    def _emit(self, opcode: int, arg: Any = None, pos: Optional[SourcePosition] = None) -> int:
+        idx = len(self._instructions)
+        self._instructions.append((opcode, arg))
+        if pos is not None:
+            self._positions[idx] = pos
+        return idx
+
+    def _patch(self, idx: int, arg: Any) -> None:
+        self._instructions[idx] = (self._instructions[idx][0], arg)
+
+    def _slot(self, name: Optional[str]) -> int:
+        if name is not None and name in self._slots:
+            return self._slots[name]
+
+        slot = len(self._names)
+        self._names.append(name)
+        if name is not None:
+            self._slots[name] = slot
+        return slot
+
+    def _store(self, name: str, pos: Optional[SourcePosition] = None) -> None:
+        # Assignments to identifiers that are never defined as constant
+        # don't have to check for constant redefinition at runtime.
+        opcode = op.STORE_CHECKED if name in self._constants else op.STORE_SLOT
+        self._emit(opcode, self._slot(name), pos)
+
+    def _compile(self, node: Any) -> None:
+        if not isinstance(node, ast.Node):
+            self._emit(op.LOAD_CONST, node)
+            return
+
+        method = getattr(self, '_compile_' + node.__class__.__name__, None)
+        if method is None:
+            raise TypeError('Cannot compile node %r' % node.__class__.__name__)
+        method(node)
+
+    # Statements
+
+    def _compile_Block(self, node: ast.Block) -> None:
+        for stmt in node.statements:
+            self._compile(stmt)
+
+    def _compile_loop_body(self, node: ast.Block, pos: Optional[SourcePosition]) -> None:
+        if self._limits:
+            self._emit(op.CHECK_LIMITS, (len(node.statements), pos))
+        self._compile(node)
+
+    def _compile_Output(self, node: ast.Output) -> None:
+        self._compile(node.value)
+        self._emit(op.PRINT)
+
+    def _compile_Declare(self, node: ast.Declare) -> None:
+        pass
+
+    def _compile_Assignment(self, node: ast.Assignment) -> None:
+        self._compile(node.val)
+        if node.constant:
+            self._emit(op.STORE_CONSTANT, self._slot(node.ident), node.source_pos)
+        else:
+            self._store(node.ident, node.source_pos)
+
+    def _compile_Input(self, node: ast.Input) -> None:
+        cast = lexer.INPUT_TYPE_CASTS.get(node.tp, str)  # type: ignore
+        self._emit(op.INPUT, (node.prompt, cast), node.source_pos)
+        self._store(node.ident)
+
+    def _compile_If(self, node: ast.If) -> None:
+        self._compile(node.expr)
+        jump_else = self._emit(op.JUMP_IF_FALSE)
+        self._compile(node.block)
+
+        if node.else_block:
+            jump_end = self._emit(op.JUMP)
+            self._patch(jump_else, len(self._instructions))
+            self._compile(node.else_block)
+            self._patch(jump_end, len(self._instructions))
+        else:
+            self._patch(jump_else, len(self._instructions))
+
+    def _compile_For(self, node: ast.For) -> None:
+        counter = self._slot(None)
+        end = self._slot(None)
+        step = self._slot(None)
+        ident = self._slot(node.ident)
+
+        self._compile(node.start)
+        self._compile(node.end)
+        self._compile(node.step)
+
+        # The loop instructions bind the counter to the identifier
+        # directly unless it needs to be checked for being a constant,
+        # in which case it is bound to the counter slot itself.
+        bind = counter if node.ident in self._constants else ident
+        start = self._emit(op.FOR_START, pos=node.source_pos)
+        body = len(self._instructions)
+        if bind == counter:
+            self._emit(op.LOAD_SLOT, counter)
+            self._store(node.ident)
+
+        self._compile_loop_body(node.block, node.source_pos)
+        self._emit(op.FOR_NEXT, (counter, end, step, bind, body))
+        self._patch(start, (counter, end, step, bind, len(self._instructions)))
+
+        self._emit(op.DELETE_SLOT, ident)
+
+    def _compile_ConditionalLoop(self, node: ast.ConditionalLoop) -> None:
+        # The condition is placed after the body so that only a single
+        # jump is performed on every iteration.
+        if node.post_condition:
+            jump_cond = None
+        else:
+            jump_cond = self._emit(op.JUMP)
+
+        body = len(self._instructions)
+        self._compile_loop_body(node.block, node.source_pos)
+        if jump_cond is not None:
+            self._patch(jump_cond, len(self._instructions))
+
+        self._compile(node.cond)
+        self._emit(op.JUMP_IF_TRUE, body)
+
+    # Expressions
+
+    def _compile_Ident(self, node: ast.Ident) -> None:
+        self._emit(op.LOAD_SLOT, self._slot(node.name), node.pos)
+
+    def _compile_String(self, node: ast.String) -> None:
+        self._emit(op.LOAD_CONST, node.eval())
+
+    _compile_Integer = _compile_Float = _compile_Boolean = _compile_Constant = _compile_String
+
+    def _compile_Add(self, node: ast.Add) -> None:
+        self._compile(node.left)
+        if _is_literal(node.right):
+            self._emit(op.ADD_CONST, _literal_value(node.right))
+        else:
+            self._compile(node.right)
+            self._emit(op.BINARY_ADD)
+
+    _compile_NumericAdd = _compile_StringAdd = _compile_Add
+
+    def _compile_binary(self, node: Any, func: Any) -> None:
+        self._compile(node.left)
+        if _is_literal(node.right):
+            self._emit(op.BINARY_OP_CONST, (func, _literal_value(node.right)))
+        else:
+            self._compile(node.right)
+            self._emit(op.BINARY_OP, func)
+
+    def _compile_arithmetic(self, node: ast.ArithmeticExpression) -> None:
+        self._compile_binary(node, BINARY_OPERATORS[node.__class__])
+
+    _compile_Subtract = _compile_Mul = _compile_Div = _compile_arithmetic
+    _compile_NumericSubtract = _compile_NumericMul = _compile_NumericDiv = _compile_arithmetic
+
+    def _compile_compare(self, node: ast.BooleanExpression) -> None:
+        self._compile_binary(node, COMPARISON_OPERATORS[node.__class__])
+
+    _compile_Eq = _compile_NEq = _compile_Gt = _compile_GtEq = _compile_Lt = _compile_LtEq = _compile_compare
+    _compile_TypedEq = _compile_TypedNEq = _compile_TypedGt = _compile_TypedGtEq = _compile_compare
+    _compile_TypedLt = _compile_TypedLtEq = _compile_compare
+
+
+def _is_literal(node: Any) -> bool:
+    return not isinstance(node, ast.Node) or isinstance(node, (ast.String, ast.Integer, ast.Float, ast.Boolean, ast.Constant))
+
+
+def _literal_value(node: Any) -> Any:
+    return node.eval() if isinstance(node, ast.Node) else node
+
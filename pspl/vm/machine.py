@@ -0,0 +1,192 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, List, Optional
+from pspl.vm import opcodes as op
+from pspl.context import ExecutionContext
+from pspl.parser.errors import IdentifierNotDefined, IdentifierAlreadyDefined, InvalidStep
+from pspl import utils
+
+if TYPE_CHECKING:
+    from pspl.vm.compiler import Code
+
+__all__ = (
+    'VirtualMachine',
+)
+
+MISSING = utils.MISSING
+
+
+class VirtualMachine:
+    """The stack based virtual machine executing compiled PSPL code.
+
+    Parameters
+    ----------
+    code: :class:`Code`
+        The code to execute.
+    context: Optional[:class:`pspl.context.ExecutionContext`]
+        The context to execute the code in. It must be created with
+        :attr:`Code.names` of the code. Defaults to a new context
+        writing to standard output.
+    """
+    def __init__(self, code: Code, context: Optional[ExecutionContext] = None) -> None:
+        self.code = code
+        self.context = ExecutionContext(code.names) if context is None else context  # type: ignore
+
+    def run(self) -> None:
+        """Executes the code."""
+        code = self.code
+        instructions = code.instructions
+        context = self.context
+        slots = context.slots
+        constants = context.constant_slots
+        stack: List[Any] = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        write = context.output.write
+        read_input = context.read_input
+        refill = context.refill
+        budget = context.step_budget
+
+        # Operation codes are bound to locals for faster dispatch.
+        ADD_CONST = op.ADD_CONST
+        BINARY_ADD = op.BINARY_ADD
+        BINARY_OP = op.BINARY_OP
+        BINARY_OP_CONST = op.BINARY_OP_CONST
+        CHECK_LIMITS = op.CHECK_LIMITS
+        COMPARE = op.COMPARE
+        DELETE_SLOT = op.DELETE_SLOT
+        FOR_NEXT = op.FOR_NEXT
+        FOR_START = op.FOR_START
+        HALT = op.HALT
+        INPUT = op.INPUT
+        JUMP = op.JUMP
+        JUMP_IF_FALSE = op.JUMP_IF_FALSE
+        JUMP_IF_TRUE = op.JUMP_IF_TRUE
+        LOAD_CONST = op.LOAD_CONST
+        LOAD_SLOT = op.LOAD_SLOT
+        PRINT = op.PRINT
+        STORE_CHECKED = op.STORE_CHECKED
+        STORE_CONSTANT = op.STORE_CONSTANT
+        STORE_SLOT = op.STORE_SLOT
+
+        while True:
+            opcode, arg = instructions[pc]
+            pc += 1
+
+            if opcode == LOAD_SLOT:
+                val = slots[arg]
+                if val is MISSING:
+                    raise IdentifierNotDefined(code.positions.get(pc - 1), code.names[arg])  # type: ignore
+                push(val)
+            elif opcode == LOAD_CONST:
+                push(arg)
+            elif opcode == STORE_SLOT:
+                slots[arg] = pop()
+            elif opcode == BINARY_OP_CONST:
+                func, rhs = arg
+                stack[-1] = func(stack[-1], rhs)
+            elif opcode == ADD_CONST:
+                lhs = stack[-1]
+                if isinstance(lhs, str) or isinstance(arg, str):
+                    stack[-1] = str(lhs) + str(arg)
+                else:
+                    stack[-1] = lhs + arg
+            elif opcode == FOR_NEXT:
+                counter, end_slot, step_slot, ident, target = arg
+                step = slots[step_slot]
+                val = slots[counter] + step
+                if (val <= slots[end_slot]) if step > 0 else (val >= slots[end_slot]):
+                    slots[counter] = val
+                    slots[ident] = val
+                    pc = target
+            elif opcode == JUMP_IF_TRUE:
+                if pop():
+                    pc = arg
+            elif opcode == CHECK_LIMITS:
+                # Only present in code compiled with execution limits. The
+                # steps are counted down locally until the limits need to
+                # be checked again.
+                budget -= arg[0]
+                if budget < 0:
+                    budget = refill(budget, arg[1])
+            elif opcode == BINARY_ADD:
+                rhs = pop()
+                lhs = stack[-1]
+                if isinstance(lhs, str) or isinstance(rhs, str):
+                    stack[-1] = str(lhs) + str(rhs)
+                else:
+                    stack[-1] = lhs + rhs
+            elif opcode == BINARY_OP or opcode == COMPARE:
+                rhs = pop()
+                stack[-1] = arg(stack[-1], rhs)
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif opcode == JUMP:
+                pc = arg
+            elif opcode == STORE_CHECKED:
+                if constants[arg]:
+                    raise IdentifierAlreadyDefined(code.positions.get(pc - 1), code.names[arg])  # type: ignore
+                slots[arg] = pop()
+            elif opcode == PRINT:
+                write(utils.output_value(pop()))
+            elif opcode == FOR_START:
+                counter, end_slot, step_slot, ident, target = arg
+                step = pop()
+                stop = pop()
+                start = pop()
+                if step == 0:
+                    raise InvalidStep(code.positions.get(pc - 1), step)
+
+                slots[counter] = start
+                slots[end_slot] = stop
+                slots[step_slot] = step
+                if (start <= stop) if step > 0 else (start >= stop):
+                    slots[ident] = start
+                else:
+                    pc = target
+            elif opcode == INPUT:
+                prompt, cast = arg
+                while True:
+                    ipt = read_input(prompt, code.positions.get(pc - 1))
+                    try:
+                        val = cast(ipt)
+                    except Exception:
+                        continue
+                    else:
+                        break
+                push(val)
+            elif opcode == STORE_CONSTANT:
+                if constants[arg]:
+                    raise IdentifierAlreadyDefined(code.positions.get(pc - 1), code.names[arg])  # type: ignore
+                constants[arg] = True
+                slots[arg] = pop()
+            elif opcode == DELETE_SLOT:
+                slots[arg] = MISSING
+            elif opcode == HALT:
+                break
+            else:
+                raise RuntimeError('Unknown opcode %r' % opcode)
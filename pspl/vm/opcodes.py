@@ -0,0 +1,115 @@
+# MIT License
+
+# Copyright (c) 2022 I. Ahmad
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Operation codes for the PSPL virtual machine.
+
+Every instruction is a tuple of an operation code and a single argument.
+The meaning of the argument depends on the operation code.
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+__all__ = ()
+
+LOAD_CONST = 0
+"""Push the argument onto the stack."""
+
+LOAD_SLOT = 1
+"""Push the value of the slot at index given by argument."""
+
+STORE_SLOT = 2
+"""Pop a value and store it in the slot at index given by argument."""
+
+STORE_CHECKED = 3
+"""Same as :data:`STORE_SLOT` but fails if the slot holds a constant."""
+
+STORE_CONSTANT = 4
+"""Pop a value and define the slot at index given by argument as constant."""
+
+DELETE_SLOT = 5
+"""Unset the slot at index given by argument."""
+
+BINARY_ADD = 6
+"""Pop two values and push their sum (or concatenation if any is a string)."""
+
+BINARY_OP = 7
+"""Pop two values and push the result of the argument function called with them."""
+
+COMPARE = 8
+"""Same as :data:`BINARY_OP` but used for boolean expressions."""
+
+ADD_CONST = 16
+"""Same as :data:`BINARY_ADD` but the right operand is the argument."""
+
+BINARY_OP_CONST = 17
+"""Same as :data:`BINARY_OP` but the argument is a ``(function, right operand)`` tuple."""
+
+JUMP = 9
+"""Jump to the instruction at index given by argument."""
+
+JUMP_IF_FALSE = 10
+"""Pop a value and jump to index given by argument if it is falsy."""
+
+JUMP_IF_TRUE = 11
+"""Pop a value and jump to index given by argument if it is truthy."""
+
+FOR_START = 12
+"""Start a FOR loop.
+
+The argument is a tuple of ``(counter, end, step, ident, target)`` where
+first four are slot indices. Pops the step, end and start values, stores
+them in respective slots and jumps to ``target`` if the range is empty,
+otherwise binds the start value to ``ident``.
+"""
+
+FOR_NEXT = 13
+"""Advance a FOR loop.
+
+The argument is same as :data:`FOR_START`. Increments the counter and
+if it is in range, binds it to ``ident`` and jumps to ``target`` (the
+start of loop body).
+"""
+
+PRINT = 14
+"""Pop a value and write it to the output."""
+
+INPUT = 15
+"""Read and push a value from input. The argument is a ``(prompt, cast)`` tuple."""
+
+HALT = 18
+"""Stop the execution. This is always the last instruction."""
+
+CHECK_LIMITS = 19
+"""Count steps and enforce the execution limits.
+
+The argument is a ``(steps, source_pos)`` tuple. This instruction starts
+the loop bodies of code compiled with execution limits enabled.
+"""
+
+OPNAMES: Dict[int, str] = {
+    value: name
+    for name, value in list(globals().items())
+    if name.isupper() and isinstance(value, int)
+}
+"""Mapping of operation codes to their names."""
@@ -0,0 +1,50 @@
+"""Helpers shared by the tests."""
+
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+import os
+import pspl
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+
+PROGRAMS = sorted(name[:-len('.pspl')] for name in os.listdir(PROGRAMS_DIR) if name.endswith('.pspl'))
+"""The names of sample programs in the programs directory."""
+
+ENGINES = ('tree', 'vm', 'python')
+
+
+def program_path(name: str) -> str:
+    return os.path.join(PROGRAMS_DIR, name + '.pspl')
+
+
+def read_program(name: str) -> Tuple[str, List[str]]:
+    """Returns the source and inputs of a sample program."""
+    with open(program_path(name)) as f:
+        source = f.read()
+    try:
+        with open(os.path.join(PROGRAMS_DIR, name + '.in')) as f:
+            inputs = f.read().splitlines()
+    except FileNotFoundError:
+        inputs = []
+    return source, inputs
+
+
+def describe(err: BaseException) -> Tuple[Any, ...]:
+    """Returns the type, message and position of an error."""
+    pos = getattr(err, 'source_pos', None)
+    if pos is None and hasattr(err, 'getsourcepos'):
+        pos = err.getsourcepos()
+    return (type(err).__name__, str(err), None if pos is None else (pos.lineno, pos.colno))
+
+
+def run(source: str, engine: str = 'tree', *, inputs: Optional[List[str]] = None, **options: Any) -> Tuple[List[str], Any]:
+    """Compiles and runs a program, returning its output lines and error."""
+    output: List[str] = []
+    try:
+        program = pspl.compile(source, engine=engine, parser=options.pop('parser', 'lr'))
+        program.run(inputs=[] if inputs is None else inputs, output=output, **options)
+    except Exception as err:
+        return output, describe(err)
+    return output, None
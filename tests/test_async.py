@@ -0,0 +1,210 @@
+"""Tests for resumable and asynchronous execution of programs."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from pspl.output import OutputStream
+from pspl.transpiler import CHECKPOINT, INPUT
+
+import asyncio
+import pspl
+import pytest
+
+ENGINES = ['tree', 'vm', 'python']
+
+COUNT = '''
+FOR i <- 1 TO 4
+    OUTPUT "%s" + i
+ENDFOR
+'''
+
+SUM = '''
+total <- 0
+c <- 0
+FOR i <- 1 TO 5000
+    total <- total + i
+    c <- c + 1
+    IF (c = 1000) THEN
+        OUTPUT "%s" + i
+        c <- 0
+    ENDIF
+ENDFOR
+OUTPUT "%s=" + total
+'''
+
+GREET = '''
+INPUT "Name? ", name
+DECLARE n : INTEGER
+INPUT "Count? ", n
+FOR i <- 1 TO n
+    OUTPUT "Hi " + name
+ENDFOR
+'''
+
+
+def start(source: str, engine: str, output: List[str], budget: Optional[int] = None) -> Tuple[Any, pspl.ExecutionContext]:
+    program = pspl.compile(source, engine=engine)
+    ctx = program.create_context(output=OutputStream(output))
+    if budget is not None:
+        ctx.start_slice(budget)
+    return program.start(ctx), ctx
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_resumable_interleaving(engine: str) -> None:
+    # Both programs get a budget of one step whenever they are resumed,
+    # so they are switched after every iteration of their loops.
+    output: List[str] = []
+    executions = dict(a=start(COUNT % 'a', engine, output, 0), b=start(COUNT % 'b', engine, output, 0))
+    values: Dict[str, Optional[int]] = dict.fromkeys(executions)
+    remaining: Dict[str, int] = {}
+    while executions:
+        for name, (execution, ctx) in list(executions.items()):
+            try:
+                event = execution.send(values[name])
+            except StopIteration as stop:
+                remaining[name] = stop.value
+                del executions[name]
+                continue
+            assert event[0] == CHECKPOINT
+            values[name] = 0
+    assert output == ['a1', 'b1', 'a2', 'b2', 'a3', 'b3', 'a4', 'b4']
+    assert remaining == {'a': 0, 'b': 0}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_resumable_refill(engine: str) -> None:
+    output: List[str] = []
+    execution, ctx = start(SUM % ('', 'total'), engine, output)
+    checkpoints = 0
+    value = None
+    while True:
+        try:
+            event = execution.send(value)
+        except StopIteration as stop:
+            ctx.count_steps(stop.value)
+            break
+        assert event[0] == CHECKPOINT
+        checkpoints += 1
+        value = ctx.refill(event[1], event[2])
+    assert output == ['1000', '2000', '3000', '4000', '5000', 'total=12502500']
+    assert ctx.steps == 15000
+    assert checkpoints == 15000 // pspl.context.LIMIT_CHECK_INTERVAL
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_resumable_input(engine: str) -> None:
+    output: List[str] = []
+    execution, ctx = start(GREET, engine, output)
+    event = execution.send(None)
+    assert event[:2] == (INPUT, 'Name? ')
+    assert (event[2].lineno, event[2].colno) == (2, 1)
+    event = execution.send('Ada')
+    assert event[:2] == (INPUT, 'Count? ')
+    assert (event[2].lineno, event[2].colno) == (4, 1)
+    with pytest.raises(StopIteration):
+        execution.send('2')
+    assert output == ['Hi Ada', 'Hi Ada']
+
+
+def test_resumable_transpiler() -> None:
+    program = pspl.compile(COUNT % 'x', engine='python')
+    tree = program.tree
+    assert tree is not None
+    code = pspl.transpiler.Transpiler(resumable=True).transpile(tree)
+    output: List[str] = []
+    ctx = program.create_context(output=OutputStream(output))
+    execution = pspl.transpiler.execute_resumable(code, ctx)
+    assert output == []
+    with pytest.raises(StopIteration):
+        execution.send(None)
+    assert output == ['x1', 'x2', 'x3', 'x4']
+
+
+class Reader:
+    def __init__(self, *lines: str) -> None:
+        self.lines = [line.encode() + b'\n' for line in lines]
+
+    async def readline(self) -> bytes:
+        await asyncio.sleep(0)
+        return self.lines.pop(0) if self.lines else b''
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_async_interleaving(engine: str) -> None:
+    events: List[Tuple[str, str]] = []
+
+    def writer(name: str) -> Any:
+        async def write(text: str) -> None:
+            events.extend((name, line) for line in text.splitlines())
+        return write
+
+    async def main() -> List[pspl.RunStats]:
+        runners = [pspl.PSPLRunner(SUM % (name, name), engine=engine) for name in 'ab']
+        return await asyncio.gather(*(
+            runner.run_async(Reader(), writer(name)) for runner, name in zip(runners, 'ab')
+        ))
+
+    stats = asyncio.run(main())
+    assert all(s.error is None for s in stats)
+    for name in 'ab':
+        lines = [line for n, line in events if n == name]
+        assert lines == [name + str(i) for i in range(1000, 6000, 1000)] + [name + '=12502500']
+    # Neither program ran to completion before the other one started.
+    names = [name for name, _ in events]
+    assert names.index('b') < len(names) - 1 - names[::-1].index('a')
+    assert names.index('a') < len(names) - 1 - names[::-1].index('b')
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_async_input(engine: str) -> None:
+    chunks: List[str] = []
+
+    async def write(text: str) -> None:
+        chunks.append(text)
+
+    runner = pspl.PSPLRunner(GREET, engine=engine)
+    asyncio.run(runner.run_async(Reader('Ada', '2'), write))
+    assert ''.join(chunks) == 'Name? Count? Hi Ada\nHi Ada\n'
+
+    chunks.clear()
+    with pytest.raises(EOFError):
+        asyncio.run(runner.run_async(Reader('Ada'), write))
+    assert ''.join(chunks) == 'Name? Count? '
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_async_errors(engine: str) -> None:
+    chunks: List[str] = []
+
+    async def write(text: str) -> None:
+        chunks.append(text)
+
+    runner = pspl.PSPLRunner('OUTPUT 1\nOUTPUT x', engine=engine)
+    asyncio.run(runner.run_async(Reader(), write))
+    assert ''.join(chunks).startswith('1\nAt line 2, column 8')
+
+    chunks.clear()
+    runner = pspl.PSPLRunner('WHILE TRUE DO\n    OUTPUT 1\nENDWHILE', engine=engine)
+    asyncio.run(runner.run_async(Reader(), write, max_steps=3))
+    assert ''.join(chunks).startswith('1\n1\n1\nAt line 1, column 1')
+    assert 'ExecutionLimitExceeded' in ''.join(chunks)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_run_async_input_timeout(engine: str) -> None:
+    chunks: List[str] = []
+
+    async def write(text: str) -> None:
+        chunks.append(text)
+
+    async def read() -> str:
+        await asyncio.sleep(0.1)
+        return 'Ada'
+
+    runner = pspl.PSPLRunner(GREET, engine=engine)
+    asyncio.run(runner.run_async(read, write, timeout=0.05))
+    text = ''.join(chunks)
+    assert text.startswith('Name? At line 2, column 1')
+    assert 'ExecutionLimitExceeded' in text
@@ -0,0 +1,146 @@
+"""Tests for executing programs in batch mode."""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+from click.testing import CliRunner
+from pspl.__main__ import main
+from pspl.batch import error_details, expand_paths, run_batch
+from pspl.parser.errors import ExecutionLimitExceeded, IdentifierNotDefined
+
+import json
+import os
+import pathlib
+import pytest
+import rply
+
+PROGRAMS = {
+    'greet.pspl': 'INPUT name\nOUTPUT "Hello " + name',
+    'sum.pspl': 'DECLARE a : INTEGER\nDECLARE b : INTEGER\nINPUT a\nINPUT b\nOUTPUT a + b',
+    'no_input.pspl': 'INPUT name\nOUTPUT name',
+    'undefined.pspl': 'OUTPUT 1\n  OUTPUT x',
+    'syntax.pspl': 'OUTPUT 1 $ 2',
+    'parse.pspl': 'OUTPUT 1\nENDIF',
+    'loop.pspl': 'WHILE TRUE DO\nOUTPUT 1\nENDWHILE',
+    'nested/deep.pspl': 'OUTPUT "deep"',
+}
+
+INPUTS = {
+    'greet.in': 'World\n',
+    'sum.in': '2\n40\n',
+}
+
+
+@pytest.fixture
+def programs(tmp_path: pathlib.Path) -> pathlib.Path:
+    for name, source in {**PROGRAMS, **INPUTS}.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(source)
+    (tmp_path / 'notes.txt').write_text('OUTPUT 1')
+    return tmp_path
+
+
+def names(paths: List[str], root: pathlib.Path) -> List[str]:
+    return [os.path.relpath(path, root).replace(os.sep, '/') for path in paths]
+
+
+def test_expand_directory(programs: pathlib.Path) -> None:
+    assert names(expand_paths([str(programs)]), programs) == sorted(PROGRAMS)
+
+
+def test_expand_glob(programs: pathlib.Path) -> None:
+    pattern = str(programs / 's*.pspl')
+    assert names(expand_paths([pattern]), programs) == ['sum.pspl', 'syntax.pspl']
+
+
+def test_expand_files(programs: pathlib.Path) -> None:
+    paths = [str(programs / 'sum.pspl'), str(programs / 'missing.pspl'), str(programs / 'nested')]
+    assert names(expand_paths(paths), programs) == ['sum.pspl', 'missing.pspl', 'nested/deep.pspl']
+
+
+def test_error_details() -> None:
+    pos = rply.token.SourcePosition(10, 2, 3)
+    assert error_details(IdentifierNotDefined(pos, 'x')) == (
+        'IdentifierNotDefined', "Identifier 'x' is not defined.", 2, 3,
+    )
+    assert error_details(ExecutionLimitExceeded(None, 'timeout', 'Too slow')) == (
+        'ExecutionLimitExceeded', 'Too slow', None, None,
+    )
+    assert error_details(rply.LexingError(None, pos)) == ('SyntaxError', 'Invalid syntax', 2, 3)
+    assert error_details(ZeroDivisionError('division by zero')) == (
+        'ZeroDivisionError', 'division by zero', None, None,
+    )
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_run_batch(programs: pathlib.Path, jobs: int, engine: str) -> None:
+    filenames = expand_paths([str(programs)]) + [str(programs / 'missing.pspl')]
+    results = list(run_batch(filenames, jobs=jobs, engine=engine, max_steps=1000))
+    assert [result.filename for result in results] == filenames
+
+    summary = {
+        name: (result.status, result.error_type, result.line, result.column, result.output)
+        for name, result in zip(names(filenames, programs), results)
+    }
+    assert summary == {
+        'greet.pspl': ('ok', None, None, None, ['Hello World']),
+        'loop.pspl': ('error', 'ExecutionLimitExceeded', 1, 1, ['1'] * 1000),
+        'nested/deep.pspl': ('ok', None, None, None, ['deep']),
+        'no_input.pspl': ('error', 'EOFError', None, None, []),
+        'parse.pspl': ('error', 'PSPLParserError', 2, 1, []),
+        'sum.pspl': ('ok', None, None, None, ['42']),
+        'syntax.pspl': ('error', 'SyntaxError', 1, 10, []),
+        'undefined.pspl': ('error', 'IdentifierNotDefined', 2, 10, ['1']),
+        'missing.pspl': ('error', 'FileNotFoundError', None, None, []),
+    }
+    assert all(result.time >= 0 for result in results)
+    assert results[0].to_dict()['filename'] == filenames[0]
+
+
+def test_run_batch_without_inputs(programs: pathlib.Path) -> None:
+    results = list(run_batch([str(programs / 'greet.pspl')], jobs=1, stdin_suffix=None))
+    assert results[0].error_type == 'EOFError'
+
+
+def test_expand_unmatched_glob(programs: pathlib.Path) -> None:
+    pattern = str(programs / 'x*.pspl')
+    assert expand_paths([pattern]) == [pattern]
+
+
+def run_cli(*args: str) -> Any:
+    return CliRunner().invoke(main, ['run', *args])
+
+
+def test_cli_glob(programs: pathlib.Path) -> None:
+    result = run_cli(str(programs / 's*.pspl'))
+    assert result.exit_code == 1
+    lines = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(names([line['filename']], programs)[0], line['status']) for line in lines] == [
+        ('sum.pspl', 'ok'),
+        ('syntax.pspl', 'error'),
+    ]
+
+
+def test_cli_directory(programs: pathlib.Path) -> None:
+    result = run_cli(str(programs / 'nested'))
+    assert result.exit_code == 0
+    assert json.loads(result.stdout)['output'] == ['deep']
+
+
+@pytest.mark.parametrize('option', [['--stats'], ['--counters'], ['--profile'], ['--result-cache', 'results'], ['--cache-stats']])
+@pytest.mark.parametrize('mode', ['glob', 'files', 'jobs'])
+def test_cli_batch_rejects_options(programs: pathlib.Path, option: List[str], mode: str) -> None:
+    if mode == 'glob':
+        args = [str(programs / '*.pspl')]
+    elif mode == 'files':
+        args = [str(programs / 'sum.pspl'), str(programs / 'greet.pspl')]
+    else:
+        args = ['--jobs', '1', str(programs / 'sum.pspl')]
+
+    result = run_cli(*option, *args)
+    assert result.exit_code == 2
+    assert '%s cannot be used in batch mode' % option[0] in result.stderr
+    assert result.stdout == ''
@@ -0,0 +1,44 @@
+"""Tests for boolean values and conditions."""
+
+from __future__ import annotations
+
+from typing import List
+
+from helpers import ENGINES, run
+from pspl import ast
+
+import pytest
+
+
+@pytest.mark.parametrize('node, expected', [
+    (ast.Lt(ast.Constant(1), ast.Constant(2)), True),
+    (ast.Gt(ast.Constant(1), ast.Constant(2)), False),
+    (ast.Eq(ast.Constant('a'), ast.Constant('a')), True),
+    (ast.NEq(ast.Constant('a'), ast.Constant('a')), False),
+    (ast.GtEq(ast.Constant(2.5), ast.Constant(2)), True),
+    (ast.LtEq(ast.Constant(3), ast.Constant(2)), False),
+])
+def test_comparison_is_native_bool(node: ast.Node, expected: bool) -> None:
+    assert node.eval() is expected
+
+
+CONDITIONS = {
+    'if_identifier': ('f <- FALSE\nIF f THEN\n    OUTPUT "taken"\nELSE\n    OUTPUT "not"\nENDIF', ['not']),
+    'output_comparison': ('a <- (1 < 2)\nb <- (2 < 1)\nOUTPUT a\nOUTPUT b\nOUTPUT (a = TRUE)', ['TRUE', 'FALSE', 'TRUE']),
+    'input': ('DECLARE b : BOOLEAN\nINPUT b\nIF b THEN\n    OUTPUT 1\nENDIF\nOUTPUT b', ['1', 'TRUE']),
+    'while_identifier': (
+        'go <- TRUE\nn <- 0\nWHILE go DO\n    n <- n + 1\n    go <- (n < 3)\nENDWHILE\nOUTPUT n',
+        ['3'],
+    ),
+    'repeat_identifier': (
+        'n <- 0\nREPEAT\n    n <- n + 1\n    more <- (n < 2)\nUNTIL more\nOUTPUT n',
+        ['2'],
+    ),
+    'arithmetic': ('OUTPUT TRUE + 1\nOUTPUT FALSE * 3', ['2', '0']),
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source, expected', CONDITIONS.values(), ids=CONDITIONS.keys())
+def test_boolean_program(engine: str, source: str, expected: List[str]) -> None:
+    assert run(source, engine, inputs=['true']) == (expected, None)
@@ -0,0 +1,195 @@
+"""Tests for the on-disk cache of compiled programs."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, List
+
+from helpers import ENGINES, PROGRAMS, describe, read_program, run
+from pspl import cache
+
+import marshal
+import pathlib
+import pspl
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_info() -> None:
+    cache.reset_cache_info()
+
+
+def info() -> tuple:
+    return tuple(cache.cache_info())
+
+
+def write(tmp_path: pathlib.Path, source: str, name: str = 'program.pspl') -> str:
+    path = tmp_path / name
+    path.write_text(source)
+    return str(path)
+
+
+def compile_cached(path: str, engine: str) -> pspl.Program:
+    return pspl.compile(path, file=True, engine=engine, cache=True)
+
+
+def rewrite(path: str, engine: str, func: Callable[[List[Any], Any], Any]) -> None:
+    """Replaces the payload of a cache file, keeping its header."""
+    cache_path = cache.get_cache_path(path, engine)
+    with open(cache_path, 'rb') as f:
+        magic = f.read(6)
+        header = marshal.load(f)
+        names, tree = marshal.load(f)
+    payload = func(list(names), tree)
+    with open(cache_path, 'wb') as f:
+        f.write(magic)
+        marshal.dump(header, f)
+        marshal.dump(payload, f)
+
+
+def find(tree: Any, name: str) -> List[dict]:
+    """Returns the attributes of encoded nodes of given class."""
+    found = []
+    stack = [tree]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, tuple) and value[0] == 'node':
+            if value[1] == name:
+                found.append(value[2])
+            stack.extend(value[2].values())
+    return found
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_round_trip(tmp_path: pathlib.Path, engine: str, name: str) -> None:
+    source, inputs = read_program(name)
+    path = write(tmp_path, source)
+    expected = run(source, engine, inputs=inputs)
+
+    compile_cached(path, engine)
+    assert info() == (0, 1, 1)
+    program = compile_cached(path, engine)
+    assert info() == (1, 1, 1)
+    assert program.engine == engine
+    assert program.filename == path
+
+    output: List[str] = []
+    try:
+        program.run(inputs=inputs, output=output)
+    except Exception as err:
+        assert (output, describe(err)) == expected
+    else:
+        assert (output, None) == expected
+
+
+def test_not_used_by_default(tmp_path: pathlib.Path) -> None:
+    path = write(tmp_path, 'OUTPUT 1')
+    pspl.compile(path, file=True)
+    assert not (tmp_path / cache.CACHE_DIR).exists()
+    assert info() == (0, 0, 0)
+
+
+def test_header_mismatch(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = write(tmp_path, 'OUTPUT 1')
+    compile_cached(path, 'vm')
+    assert info() == (0, 1, 1)
+
+    # Another source.
+    write(tmp_path, 'OUTPUT 2')
+    output: List[str] = []
+    compile_cached(path, 'vm').run(output=output)
+    assert output == ['2']
+    assert info() == (0, 2, 2)
+
+    # Another version of PSPL.
+    monkeypatch.setattr(pspl, '__version__', pspl.__version__ + '.dev')
+    compile_cached(path, 'vm')
+    assert info() == (0, 3, 3)
+    monkeypatch.undo()
+    assert cache.load(path, 'OUTPUT 2', 'vm') is None
+    compile_cached(path, 'vm')
+    assert cache.load(path, 'OUTPUT 2', 'vm') is not None
+
+    # Another engine, by copying the cache file of vm engine.
+    vm_path = pathlib.Path(cache.get_cache_path(path, 'vm'))
+    pathlib.Path(cache.get_cache_path(path, 'tree')).write_bytes(vm_path.read_bytes())
+    assert cache.load(path, 'OUTPUT 2', 'tree') is None
+
+
+@pytest.mark.parametrize('data', [b'', b'PSPLC', b'not a cache file', b'PSPLC\x00\x00\x01'])
+def test_unreadable(tmp_path: pathlib.Path, data: bytes) -> None:
+    path = write(tmp_path, 'OUTPUT 1')
+    cache_path = pathlib.Path(cache.get_cache_path(path, 'tree'))
+    cache_path.parent.mkdir()
+    cache_path.write_bytes(data)
+    assert cache.load(path, 'OUTPUT 1', 'tree') is None
+    output: List[str] = []
+    compile_cached(path, 'tree').run(output=output)
+    assert output == ['1']
+    assert info() == (0, 2, 1)
+
+
+def test_truncated(tmp_path: pathlib.Path) -> None:
+    path = write(tmp_path, 'FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR')
+    compile_cached(path, 'python')
+    cache_path = pathlib.Path(cache.get_cache_path(path, 'python'))
+    cache_path.write_bytes(cache_path.read_bytes()[:-10])
+    assert cache.load(path, 'FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR', 'python') is None
+
+
+INJECTED = 'x) if print("INJECTED") else (v_x'
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('tamper', ['ident', 'name', 'names', 'class', 'attribute', 'type', 'operand', 'position'])
+def test_tampered(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str], engine: str, tamper: str) -> None:
+    source = 'x <- 1\nFOR i <- 1 TO 2\n    OUTPUT x + i\nENDFOR'
+    path = write(tmp_path, source)
+    compile_cached(path, engine)
+
+    def modify(names: List[Any], tree: Any) -> Any:
+        if tamper == 'ident':
+            find(tree, 'For')[0]['ident'] = INJECTED
+        elif tamper == 'name':
+            for attrs in find(tree, 'Ident'):
+                attrs['name'] = INJECTED
+        elif tamper == 'names':
+            names[0] = INJECTED
+        elif tamper == 'class':
+            tree[2]['statements'][0] = ('node', 'Node', {})
+        elif tamper == 'attribute':
+            find(tree, 'Output')[0]['__class__'] = 'Block'
+        elif tamper == 'type':
+            find(tree, 'For')[0]['slot'] = '0'
+        elif tamper == 'operand':
+            find(tree, 'Output')[0]['value'] = [1]
+        else:
+            find(tree, 'Output')[0]['source_pos'] = ('pos', 'a', 'b', 'c')
+        return names, tree
+
+    rewrite(path, engine, modify)
+    assert cache.load(path, source, engine) is None
+
+    output: List[str] = []
+    compile_cached(path, engine).run(output=output)
+    assert output == ['2', '3']
+    assert 'INJECTED' not in capsys.readouterr().out
+    assert info() == (0, 3, 2)
+
+
+def test_invalid_tree(tmp_path: pathlib.Path) -> None:
+    # A tree of valid nodes that can't be compiled is a miss too.
+    source = 'OUTPUT 1'
+    path = write(tmp_path, source)
+    engine = 'python'
+    compile_cached(path, engine)
+
+    def modify(names: List[Any], tree: Any) -> Any:
+        find(tree, 'Output')[0]['value'] = ('node', 'Block', {'statements': []})
+        return names, tree
+
+    rewrite(path, engine, modify)
+    assert cache.load(path, source, engine) is None
+    assert info() == (0, 2, 1)
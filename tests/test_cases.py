@@ -0,0 +1,148 @@
+"""Tests for running a program against test cases."""
+
+from __future__ import annotations
+
+from click.testing import CliRunner
+from pspl.__main__ import main
+from pspl import batch
+
+import json
+import pathlib
+import pspl
+import pytest
+
+SOURCE = '''DECLARE a : INTEGER
+DECLARE b : INTEGER
+INPUT a
+INPUT b
+OUTPUT a + b
+OUTPUT a / b
+'''
+
+CASES = {
+    'pass.in': '6\n3\n',
+    'pass.out': '9\n2.0\n',
+    'fail.in': '1\n1\n',
+    'fail.out': '2\n2.0\n',
+    'error.in': '1\n0\n',
+    'error.out': '1\n',
+    'eof.in': '1\n',
+    'eof.out': '',
+    'notes.txt': 'not a test case',
+    'extra.in': 'has no expected output',
+}
+
+
+@pytest.fixture
+def cases_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    directory = tmp_path / 'cases'
+    directory.mkdir()
+    for name, text in CASES.items():
+        (directory / name).write_text(text)
+    return directory
+
+
+@pytest.fixture
+def program_path(tmp_path: pathlib.Path) -> pathlib.Path:
+    path = tmp_path / 'divide.pspl'
+    path.write_text(SOURCE)
+    return path
+
+
+def test_load_cases(cases_dir: pathlib.Path) -> None:
+    cases = batch.load_cases(str(cases_dir))
+    assert cases == [
+        batch.TestCase('eof', ['1'], []),
+        batch.TestCase('error', ['1', '0'], ['1']),
+        batch.TestCase('fail', ['1', '1'], ['2', '2.0']),
+        batch.TestCase('pass', ['6', '3'], ['9', '2.0']),
+    ]
+
+
+def test_load_cases_suffixes(cases_dir: pathlib.Path) -> None:
+    (cases_dir / 'other.expected').write_text('3\n')
+    (cases_dir / 'other.stdin').write_text('1\n2\n')
+    (cases_dir / 'other.in').write_text('ignored\n')
+    cases = batch.load_cases(str(cases_dir), stdin_suffix='.stdin', expected_suffix='.expected')
+    assert cases == [batch.TestCase('other', ['1', '2'], ['3'])]
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_run_case(engine: str) -> None:
+    program = pspl.compile(SOURCE, engine=engine)
+
+    result = batch.run_case(program, batch.TestCase('pass', ['6', '3'], ['9', '2.0']))
+    assert (result.name, result.status, result.error_type, result.output) == ('pass', 'pass', None, ['9', '2.0'])
+
+    result = batch.run_case(program, batch.TestCase('fail', ['1', '1'], ['2', '2']))
+    assert (result.status, result.output, result.expected) == ('fail', ['2', '1.0'], ['2', '2'])
+
+    result = batch.run_case(program, batch.TestCase('error', ['1', '0'], ['1']))
+    assert (result.status, result.error_type, result.line, result.output) == ('error', 'ZeroDivisionError', None, ['1'])
+
+    result = batch.run_case(program, batch.TestCase('eof', ['1'], []))
+    assert (result.status, result.error_type) == ('error', 'EOFError')
+
+
+def test_run_case_limits() -> None:
+    program = pspl.compile('WHILE TRUE DO\n    OUTPUT 1\nENDWHILE')
+    result = batch.run_case(program, batch.TestCase('loop', [], []), max_steps=3)
+    assert (result.status, result.error_type, result.line, result.column) == ('error', 'ExecutionLimitExceeded', 1, 1)
+    assert result.output == ['1', '1', '1']
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_run_cases(cases_dir: pathlib.Path, jobs: int) -> None:
+    program = pspl.compile(SOURCE, engine='vm')
+    cases = batch.load_cases(str(cases_dir))
+    results = list(batch.run_cases(program, cases, jobs=jobs))
+    assert [(r.name, r.status, r.error_type) for r in results] == [
+        ('eof', 'error', 'EOFError'),
+        ('error', 'error', 'ZeroDivisionError'),
+        ('fail', 'fail', None),
+        ('pass', 'pass', None),
+    ]
+    assert json.loads(json.dumps(results[3].to_dict()))['output'] == ['9', '2.0']
+
+
+def test_cli(program_path: pathlib.Path, cases_dir: pathlib.Path) -> None:
+    result = CliRunner().invoke(main, ['test', str(program_path), str(cases_dir), '--jobs', '1'])
+    assert result.exit_code == 1
+    lines = result.stdout.splitlines()
+    assert [line.split()[:2] for line in lines if not line.startswith(' ')][:4] == [
+        ['ERROR', 'eof'], ['ERROR', 'error'], ['FAIL', 'fail'], ['PASS', 'pass'],
+    ]
+    assert '      ZeroDivisionError: division by zero' in lines
+    assert '      -2.0' in lines
+    assert '      +1.0' in lines
+    assert lines[-1] == '4 test cases: 1 passed, 1 failed, 2 errors'
+
+
+def test_cli_pass(program_path: pathlib.Path, cases_dir: pathlib.Path) -> None:
+    for name in ('eof', 'error', 'fail'):
+        (cases_dir / (name + '.out')).unlink()
+    result = CliRunner().invoke(main, ['test', str(program_path), str(cases_dir), '--engine', 'python'])
+    assert result.exit_code == 0
+    assert result.stdout.splitlines()[-1] == '1 test cases: 1 passed, 0 failed, 0 errors'
+
+
+def test_cli_json(program_path: pathlib.Path, cases_dir: pathlib.Path) -> None:
+    args = ['test', str(program_path), str(cases_dir), '--json', '--jobs', '2', '--max-steps', '10']
+    result = CliRunner().invoke(main, args)
+    assert result.exit_code == 1
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    assert [(r['name'], r['status']) for r in results] == [
+        ('eof', 'error'), ('error', 'error'), ('fail', 'fail'), ('pass', 'pass'),
+    ]
+
+
+def test_cli_program_errors(tmp_path: pathlib.Path, cases_dir: pathlib.Path) -> None:
+    path = tmp_path / 'invalid.pspl'
+    path.write_text('OUTPUT 1\nENDIF')
+    result = CliRunner().invoke(main, ['test', str(path), str(cases_dir)])
+    assert result.exit_code == 1
+    assert result.stdout == f'{path}:2:1: PSPLParserError: Unexpected token ENDIF (ST_ENDIF)\n'
+
+    result = CliRunner().invoke(main, ['test', str(tmp_path / 'missing.pspl'), str(cases_dir)])
+    assert result.exit_code == 2
+    assert 'file of that name does not exist' in result.output
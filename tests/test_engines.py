@@ -0,0 +1,76 @@
+"""Differential tests checking that all engines run programs identically."""
+
+from __future__ import annotations
+
+from typing import List
+
+from helpers import ENGINES, PROGRAMS, read_program, run
+
+import pytest
+import random
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_sample_program(name: str) -> None:
+    source, inputs = read_program(name)
+    expected = run(source, 'tree', inputs=inputs)
+    assert expected[0] or expected[1]
+    for engine in ENGINES[1:]:
+        assert run(source, engine, inputs=inputs) == expected, engine
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_sample_program_with_limits(name: str) -> None:
+    # Limits select the instrumented variants of each engine.
+    source, inputs = read_program(name)
+    expected = run(source, 'tree', inputs=inputs)
+    for engine in ENGINES:
+        assert run(source, engine, inputs=inputs, max_steps=100_000) == expected, engine
+
+
+ATOMS = ['a', 'b', '1', '2', '3', '"s"', '2.5', 'TRUE', 'k']
+OPERATORS = ['+', '-', '*', '/', '>', '<', '=', '<>']
+
+
+def _expr(rng: random.Random, depth: int = 0) -> str:
+    if depth > 2 or rng.random() < 0.4:
+        return rng.choice(ATOMS)
+    return '(%s %s %s)' % (_expr(rng, depth + 1), rng.choice(OPERATORS), _expr(rng, depth + 1))
+
+
+def _block(rng: random.Random, depth: int) -> str:
+    return '\n'.join(_statement(rng, depth + 1) for _ in range(rng.randint(1, 3)))
+
+
+def _statement(rng: random.Random, depth: int) -> str:
+    kind = rng.randrange(8 if depth < 3 else 4)
+    if kind == 0:
+        return 'OUTPUT ' + _expr(rng)
+    if kind == 1:
+        return '%s <- %s' % (rng.choice('ab'), _expr(rng))
+    if kind == 2:
+        return rng.choice(['INPUT a', 'INPUT "p", b', 'DECLARE a : INTEGER', 'CONSTANT k = 3', 'k <- 1'])
+    if kind == 3:
+        return 'OUTPUT ' + rng.choice('ab')
+    if kind == 4:
+        return 'IF %s THEN\n%s\nELSE\n%s\nENDIF' % (_expr(rng), _block(rng, depth), _block(rng, depth))
+    if kind == 5:
+        return 'FOR i <- %s TO %s STEP %s\n%s\nENDFOR' % (
+            rng.choice(['0', '1.5', '-2', '3']),
+            rng.choice(['4', '2.5', '-3', '10']),
+            rng.choice(['1', '0.5', '-1', '2', '0']),
+            _block(rng, depth),
+        )
+    if kind == 6:
+        return 'REPEAT\n%s\nb <- b + 1\nUNTIL (b < %d)' % (_block(rng, depth), rng.randint(0, 20))
+    return 'c <- 0\nWHILE (c < %d) DO\n%s\nc <- c + 1\nENDWHILE' % (rng.randint(0, 20), _block(rng, depth))
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_program(seed: int) -> None:
+    rng = random.Random(seed)
+    source = 'a <- 0\nb <- 0\n' + _block(rng, 0)
+    inputs: List[str] = [rng.choice(['1', 'x', '7', '2.5']) for _ in range(rng.randint(0, 6))]
+    expected = run(source, 'tree', inputs=inputs, max_steps=5000)
+    for engine in ENGINES[1:]:
+        assert run(source, engine, inputs=inputs, max_steps=5000) == expected, engine
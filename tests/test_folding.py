@@ -0,0 +1,86 @@
+"""Tests for the constant folding pass."""
+
+from __future__ import annotations
+
+from typing import Any, Tuple
+
+from helpers import ENGINES, run
+from pspl.state import RuntimeState
+from pspl import ast
+
+import pspl
+import pytest
+
+
+def compile_tree(source: str) -> Tuple[ast.Block, pspl.RunStats]:
+    stats = pspl.RunStats()
+    program = RuntimeState(source=source, engine='tree').compile(stats)
+    return program.tree, stats
+
+
+def output_value(tree: ast.Block) -> ast.Node:
+    return [stmt for stmt in tree.statements if isinstance(stmt, ast.Output)][-1].value
+
+
+def folded_value(source: str) -> Any:
+    tree, _ = compile_tree(source)
+    node = output_value(tree)
+    assert isinstance(node, (ast.Constant, ast.Boolean))
+    return node.eval()
+
+
+@pytest.mark.parametrize('source, value', [
+    ('OUTPUT 1 + 2 * 3', 7),
+    ('OUTPUT -4', -4),
+    ('OUTPUT +4', 4),
+    ('OUTPUT 7 / 2', 3.5),
+    ('OUTPUT 2.5 - 1', 1.5),
+    ('OUTPUT "a" + "b"', 'ab'),
+    ('OUTPUT "n" + 1', 'n1'),
+    ('OUTPUT (1 < 2)', True),
+    ('OUTPUT (1 = 2)', False),
+    ('OUTPUT ("a" <> "b")', True),
+    ('OUTPUT ((1 + 1) = 2)', True),
+    ('OUTPUT \'it\\\'s\'', "it's"),
+    ('CONSTANT k = 2\nOUTPUT k * 10', 20),
+    ('CONSTANT k = 2\nCONSTANT j = k + 1\nOUTPUT j', 3),
+])
+def test_folded_expression(source: str, value: Any) -> None:
+    result = folded_value(source)
+    assert result == value
+    assert type(result) is type(value)
+
+
+@pytest.mark.parametrize('source', [
+    'x <- 1\nOUTPUT x + 2',
+    'OUTPUT 1 / 0',
+    'OUTPUT k\nCONSTANT k = 1',
+    'IF TRUE THEN\n    CONSTANT k = 1\nENDIF\nOUTPUT k',
+    'DECLARE n : INTEGER\nINPUT n\nCONSTANT k = n\nOUTPUT k',
+])
+def test_unfolded_expression(source: str) -> None:
+    tree, _ = compile_tree(source)
+    assert not isinstance(output_value(tree), (ast.Constant, ast.Boolean))
+
+
+def test_literals_are_decoded() -> None:
+    tree, stats = compile_tree('x <- "a\\tb"\ny <- 12\nz <- 1.5')
+    values = [stmt.val for stmt in tree.statements]
+
+    assert all(type(node) is ast.Constant for node in values)
+    assert [node.value for node in values] == ['a\tb', 12, 1.5]
+    # Decoding a literal is not counted as folding.
+    assert stats.folded == 0
+
+
+def test_folded_count() -> None:
+    _, stats = compile_tree('CONSTANT k = 2\nx <- 1\nOUTPUT 1 + 2 * 3\nOUTPUT k\nOUTPUT x + k')
+    # 2 * 3, 1 + 6 and both uses of k.
+    assert stats.folded == 4
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_folding_preserves_errors(engine: str) -> None:
+    output, error = run('OUTPUT "start"\nOUTPUT 1 / 0', engine)
+    assert output == ['start']
+    assert error is not None
@@ -0,0 +1,122 @@
+"""Tests for the shared lexers and the combined regex tokenizer."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator
+
+from helpers import PROGRAMS, read_program
+from pspl import lexer
+
+import pspl
+import pytest
+import rply
+
+
+@pytest.fixture
+def builds(monkeypatch: pytest.MonkeyPatch) -> Iterator[Dict[str, int]]:
+    counts = {backend: 0 for backend in lexer.LEXER_BACKENDS}
+
+    def counting(backend: str, build: Any) -> Any:
+        def wrapper() -> Any:
+            counts[backend] += 1
+            return build()
+        return wrapper
+
+    for backend, build in list(lexer.LEXER_BACKENDS.items()):
+        monkeypatch.setitem(lexer.LEXER_BACKENDS, backend, counting(backend, build))
+
+    lexer.reset_lexer()
+    yield counts
+    lexer.reset_lexer()
+
+
+def test_lexer_is_shared(builds: Dict[str, int]) -> None:
+    first = lexer.get_lexer()
+    assert lexer.get_lexer() is first
+    assert lexer.get_lexer('combined') is first
+    assert isinstance(first, lexer.Tokenizer)
+    assert builds == {'combined': 1, 'rply': 0}
+
+
+def test_lexer_built_once_across_states(builds: Dict[str, int]) -> None:
+    for i in range(3):
+        program = pspl.compile('OUTPUT %d' % i, engine='tree')
+        program.run(output=[])
+
+    assert builds == {'combined': 1, 'rply': 0}
+
+
+@pytest.mark.parametrize('backend', tuple(lexer.LEXER_BACKENDS))
+def test_reset_lexer(builds: Dict[str, int], backend: str) -> None:
+    first = lexer.get_lexer(backend)
+    lexer.reset_lexer()
+    second = lexer.get_lexer(backend)
+
+    assert second is not first
+    assert lexer.get_lexer(backend) is second
+    assert builds[backend] == 2
+
+
+EDGE_SOURCES = {
+    'keyword_prefixes': 'OUTPUTX IFA TRUEx FALSE_ ENDIF1 DO_ TRUE FALSE',
+    'keyword_suffixes': 'xOUTPUT _IF aTRUE',
+    'keyword_after_digit': '1TRUE 2OUTPUT',
+    'floats': 'x <- .5 + 1. * 12.25 - 0.0 / 007',
+    'unicode_digits': 'x <- \u0663',
+    'strings': '"a\\"b" \'c\\\'d\' "it\'s" \'say "hi"\' "" \'\'',
+    'operators': 'a<>b<=c>=d<-e<f>g=h+-*/,:()',
+    'whitespace': 'IF x\tTHEN\n\n  OUTPUT "\\n"\r\n\t\tENDIF\n',
+    'empty': '',
+    'blank_lines': '\n\n  \n',
+}
+
+INVALID_SOURCES = {
+    'symbol': 'OUTPUT 1 $',
+    'next_line': 'x\n  @',
+    'unterminated_string': 'OUTPUT "abc',
+    'string_newline': 'OUTPUT "a\nb"',
+    'keyword_unicode_suffix': 'OUTPUT\u00e9',
+    'keyword_unicode_prefix': 'x <- \u00e9IF',
+}
+
+
+def tokens(backend: str, source: str) -> Any:
+    return [
+        (tok.name, tok.value, tok.source_pos.idx, tok.source_pos.lineno, tok.source_pos.colno)
+        for tok in lexer.get_lexer(backend).lex(source)
+    ]
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_tokenizer_matches_rply_on_programs(name: str) -> None:
+    source, _ = read_program(name)
+    assert tokens('combined', source) == tokens('rply', source)
+
+
+@pytest.mark.parametrize('source', EDGE_SOURCES.values(), ids=EDGE_SOURCES.keys())
+def test_tokenizer_matches_rply_on_edge_tokens(source: str) -> None:
+    assert tokens('combined', source) == tokens('rply', source)
+
+
+def test_tokenizer_keywords() -> None:
+    names = [tok[0] for tok in tokens('combined', EDGE_SOURCES['keyword_prefixes'])]
+    assert names == ['IDENT'] * 6 + ['LT_BOOLEAN_TRUE', 'LT_BOOLEAN_FALSE']
+
+    names = [tok[0] for tok in tokens('combined', EDGE_SOURCES['keyword_after_digit'])]
+    assert names == ['LT_INTEGER', 'LT_BOOLEAN_TRUE', 'LT_INTEGER', 'ST_OUTPUT']
+
+
+@pytest.mark.parametrize('source', INVALID_SOURCES.values(), ids=INVALID_SOURCES.keys())
+def test_tokenizer_errors_match_rply(source: str) -> None:
+    errors = []
+    for backend in ('combined', 'rply'):
+        lexed = []
+        with pytest.raises(rply.LexingError) as info:
+            for tok in lexer.get_lexer(backend).lex(source):
+                lexed.append((tok.name, tok.value, tok.source_pos.idx))
+        pos = info.value.getsourcepos()
+        errors.append((lexed, pos.idx, pos.lineno))
+
+    # rply reports the column of a lexing error relative to the wrong
+    # offset so only the index and the line are compared.
+    assert errors[0] == errors[1]
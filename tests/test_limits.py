@@ -0,0 +1,84 @@
+"""Tests checking that execution limits abort programs identically on all engines."""
+
+from __future__ import annotations
+
+from typing import Iterator, List
+
+from helpers import ENGINES, run
+from pspl.parser.errors import ExecutionLimitExceeded
+
+import pspl
+import pytest
+import time
+
+LOOPS = {
+    'while': 'n <- 0\nWHILE TRUE DO\n    n <- n + 1\n    OUTPUT n\nENDWHILE',
+    'repeat': 'n <- 0\nREPEAT\n    n <- n + 1\n    OUTPUT n\nUNTIL TRUE',
+    'for': 'FOR i <- 1 TO 1000000\n    OUTPUT i\nENDFOR',
+    'nested': 'FOR i <- 1 TO 1000\n    FOR j <- 1 TO 1000\n        OUTPUT i * j\n    ENDFOR\nENDFOR',
+    'if': 'n <- 0\nWHILE TRUE DO\n    IF ((n / 2) = 1) THEN\n        OUTPUT n\n    ENDIF\n    n <- n + 1\nENDWHILE',
+}
+
+# Every iteration takes as many steps as there are statements in the body.
+STEPS = 'FOR i <- 1 TO 3\n    OUTPUT i\n    OUTPUT -i\nENDFOR\nOUTPUT 0'
+
+
+@pytest.mark.parametrize('name', LOOPS)
+@pytest.mark.parametrize('max_steps', [0, 1, 2, 7, 100])
+def test_max_steps(name: str, max_steps: int) -> None:
+    expected = run(LOOPS[name], 'tree', max_steps=max_steps)
+    assert expected[1][0] == 'ExecutionLimitExceeded'
+    assert expected[1][2] is not None
+    for engine in ENGINES[1:]:
+        assert run(LOOPS[name], engine, max_steps=max_steps) == expected, engine
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_max_steps_boundary(engine: str) -> None:
+    assert run(STEPS, engine, max_steps=6) == (['1', '-1', '2', '-2', '3', '-3', '0'], None)
+    output, error = run(STEPS, engine, max_steps=5)
+    assert output == ['1', '-1', '2', '-2']
+    assert error == ('ExecutionLimitExceeded', 'Execution exceeded the limit of 5 steps', (1, 1))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('name', LOOPS)
+def test_timeout(engine: str, name: str) -> None:
+    output: List[str] = []
+    program = pspl.compile(LOOPS[name], engine=engine)
+    with pytest.raises(ExecutionLimitExceeded) as info:
+        program.run(inputs=[], output=output, timeout=0.05)
+    assert info.value.limit == 'timeout'
+    assert info.value.source_pos is not None
+    assert output
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_limits_not_reached(engine: str) -> None:
+    source = 'FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR'
+    assert run(source, engine, max_steps=1000, timeout=10) == (['1', '2', '3'], None)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_runner_max_steps(engine: str, capsys: pytest.CaptureFixture[str]) -> None:
+    expected = run(LOOPS['while'], 'tree', max_steps=10)
+    pspl.PSPLRunner(LOOPS['while'], engine=engine).run(inputs=[], max_steps=10)
+    out = capsys.readouterr().out
+    assert out.splitlines()[:len(expected[0])] == expected[0]
+    assert 'ExecutionLimitExceeded' in out
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_timeout_while_reading_input(engine: str) -> None:
+    def slow_inputs() -> Iterator[str]:
+        time.sleep(0.1)
+        yield 'Ada'
+
+    source = 'OUTPUT "start"\nINPUT name\nOUTPUT name'
+    output: List[str] = []
+    program = pspl.compile(source, engine=engine)
+    with pytest.raises(ExecutionLimitExceeded) as info:
+        program.run(inputs=slow_inputs(), output=output, timeout=0.05)
+    assert info.value.limit == 'timeout'
+    assert (info.value.source_pos.lineno, info.value.source_pos.colno) == (2, 1)
+    assert output == ['start']
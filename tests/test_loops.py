@@ -0,0 +1,52 @@
+"""Tests for the FOR loop steps on all the engines."""
+
+from __future__ import annotations
+
+from typing import List
+
+from helpers import ENGINES, run
+
+import pytest
+
+
+def for_loop(start: str, end: str, step: str = '') -> str:
+    if step:
+        step = ' STEP ' + step
+    return 'FOR i <- %s TO %s%s\n    OUTPUT i\nENDFOR\n' % (start, end, step)
+
+
+STEPS = {
+    'default': (for_loop('1', '3'), ['1', '2', '3']),
+    'empty': (for_loop('3', '1'), []),
+    'step_past_end': (for_loop('1', '10', '3'), ['1', '4', '7', '10']),
+    'step_short_of_end': (for_loop('1', '9', '3'), ['1', '4', '7']),
+    'negative': (for_loop('5', '1', '-2'), ['5', '3', '1']),
+    'negative_empty': (for_loop('1', '5', '-1'), []),
+    'float_step': (for_loop('1', '2', '0.5'), ['1', '1.5', '2.0']),
+    'float_start': (for_loop('0.5', '2'), ['0.5', '1.5']),
+    'float_end': (for_loop('1', '2.5'), ['1', '2']),
+    'negative_float': (for_loop('1', '0', '-0.25'), ['1', '0.75', '0.5', '0.25', '0.0']),
+    'variable_step': ('s <- -1\n' + for_loop('2', '0', 's'), ['2', '1', '0']),
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source, expected', STEPS.values(), ids=STEPS.keys())
+def test_for_step(engine: str, source: str, expected: List[str]) -> None:
+    assert run(source, engine) == (expected, None)
+
+
+ZERO_STEPS = {
+    'literal': (for_loop('1', '3', '0'), [], 1),
+    'float': (for_loop('1', '3', '0.0'), [], 1),
+    'variable': ('OUTPUT "start"\ns <- 0\n' + for_loop('1', '3', 's'), ['start'], 3),
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source, expected, lineno', ZERO_STEPS.values(), ids=ZERO_STEPS.keys())
+def test_zero_step(engine: str, source: str, expected: List[str], lineno: int) -> None:
+    output, error = run(source, engine)
+    assert output == expected
+    assert error == ('InvalidStep', 'FOR loop step must not be zero', (lineno, 1))
+
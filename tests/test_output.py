@@ -0,0 +1,148 @@
+"""Tests for the output stream and its buffering modes."""
+
+from __future__ import annotations
+
+from typing import List
+
+from pspl.output import OutputStream
+
+import io
+import pspl
+import pytest
+
+SOURCE = '''
+FOR i <- 1 TO 5
+    OUTPUT i
+ENDFOR
+'''
+
+
+def test_line_buffering() -> None:
+    chunks: List[str] = []
+    stream = OutputStream(chunks.append, buffering='line')
+    stream.write(1)
+    assert chunks == ['1\n']
+    stream.write('a')
+    assert chunks == ['1\n', 'a\n']
+    stream.flush()
+    assert chunks == ['1\n', 'a\n']
+
+
+def test_block_buffering() -> None:
+    chunks: List[str] = []
+    stream = OutputStream(chunks.append, buffering='block', buffer_size=7)
+    stream.write('ab')
+    stream.write('cd')
+    assert chunks == []
+    stream.write('e')
+    assert chunks == ['ab\ncd\ne\n']
+    stream.write('f')
+    assert chunks == ['ab\ncd\ne\n']
+    stream.flush()
+    assert chunks == ['ab\ncd\ne\n', 'f\n']
+
+
+def test_exit_buffering() -> None:
+    chunks: List[str] = []
+    stream = OutputStream(chunks.append, buffering='exit', buffer_size=1)
+    for i in range(100):
+        stream.write(i)
+    assert chunks == []
+    stream.flush()
+    assert chunks == ['\n'.join(map(str, range(100))) + '\n']
+
+
+@pytest.mark.parametrize('buffering', ['line', 'block', 'exit'])
+def test_list_sink(buffering: str) -> None:
+    lines: List[str] = []
+    stream = OutputStream(lines, buffering=buffering)
+    stream.write(1)
+    stream.write('a b')
+    stream.flush()
+    assert lines == ['1', 'a b']
+
+
+@pytest.mark.parametrize('buffering', ['line', 'block', 'exit'])
+def test_file_sink(buffering: str) -> None:
+    f = io.StringIO()
+    stream = OutputStream(f, buffering=buffering)
+    stream.write(1)
+    stream.write(2.5)
+    stream.flush()
+    assert f.getvalue() == '1\n2.5\n'
+
+
+def test_stdout_sink(capsys: pytest.CaptureFixture[str]) -> None:
+    stream = OutputStream(buffering='exit')
+    stream.write('hello')
+    assert capsys.readouterr().out == ''
+    stream.flush()
+    assert capsys.readouterr().out == 'hello\n'
+
+
+def test_invalid_arguments() -> None:
+    with pytest.raises(ValueError):
+        OutputStream([], buffering='full')
+    with pytest.raises(TypeError):
+        OutputStream(1)
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+@pytest.mark.parametrize('buffering', ['line', 'block', 'exit'])
+def test_run_flushes_at_exit(engine: str, buffering: str) -> None:
+    f = io.StringIO()
+    pspl.compile(SOURCE, engine=engine).run(output=f, buffering=buffering)
+    assert f.getvalue() == '1\n2\n3\n4\n5\n'
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_run_flushes_on_error(engine: str) -> None:
+    chunks: List[str] = []
+    program = pspl.compile('OUTPUT 1\nOUTPUT 2\nOUTPUT x', engine=engine)
+    with pytest.raises(pspl.parser.errors.IdentifierNotDefined):
+        program.run(output=chunks.append, buffering='exit')
+    assert chunks == ['1\n2\n']
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_run_with_stream(engine: str) -> None:
+    chunks: List[str] = []
+    stream = OutputStream(chunks.append, buffering='exit')
+    pspl.compile(SOURCE, engine=engine).run(output=stream, buffering='line')
+    assert chunks == ['1\n2\n3\n4\n5\n']
+
+
+@pytest.mark.parametrize('buffering', ['line', 'block', 'exit'])
+def test_write_error(buffering: str) -> None:
+    chunks: List[str] = []
+    stream = OutputStream(chunks.append, buffering=buffering)
+    stream.write(1)
+    stream.write_error('Error: message\n')
+    assert ''.join(chunks) == '1\nError: message\n'
+
+
+def test_write_error_list_sink(capsys: pytest.CaptureFixture[str]) -> None:
+    lines: List[str] = []
+    stream = OutputStream(lines, buffering='exit')
+    stream.write(1)
+    stream.write_error('Error: message\n')
+    assert lines == ['1']
+    assert capsys.readouterr() == ('', 'Error: message\n')
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+@pytest.mark.parametrize('buffering', ['line', 'block', 'exit'])
+@pytest.mark.parametrize('source', ['OUTPUT 1\nOUTPUT x', 'OUTPUT 1\nOUTPUT 1 $'], ids=['runtime', 'syntax'])
+def test_runner_writes_errors_to_sink(
+    engine: str,
+    buffering: str,
+    source: str,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    f = io.StringIO()
+    runner = pspl.PSPLRunner(source, engine=engine, output=f, buffering=buffering)
+    stats = runner.run()
+
+    assert stats.error is not None
+    assert f.getvalue() == ('1\n' if 'x' in source else '') + stats.error
+    assert capsys.readouterr().out == ''
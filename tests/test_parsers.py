@@ -0,0 +1,204 @@
+"""Conformance tests checking that both parsers build identical trees."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator
+
+from helpers import PROGRAMS, describe, read_program
+from pspl.parser import descent, generator
+from rply.token import SourcePosition
+
+import pspl
+import pytest
+import rply
+
+PARSERS = ('lr', 'descent')
+
+
+def dump(value: Any) -> Any:
+    """Returns a comparable representation of a tree, including positions."""
+    if isinstance(value, list):
+        return [dump(item) for item in value]
+    if isinstance(value, SourcePosition):
+        return ('pos', value.idx, value.lineno, value.colno)
+    if isinstance(value, pspl.ast.Node):
+        attrs = {k: dump(v) for k, v in vars(value).items() if not k.startswith('_')}
+        return (type(value).__name__, attrs)
+    return value
+
+
+def parse(source: str, parser: str) -> Any:
+    try:
+        program = pspl.compile(source, engine='tree', parser=parser)
+    except Exception as err:
+        return 'error', describe(err)
+    return 'tree', dump(program.tree)
+
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_sample_program(name: str) -> None:
+    source, _ = read_program(name)
+    result = parse(source, 'lr')
+    assert result[0] == 'tree'
+    assert parse(source, 'descent') == result
+
+
+# Errors at the end of the program have no position.
+INVALID = [
+    'OUTPUT',
+    'OUTPUT 1 +',
+    'a <- ',
+    'a <- (1 + 2',
+    'a <- 1 + 2)',
+    'IF TRUE THEN\nOUTPUT 1',
+    'IF TRUE\nOUTPUT 1\nENDIF',
+    'IF TRUE THEN\nOUTPUT 1\nELSE\nENDIF',
+    'FOR i <- 1 TO\nOUTPUT i\nENDFOR',
+    'FOR 1 <- 1 TO 3\nOUTPUT 1\nENDFOR',
+    'FOR i <- 1 TO 3\nOUTPUT i',
+    'WHILE TRUE\nOUTPUT 1\nENDWHILE',
+    'WHILE TRUE DO\nOUTPUT 1',
+    'REPEAT\nOUTPUT 1\n',
+    'REPEAT\nOUTPUT 1\nUNTIL',
+    'DECLARE a',
+    'DECLARE a : NUMBER',
+    'CONSTANT k',
+    'CONSTANT k = 1\nCONSTANT k = 2',
+    'INPUT',
+    'INPUT "prompt"',
+    'OUTPUT 1 2',
+    'ENDIF',
+    'OUTPUT "unterminated',
+    'OUTPUT 1 $ 2',
+]
+
+
+@pytest.mark.parametrize('source', INVALID)
+def test_invalid_program(source: str) -> None:
+    result = parse(source, 'lr')
+    assert result[0] == 'error'
+    assert parse(source, 'descent') == result
+
+
+def test_dump_includes_positions() -> None:
+    first = parse('OUTPUT 1', 'lr')
+    assert parse(' OUTPUT 1', 'lr') != first
+    assert parse('OUTPUT 1', 'descent') == first
+
+
+@pytest.fixture
+def builds(monkeypatch: pytest.MonkeyPatch) -> Iterator[Dict[str, int]]:
+    counts = {backend: 0 for backend in descent.PARSER_BACKENDS}
+
+    def counting(backend: str, build: Any) -> Any:
+        def wrapper() -> Any:
+            counts[backend] += 1
+            return build()
+        return wrapper
+
+    for backend, build in list(descent.PARSER_BACKENDS.items()):
+        monkeypatch.setitem(descent.PARSER_BACKENDS, backend, counting(backend, build))
+
+    # The generator holds the registered productions so only the
+    # built parser is discarded.
+    monkeypatch.setattr(generator, '_parser', None)
+    descent.reset_parser()
+    yield counts
+    descent.reset_parser()
+
+
+@pytest.mark.parametrize('backend', PARSERS)
+def test_parser_built_once_across_states(builds: Dict[str, int], backend: str) -> None:
+    for i in range(3):
+        program = pspl.compile('OUTPUT %d' % i, engine='tree', parser=backend)
+        program.run(output=[])
+
+    assert builds == {name: int(name == backend) for name in PARSERS}
+    assert descent.get_parser(backend) is descent.get_parser(backend)
+
+
+def test_lr_parser_is_shared(builds: Dict[str, int], monkeypatch: pytest.MonkeyPatch) -> None:
+    parser = generator.build()
+    assert generator.build() is parser
+    assert descent.get_parser('lr') is parser
+    assert generator.get().cache_id == generator.CACHE_ID
+
+    monkeypatch.setattr(generator, '_parser', None)
+    assert generator.build() is not parser
+
+
+def test_lr_parser_without_table_cache(builds: Dict[str, int], monkeypatch: pytest.MonkeyPatch) -> None:
+    build = rply.ParserGenerator.build
+
+    def unwritable(self: rply.ParserGenerator) -> Any:
+        if self.cache_id is not None:
+            raise OSError('read-only file system')
+        return build(self)
+
+    monkeypatch.setattr(rply.ParserGenerator, 'build', unwritable)
+    monkeypatch.setattr(generator.get(), 'cache_id', generator.CACHE_ID)
+
+    program = pspl.compile('OUTPUT 1 + 2', engine='tree', parser='lr')
+    output: list = []
+    program.run(output=output)
+
+    assert output == ['3']
+    assert generator.get().cache_id is None
+
+
+NESTED = '''
+a <- 1
+IF (a = 1) THEN
+    OUTPUT 1
+    OUTPUT 2
+    OUTPUT 3
+ELSE
+    OUTPUT 4
+    OUTPUT 5
+ENDIF
+FOR i <- 1 TO 2
+    OUTPUT i
+    WHILE (a < 3) DO
+        a <- a + 1
+        OUTPUT a
+    ENDWHILE
+ENDFOR
+'''
+
+
+def blocks(node: Any) -> Iterator[pspl.ast.Block]:
+    for value in vars(node).values():
+        if isinstance(value, pspl.ast.Block):
+            yield value
+        if isinstance(value, pspl.ast.Node):
+            yield from blocks(value)
+        elif isinstance(value, list):
+            for item in value:
+                yield from blocks(item)
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_statement_lists_are_flat(parser: str) -> None:
+    tree = pspl.compile(NESTED, engine='tree', parser=parser).tree
+
+    assert [type(stmt).__name__ for stmt in tree.statements] == ['Assignment', 'If', 'For']
+    if_stmt, for_stmt = tree.statements[1:]
+    assert len(if_stmt.block.statements) == 3
+    assert len(if_stmt.else_block.statements) == 2
+    assert len(for_stmt.block.statements) == 2
+
+    for block in [tree, *blocks(tree)]:
+        assert not any(isinstance(stmt, pspl.ast.Block) for stmt in block.statements)
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_long_straight_line_program(parser: str) -> None:
+    # Nested blocks used to hit the recursion limit at about 1000 statements.
+    count = 5000
+    source = ''.join('x <- %d\n' % i for i in range(count)) + 'OUTPUT x\n'
+    program = pspl.compile(source, engine='tree', parser=parser)
+    output: list = []
+    program.run(output=output)
+
+    assert len(program.tree.statements) == count + 1
+    assert output == [str(count - 1)]
@@ -0,0 +1,82 @@
+"""Tests for the line profiler."""
+
+from __future__ import annotations
+
+from typing import Callable, List
+
+import itertools
+import json
+import pspl
+import pytest
+
+SOURCE = '''total <- 0
+FOR i <- 1 TO 4
+    total <- total + i
+    IF (i > 2) THEN
+        OUTPUT i
+    ENDIF
+ENDFOR
+OUTPUT total
+'''
+
+
+def counter() -> Callable[[], float]:
+    # Every call of timer advances it by a second.
+    count = itertools.count()
+    return lambda: float(next(count))
+
+
+def profile(engine: str) -> pspl.Profiler:
+    profiler = pspl.Profiler('loop.pspl', timer=counter())
+    output: List[str] = []
+    pspl.compile(SOURCE, engine=engine).run(output=output, profiler=profiler)
+    assert output == ['3', '4', '10']
+    return profiler
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_hits(engine: str) -> None:
+    profiler = profile(engine)
+    assert {line.lineno: line.hits for line in profiler.stats()} == {1: 1, 2: 1, 3: 4, 4: 4, 5: 2, 8: 1}
+
+
+def test_times() -> None:
+    profiler = profile('tree')
+    lines = {line.lineno: line for line in profiler.stats('line')}
+    for line in lines.values():
+        assert 0 < line.self_time <= line.cumulative_time
+    assert lines[3].self_time == lines[3].cumulative_time == 4
+    assert lines[2].cumulative_time == lines[2].self_time + lines[3].cumulative_time + lines[4].cumulative_time
+    assert lines[4].cumulative_time == lines[4].self_time + lines[5].cumulative_time
+    assert profiler.total_time == lines[1].cumulative_time + lines[2].cumulative_time + lines[8].cumulative_time
+
+
+def test_sort() -> None:
+    profiler = profile('tree')
+    assert [line.lineno for line in profiler.stats('line')] == [1, 2, 3, 4, 5, 8]
+    assert [line.lineno for line in profiler.stats('hits')][:2] == [3, 4]
+    assert profiler.stats('cumulative')[0].lineno == 2
+    with pytest.raises(ValueError):
+        profiler.stats('name')
+
+
+def test_report() -> None:
+    report = profile('tree').report(SOURCE, sort='line', limit=2)
+    rows = report.splitlines()
+    assert rows[0].startswith('Total time: ')
+    assert len(rows) == 5
+    assert rows[3].split()[:2] == ['1', '1']
+    assert rows[3].endswith('total <- 0')
+    assert rows[4].endswith('FOR i <- 1 TO 4')
+
+
+def test_exports() -> None:
+    profiler = profile('tree')
+    data = json.loads(json.dumps(profiler.to_dict()))
+    assert data['filename'] == 'loop.pspl'
+    assert [line['hits'] for line in data['lines']] == [1, 1, 4, 4, 2, 1]
+    stacks = {tuple(stack['stack']) for stack in data['stacks']}
+    assert stacks == {(1,), (2,), (2, 3), (2, 4), (2, 4, 5), (8,)}
+
+    collapsed = profiler.to_collapsed(SOURCE).splitlines()
+    assert 'loop.pspl:2 FOR i <- 1 TO 4;loop.pspl:4 IF (i > 2) THEN;loop.pspl:5 OUTPUT i 2000000' in collapsed
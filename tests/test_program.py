@@ -0,0 +1,72 @@
+"""Tests for running compiled programs repeatedly and pickling them."""
+
+from __future__ import annotations
+
+from typing import List
+
+from pspl.parser.errors import IdentifierNotDefined
+
+import pathlib
+import pickle
+import pspl
+import pytest
+
+ENGINES = ['tree', 'vm', 'python']
+
+SOURCE = '''
+CONSTANT k = 2
+DECLARE n : INTEGER
+INPUT n
+IF (n > 1) THEN
+    seen <- n * k
+ENDIF
+FOR i <- 1 TO n
+    total <- i
+ENDFOR
+OUTPUT seen
+'''
+
+
+def run(program: pspl.Program, *inputs: str, **options: object) -> List[str]:
+    output: List[str] = []
+    program.run(inputs=list(inputs), output=output, **options)  # type: ignore
+    return output
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('options', [{}, {'max_steps': 1000}, {'counters': True}], ids=['plain', 'limited', 'counted'])
+def test_runs_start_from_fresh_state(engine: str, options: dict) -> None:
+    program = pspl.compile(SOURCE, engine=engine)
+    assert run(program, '5', **options) == ['10']
+    # The constant would be redefined and seen would still be
+    # defined if the state of previous run leaked into this one.
+    with pytest.raises(IdentifierNotDefined):
+        run(program, '0', **options)
+    assert run(program, '3', **options) == ['6']
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_runs_after_failure(engine: str) -> None:
+    program = pspl.compile(SOURCE, engine=engine)
+    with pytest.raises(EOFError):
+        run(program)
+    assert run(program, '2') == ['4']
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_pickle_round_trip(engine: str, tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'example.pspl'
+    path.write_text(SOURCE)
+    program = pspl.compile(str(path), file=True, engine=engine)
+    assert run(program, '4', max_steps=1000) == ['8']
+
+    loaded = pickle.loads(pickle.dumps(program))
+    assert isinstance(loaded, pspl.Program)
+    assert loaded.engine == engine
+    assert loaded.filename == str(path)
+    assert loaded.names == program.names
+    assert type(loaded.code) is type(program.code)
+    assert run(loaded, '4') == ['8']
+    assert run(loaded, '4', max_steps=1000) == ['8']
+    with pytest.raises(IdentifierNotDefined):
+        run(loaded, '1')
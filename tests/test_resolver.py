@@ -0,0 +1,90 @@
+"""Tests for resolving identifiers to slots."""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+from helpers import ENGINES, run
+
+import pspl
+import pytest
+
+SOURCE = '''
+CONSTANT k = 10
+DECLARE n : INTEGER
+INPUT n
+total <- 0
+FOR i <- 1 TO n
+    total <- total + i * k
+ENDFOR
+OUTPUT total
+'''
+
+
+def test_slots() -> None:
+    program = pspl.compile(SOURCE, engine='tree')
+    tree = program.tree
+    slots = {name: slot for slot, name in enumerate(program.names)}
+
+    assert sorted(program.names) == ['i', 'k', 'n', 'total']
+    assert len(slots) == len(program.names)
+    for node in tree.walk():
+        if isinstance(node, pspl.ast.Ident):
+            assert node.slot == slots[node.name]
+        elif isinstance(node, (pspl.ast.Assignment, pspl.ast.For, pspl.ast.Input)):
+            assert node.slot == slots[node.ident]
+
+
+def test_checked_assignments() -> None:
+    tree = pspl.compile(SOURCE, engine='tree').tree
+    checked = {
+        node.ident: node.checked
+        for node in tree.walk()
+        if isinstance(node, (pspl.ast.Assignment, pspl.ast.For))
+    }
+    # Only identifiers that are ever defined as a constant are checked.
+    assert checked == {'k': True, 'total': False, 'i': False}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_slots_are_fresh_per_run(engine: str) -> None:
+    program = pspl.compile(SOURCE, engine=engine)
+    for n, expected in (('3', '60'), ('0', '0')):
+        output: List[str] = []
+        program.run(inputs=[n], output=output)
+        assert output == [expected]
+
+
+REDEFINITIONS = {
+    'constant': ('CONSTANT k = 1\nOUTPUT k\nCONSTANT k = 2', [], (3, 1)),
+    'assignment': ('CONSTANT k = 1\nOUTPUT k\nk <- 2', [], (3, 1)),
+    'for': ('CONSTANT k = 1\nOUTPUT k\nFOR k <- 1 TO 2\n    OUTPUT 1\nENDFOR', [], (3, 1)),
+    'input': ('CONSTANT k = 1\nOUTPUT k\nINPUT k', [], (3, 1)),
+    'nested_use': ('CONSTANT k = 1\nIF TRUE THEN\n    k <- 2\nENDIF', [], (3, 5)),
+    # Constants defined conditionally are only known at runtime.
+    'conditional': ('OUTPUT 1\nIF TRUE THEN\n    CONSTANT k = 1\nENDIF\nk <- 2', ['1'], (5, 1)),
+}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source, expected, position', REDEFINITIONS.values(), ids=REDEFINITIONS.keys())
+def test_constant_redefinition(engine: str, source: str, expected: List[str], position: Tuple[int, int]) -> None:
+    output, error = run(source, engine, inputs=['5'])
+    assert output == expected
+    assert error is not None
+    assert error[0] == 'IdentifierAlreadyDefined'
+    assert error[2] == position
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source, position', [
+    ('OUTPUT x', (1, 8)),
+    ('x <- 1\nOUTPUT x + y', (2, 12)),
+    ('IF FALSE THEN\n    x <- 1\nENDIF\nOUTPUT x', (4, 8)),
+])
+def test_undefined_identifier(engine: str, source: str, position: Tuple[int, int]) -> None:
+    output, error = run(source, engine)
+    assert output == []
+    assert error is not None
+    assert error[0] == 'IdentifierNotDefined'
+    assert error[2] == position
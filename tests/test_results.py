@@ -0,0 +1,167 @@
+"""Tests for the on-disk cache of program results."""
+
+from __future__ import annotations
+
+from pspl.results import RESULT_SUFFIX, CachedResult, ResultCache
+
+import io
+import os
+import pathlib
+import pspl
+import pytest
+
+SOURCE = 'FOR i <- 1 TO 3\n    OUTPUT "INPUT " + i\nENDFOR'
+READS = 'INPUT name\nOUTPUT "Hi " + name'
+
+
+def info(cache: ResultCache) -> tuple:
+    i = cache.info()
+    return i.hits, i.misses, i.bypasses, i.writes
+
+
+def test_keys(tmp_path: pathlib.Path) -> None:
+    cache = ResultCache(str(tmp_path))
+    key = cache.get_key(SOURCE, [], engine='tree')
+    assert cache.get_key(SOURCE + '\n  \n', [], engine='tree') == key
+    assert cache.get_key(SOURCE, (), engine='tree') == key
+    others = [
+        cache.get_key(' ' + SOURCE, [], engine='tree'),
+        cache.get_key(SOURCE, [''], engine='tree'),
+        cache.get_key(SOURCE, [], engine='vm'),
+        cache.get_key(SOURCE, [], engine='tree', max_steps=10),
+        cache.get_key(SOURCE, [], engine='tree', timeout=1.0),
+        cache.get_key(SOURCE, [], engine='tree', timeout=2.0),
+    ]
+    assert len({key, *others}) == len(others) + 1
+
+
+def test_get_put(tmp_path: pathlib.Path) -> None:
+    cache = ResultCache(str(tmp_path / 'results'))
+    key = cache.get_key(SOURCE, [], engine='tree')
+    assert cache.get(key) is None
+    result = CachedResult(['1', '2'], 'At line 1\n', 'ZeroDivisionError')
+    cache.put(key, result)
+    assert cache.get(key) == result
+    assert info(cache) == (1, 1, 0, 1)
+
+    (tmp_path / 'results' / (key + RESULT_SUFFIX)).write_text('{"output": ')
+    assert cache.get(key) is None
+
+    cache.clear()
+    assert os.listdir(tmp_path / 'results') == []
+
+
+def test_eviction(tmp_path: pathlib.Path) -> None:
+    cache = ResultCache(str(tmp_path), max_size=200)
+    keys = [cache.get_key(SOURCE, [str(i)], engine='tree') for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, CachedResult(['x' * 40], None, None))
+        # The oldest results are evicted first.
+        os.utime(tmp_path / (key + RESULT_SUFFIX), (i, i))
+    assert cache.info().evictions > 0
+    assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 200
+    assert cache.get(keys[-1]) is not None
+    assert cache.get(keys[0]) is None
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_runner_hits(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str], engine: str) -> None:
+    cache = ResultCache(str(tmp_path))
+    runner = pspl.PSPLRunner(SOURCE, engine=engine, result_cache=cache)
+    assert runner.run().cached is False
+    first = capsys.readouterr().out
+    assert first == 'INPUT 1\nINPUT 2\nINPUT 3\n'
+
+    # The INPUT in a string literal doesn't make the program read input.
+    assert runner.run().cached is True
+    assert capsys.readouterr().out == first
+    assert pspl.PSPLRunner(SOURCE, engine=engine, result_cache=cache).run().cached is True
+    assert capsys.readouterr().out == first
+    assert info(cache) == (2, 1, 0, 1)
+
+
+def test_runner_limits_in_key(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    cache = ResultCache(str(tmp_path))
+    runner = pspl.PSPLRunner(SOURCE, result_cache=cache)
+    assert runner.run(timeout=10).cached is False
+    assert runner.run(timeout=20).cached is False
+    assert runner.run(timeout=10).cached is True
+    assert runner.run(max_steps=10).cached is False
+    assert runner.run(max_steps=10, timeout=10).cached is False
+    assert runner.run(max_steps=10).cached is True
+    capsys.readouterr()
+
+
+def test_runner_inputs(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    cache = ResultCache(str(tmp_path))
+    runner = pspl.PSPLRunner(READS, result_cache=cache)
+    assert runner.run(inputs=['Ada']).cached is False
+    assert runner.run(inputs=['Bob']).cached is False
+    assert runner.run(inputs=['Ada']).cached is True
+    assert capsys.readouterr().out == 'Hi Ada\nHi Bob\nHi Ada\n'
+    assert info(cache) == (1, 2, 0, 2)
+
+
+def test_runner_bypasses(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str], monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ResultCache(str(tmp_path))
+    # Programs reading standard input can't be cached.
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'Eve')
+    runner = pspl.PSPLRunner(READS, result_cache=cache)
+    assert runner.run().cached is False
+    assert capsys.readouterr().out == 'Hi Eve\n'
+
+    runner = pspl.PSPLRunner(SOURCE, result_cache=cache)
+    runner.run(counters=True)
+    runner.run(profile=True)
+    capsys.readouterr()
+    assert info(cache) == (0, 0, 3, 0)
+
+
+def test_runner_errors(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    cache = ResultCache(str(tmp_path))
+    runner = pspl.PSPLRunner('OUTPUT 1\nOUTPUT x', result_cache=cache)
+    stats = runner.run()
+    first = capsys.readouterr().out
+    assert first.startswith('1\nAt line 2, column 8')
+    cached = runner.run()
+    assert capsys.readouterr().out == first
+    assert (cached.cached, cached.error, cached.error_type) == (True, stats.error, 'IdentifierNotDefined')
+
+    # Invalid programs are cached too.
+    runner = pspl.PSPLRunner('OUTPUT 1 $', result_cache=cache)
+    runner.run()
+    assert runner.run().cached is True
+    capsys.readouterr()
+
+
+def test_runner_timeout_not_cached(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture[str]) -> None:
+    cache = ResultCache(str(tmp_path))
+    runner = pspl.PSPLRunner('WHILE TRUE DO\n    x <- 1\nENDWHILE', result_cache=cache)
+    assert runner.run(timeout=0.01).error_type == 'ExecutionLimitExceeded'
+    assert runner.run(timeout=0.01).cached is False
+    assert info(cache)[3] == 0
+
+    # The result of exceeding the step limit doesn't depend on time.
+    runner.run(max_steps=10)
+    assert runner.run(max_steps=10).cached is True
+    capsys.readouterr()
+
+
+@pytest.mark.parametrize('buffering', ['line', 'exit'])
+def test_runner_replays_errors_to_sink(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+    buffering: str,
+) -> None:
+    cache = ResultCache(str(tmp_path))
+    f = io.StringIO()
+    runner = pspl.PSPLRunner('OUTPUT 1\nOUTPUT 2\nOUTPUT x', output=f, buffering=buffering, result_cache=cache)
+    stats = runner.run()
+    first = f.getvalue()
+    assert first == '1\n2\n' + stats.error
+
+    f.seek(0)
+    f.truncate()
+    assert runner.run().cached is True
+    assert f.getvalue() == first
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,146 @@
+"""Tests for interleaving programs with the scheduler."""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, List, Tuple
+
+from pspl.parser.errors import ExecutionLimitExceeded, IdentifierNotDefined
+
+import pspl
+import pytest
+import time
+
+LOOP = 'FOR i <- 1 TO %d\n    OUTPUT i\nENDFOR'
+
+
+class Log:
+    """Records the output lines of several programs in the order they are written."""
+    def __init__(self) -> None:
+        self.lines: List[Tuple[str, str]] = []
+
+    def sink(self, name: str) -> Any:
+        return lambda text: self.lines.extend((name, line) for line in text.splitlines())
+
+    def runs(self) -> List[Tuple[str, int]]:
+        """Returns the consecutive runs of lines written by the same program."""
+        runs: List[Tuple[str, int]] = []
+        for name, _ in self.lines:
+            if runs and runs[-1][0] == name:
+                runs[-1] = (name, runs[-1][1] + 1)
+            else:
+                runs.append((name, 1))
+        return runs
+
+
+def test_round_robin() -> None:
+    log = Log()
+    scheduler = pspl.Scheduler(quantum=1)
+    for name in 'ab':
+        scheduler.submit(LOOP % 3, name=name, output=log.sink(name))
+    scheduler.run()
+    assert log.lines == [('a', '1'), ('b', '1'), ('a', '2'), ('b', '2'), ('a', '3'), ('b', '3')]
+
+
+def test_priority_and_quantum() -> None:
+    log = Log()
+    scheduler = pspl.Scheduler(quantum=2)
+    a = scheduler.submit(LOOP % 6, name='a', output=log.sink('a'))
+    b = scheduler.submit(LOOP % 6, name='b', priority=2, output=log.sink('b'))
+    c = scheduler.submit(LOOP % 2, name='c', output=log.sink('c'))
+
+    order = []
+    while scheduler.pending:
+        scheduled = scheduler.run_slice()
+        assert scheduled is not None
+        order.append((scheduled.name, scheduled.status))
+    assert scheduler.run_slice() is None
+
+    # Every slice runs quantum * priority iterations.
+    assert log.runs() == [('a', 2), ('b', 4), ('c', 2), ('a', 2), ('b', 2), ('a', 2)]
+    assert order == [
+        ('a', 'pending'), ('b', 'pending'), ('c', 'done'),
+        ('a', 'pending'), ('b', 'done'), ('a', 'done'),
+    ]
+    assert [(s.slices, s.steps, s.error) for s in (a, b, c)] == [(3, 6, None), (2, 6, None), (1, 2, None)]
+    assert scheduler.slices == 6
+    assert [line for name, line in log.lines if name == 'a'] == ['1', '2', '3', '4', '5', '6']
+
+
+def test_steps_of_loop_bodies() -> None:
+    # A step is taken for every statement of a loop body.
+    log = Log()
+    scheduler = pspl.Scheduler(quantum=4)
+    for name in 'ab':
+        source = 'n <- 0\nWHILE (n < 4) DO\n    n <- n + 1\n    OUTPUT n\nENDWHILE'
+        scheduler.submit(source, name=name, output=log.sink(name))
+    finished = scheduler.run()
+    assert [s.name for s in finished] == ['a', 'b']
+    assert log.runs() == [('a', 2), ('b', 2), ('a', 2), ('b', 2)]
+
+
+def test_completion_order() -> None:
+    log = Log()
+    scheduler = pspl.Scheduler(quantum=3)
+    scheduler.submit(LOOP % 10, name='long', output=log.sink('long'))
+    scheduler.submit(LOOP % 4, name='short', output=log.sink('short'))
+    scheduler.submit(LOOP % 10, name='urgent', priority=4, output=log.sink('urgent'))
+    scheduler.submit('OUTPUT 1', name='straight', output=log.sink('straight'))
+    finished = scheduler.run()
+    assert [s.name for s in finished] == ['urgent', 'straight', 'short', 'long']
+    assert all(s.status == 'done' and s.done for s in finished)
+    assert scheduler.pending == 0
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_programs_and_inputs(engine: str) -> None:
+    output: List[str] = []
+    scheduler = pspl.Scheduler(quantum=1)
+    program = pspl.compile('DECLARE n : INTEGER\nINPUT n\nFOR i <- 1 TO n\n    OUTPUT i * n\nENDFOR', engine=engine)
+    first = scheduler.submit(program, inputs=['2'], output=output)
+    second = scheduler.submit(program, inputs=['3'], output=output)
+    scheduler.run()
+    assert output == ['2', '3', '4', '6', '9']
+    assert (first.steps, second.steps) == (2, 3)
+
+
+def test_errors() -> None:
+    log = Log()
+    scheduler = pspl.Scheduler(quantum=2)
+    failing = scheduler.submit('FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR\nOUTPUT x', output=log.sink('failing'))
+    limited = scheduler.submit(LOOP % 100, max_steps=5, output=log.sink('limited'))
+    ok = scheduler.submit(LOOP % 5, output=log.sink('ok'))
+    finished = scheduler.run()
+
+    assert finished == [failing, limited, ok]
+    assert failing.status == 'error'
+    assert isinstance(failing.error, IdentifierNotDefined)
+    assert limited.status == 'error'
+    assert isinstance(limited.error, ExecutionLimitExceeded)
+    assert [line for name, line in log.lines if name == 'limited'] == ['1', '2', '3', '4', '5']
+    assert ok.status == 'done'
+    assert ok.error is None
+
+
+def test_invalid_arguments() -> None:
+    with pytest.raises(ValueError):
+        pspl.Scheduler(quantum=0)
+    with pytest.raises(ValueError):
+        pspl.Scheduler().submit('OUTPUT 1', priority=0)
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_input_timeout(engine: str) -> None:
+    def slow_inputs() -> Iterator[str]:
+        time.sleep(0.1)
+        yield '1'
+
+    output: List[str] = []
+    scheduler = pspl.Scheduler()
+    program = pspl.compile('OUTPUT 0\nINPUT n\nOUTPUT n', engine=engine)
+    scheduled = scheduler.submit(program, inputs=slow_inputs(), output=output, timeout=0.05)
+    scheduler.run()
+
+    assert scheduled.status == 'error'
+    assert isinstance(scheduled.error, ExecutionLimitExceeded)
+    assert scheduled.error.source_pos.lineno == 2
+    assert output == ['0']
@@ -0,0 +1,111 @@
+"""Tests for the server running programs sent to a Unix socket."""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+from pspl.client import submit
+
+import io
+import os
+import pytest
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'),
+    reason='the server requires os.fork and Unix sockets',
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def server() -> Iterator[str]:
+    # Socket paths are limited to about a hundred characters, so
+    # the socket is not placed in the deeply nested tmp_path.
+    directory = tempfile.mkdtemp(prefix='pspl')
+    path = os.path.join(directory, 'server.sock')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    args = [sys.executable, '-m', 'pspl', 'serve', '--socket', path, '--workers', '2', '--max-steps', '1000']
+    process = subprocess.Popen(args, env=env, cwd=directory)
+    try:
+        deadline = time.monotonic() + 30
+        while not os.path.exists(path):
+            assert process.poll() is None, 'server exited'
+            assert time.monotonic() < deadline, 'server did not start'
+            time.sleep(0.05)
+        yield path
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+        assert not os.path.exists(path)
+        shutil.rmtree(directory)
+
+
+def test_submit(server: str) -> None:
+    output = io.StringIO()
+    result = submit(server, 'INPUT name\nFOR i <- 1 TO 3\n    OUTPUT name + i\nENDFOR', stdin='x\n', output=output)
+    assert result['status'] == 'ok'
+    assert result['error'] is None
+    assert result['time'] >= 0
+    assert output.getvalue() == 'x1\nx2\nx3\n'
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+@pytest.mark.parametrize('parser', ['lr', 'descent'])
+def test_submit_options(server: str, engine: str, parser: str) -> None:
+    output = io.StringIO()
+    result = submit(server, 'OUTPUT 1 + 2', output=output, engine=engine, parser=parser)
+    assert result['status'] == 'ok'
+    assert output.getvalue() == '3\n'
+
+
+def test_submit_errors(server: str) -> None:
+    output = io.StringIO()
+    result = submit(server, 'OUTPUT 1\nOUTPUT x', output=output)
+    assert result['status'] == 'error'
+    assert result['error'].startswith('At line 2, column 8')
+    assert output.getvalue() == '1\n'
+
+    result = submit(server, 'INPUT x', output=io.StringIO())
+    assert result['status'] == 'error'
+    assert result['error'].startswith('EOFError')
+
+
+def test_server_limits(server: str) -> None:
+    source = 'WHILE TRUE DO\n    OUTPUT 1\nENDWHILE'
+    # Requests may only lower the limits of server.
+    for max_steps, lines in ((None, 1000), (10, 10), (10 ** 6, 1000)):
+        output = io.StringIO()
+        result = submit(server, source, output=output, max_steps=max_steps)
+        assert result['status'] == 'error'
+        assert 'ExecutionLimitExceeded' in result['error']
+        assert output.getvalue() == '1\n' * lines
+
+
+def test_invalid_request(server: str) -> None:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server)
+        sock.sendall(b'{"stdin": ""}\n')
+        with sock.makefile('rb') as f:
+            assert b'Invalid request' in f.readline()
+
+
+def test_concurrent_clients(server: str) -> None:
+    # More clients than workers are queued by the socket.
+    sockets = []
+    for i in range(4):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(server)
+        sock.sendall(b'{"source": "OUTPUT %d"}\n' % i)
+        sockets.append(sock)
+    for i, sock in enumerate(sockets):
+        with sock, sock.makefile('rb') as f:
+            assert f.readline() == b'{"output": "%d\\n"}\n' % i
+            assert b'"status": "ok"' in f.readline()
@@ -0,0 +1,166 @@
+"""Tests checking that type specialization doesn't change the results of programs."""
+
+from __future__ import annotations
+
+from typing import Any, List, Set
+
+from helpers import ENGINES, describe
+from pspl.passes import TypeSpecializer
+from pspl.vm import Compiler
+from pspl import ast, transpiler
+
+import pspl
+import pytest
+
+MIXED = '''
+DECLARE flag : BOOLEAN
+INPUT flag
+a <- 1
+b <- 2.5
+s <- "x"
+t <- TRUE
+IF flag THEN
+    m <- 3
+ELSE
+    m <- "three"
+ENDIF
+OUTPUT a + b
+OUTPUT a + s
+OUTPUT s + b
+OUTPUT t + a
+OUTPUT t + s
+OUTPUT m + a
+OUTPUT a + m
+OUTPUT m + s
+OUTPUT (a + b) + s
+OUTPUT s + (a + b)
+OUTPUT a - b
+OUTPUT a * t
+OUTPUT b / a
+OUTPUT (a = b)
+OUTPUT (a < b)
+OUTPUT (t = TRUE)
+OUTPUT (s = "x")
+OUTPUT (s <> "y")
+OUTPUT (m = 3)
+FOR i <- 1 TO 2 STEP 0.5
+    OUTPUT i + s
+    OUTPUT i + a
+ENDFOR
+'''
+
+ERRORS = [
+    's <- "x"\nOUTPUT s - 1',
+    's <- "x"\nOUTPUT s * 1.5',
+    'a <- 1\nOUTPUT a / 0',
+    'a <- 1\ns <- "x"\nOUTPUT (a < s)',
+    'IF TRUE THEN\n    m <- "x"\nELSE\n    m <- 1\nENDIF\nOUTPUT m - 1',
+]
+
+
+class _Unspecialized(TypeSpecializer):
+    def specialize(self, node: ast.Node) -> ast.Node:
+        return node
+
+
+@pytest.fixture
+def unspecialized(monkeypatch: pytest.MonkeyPatch) -> Any:
+    """Returns a function compiling programs without type specialization."""
+    def compile(source: str, engine: str) -> pspl.Program:
+        with monkeypatch.context() as m:
+            m.setattr('pspl.state.TypeSpecializer', _Unspecialized)
+            # The transpiled code of specialized tree must not be reused.
+            m.setattr(transpiler, 'get_cached', lambda source: None)
+            m.setattr(transpiler, 'add_cached', lambda *args: None)
+            return pspl.compile(source, engine=engine)
+    return compile
+
+
+def run(program: pspl.Program, inputs: List[str]) -> Any:
+    output: List[str] = []
+    try:
+        program.run(inputs=inputs, output=output)
+    except Exception as err:
+        return output, describe(err)
+    return output, None
+
+
+def node_types(program: pspl.Program) -> Set[str]:
+    assert program.tree is not None
+    return {type(node).__name__ for node in program.tree.walk()}
+
+
+def test_trees(unspecialized: Any) -> None:
+    specialized = node_types(pspl.compile(MIXED))
+    assert {'NumericAdd', 'StringAdd', 'NumericSubtract', 'NumericMul', 'NumericDiv', 'TypedLt', 'TypedEq'} <= specialized
+    # The additions with an operand that may be a string or a number are kept.
+    assert 'Add' in specialized
+    assert not {name for name in node_types(unspecialized(MIXED, 'tree')) if name.startswith(('Numeric', 'String', 'Typed'))}
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('flag', ['true', 'false'])
+def test_mixed_types(unspecialized: Any, engine: str, flag: str) -> None:
+    expected = run(unspecialized(MIXED, 'tree'), [flag])
+    assert expected[1] is None
+    assert run(unspecialized(MIXED, engine), [flag]) == expected
+    assert run(pspl.compile(MIXED, engine=engine), [flag]) == expected
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('source', ERRORS)
+def test_errors(unspecialized: Any, engine: str, source: str) -> None:
+    expected = run(unspecialized(source, 'tree'), [])
+    assert expected[1] is not None
+    assert run(pspl.compile(source, engine=engine), []) == expected
+
+
+def _build(program: pspl.Program, tree: ast.Block, engine: str) -> pspl.Program:
+    if engine == 'python':
+        code = transpiler.Transpiler().transpile(tree)
+    elif engine == 'vm':
+        code = Compiler().compile(tree)
+    else:
+        code = tree
+    return pspl.Program(engine=engine, names=program.names, tree=tree, code=code)
+
+
+def _replace_operand(tree: ast.Block, cls: type, value: Any) -> None:
+    nodes = [node for node in tree.walk() if type(node) is cls]
+    assert len(nodes) == 1
+    nodes[0].right = ast.Constant(value)  # type: ignore
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('value, expected', [('a', '2a'), (1.5, '3.5'), (True, '3')])
+def test_numeric_add_fallback(engine: str, value: Any, expected: str) -> None:
+    # The inferred types are only assumed, so an operand of another
+    # type at runtime is added the same as by generic additions.
+    program = pspl.compile('x <- 2\nOUTPUT x + 1')
+    assert program.tree is not None
+    _replace_operand(program.tree, ast.NumericAdd, value)
+    assert run(_build(program, program.tree, engine), []) == ([expected], None)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('value, expected', [(1, '3'), (2.5, '4.5'), ('y', '2y')])
+def test_string_add_fallback(engine: str, value: Any, expected: str) -> None:
+    program = pspl.compile('x <- 2\nOUTPUT x + "s"')
+    assert program.tree is not None
+    _replace_operand(program.tree, ast.StringAdd, value)
+    assert run(_build(program, program.tree, engine), []) == ([expected], None)
+
+
+def test_specialized_count(capsys: pytest.CaptureFixture[str]) -> None:
+    source = 'a <- 1\ns <- "x"\nOUTPUT a + 1\nOUTPUT s + a\nOUTPUT (a < 2)\nOUTPUT b + 1'
+    stats = pspl.PSPLRunner(source).run(inputs=[])
+    assert stats.specialized == 3
+    assert capsys.readouterr().out.startswith('2\nx1\nTRUE\n')
+
+
+def test_specialized_nodes_hold_operands_only() -> None:
+    program = pspl.compile('a <- 1\ns <- "x"\nOUTPUT a + 1\nOUTPUT s + a\nOUTPUT (a < 2)\nOUTPUT a * 2.5')
+    assert program.tree is not None
+    nodes = [node for node in program.tree.walk() if type(node).__name__ in ast.specialized.__all__]
+    assert [type(node) for node in nodes] == [ast.NumericAdd, ast.StringAdd, ast.TypedLt, ast.NumericMul]
+    assert all(vars(node).keys() == {'left', 'right'} for node in nodes)
@@ -0,0 +1,103 @@
+"""Tests for the statistics of program runs."""
+
+from __future__ import annotations
+
+from typing import List
+
+from click.testing import CliRunner
+from pspl.__main__ import main
+
+import json
+import pathlib
+import pspl
+import pytest
+
+# 5 top level statements, 3 in each of 3 iterations of FOR and
+# 1 in each of 1 + 2 + 3 iterations of WHILE.
+SOURCE = '''CONSTANT k = 2
+DECLARE n : INTEGER
+n <- 3
+FOR i <- 1 TO n
+    a <- i * k
+    j <- 0
+    WHILE (j < i) DO
+        j <- j + 1
+    ENDWHILE
+ENDFOR
+OUTPUT a + 1
+'''
+
+
+@pytest.mark.parametrize('engine', ['tree', 'vm', 'python'])
+def test_counters(engine: str) -> None:
+    output: List[str] = []
+    stats = pspl.compile(SOURCE, engine=engine).run(output=output, counters=True)
+    assert output == ['7']
+    assert stats.statements == 20
+    assert stats.loop_iterations == 9
+    assert stats.peak_variables == 5
+    assert stats.peak_memory is not None and stats.peak_memory > 0
+    assert set(stats.phases) == {'execute', 'compile'}
+
+
+def test_counters_disabled() -> None:
+    stats = pspl.compile(SOURCE).run(output=[])
+    assert stats.statements is None
+    assert stats.loop_iterations is None
+    assert stats.peak_variables is None
+    assert stats.peak_memory is None
+
+
+def test_counters_on_error() -> None:
+    # Blocks are counted as a whole when entered, so only the
+    # variables are exact when a statement of the block fails.
+    stats = pspl.RunStats()
+    with pytest.raises(ZeroDivisionError):
+        pspl.compile('a <- 1\nb <- 2\nOUTPUT a / 0\nOUTPUT b').run(output=[], counters=True, stats=stats)
+    assert stats.statements == 4
+    assert stats.peak_variables == 2
+
+
+def test_runner_stats(capsys: pytest.CaptureFixture[str]) -> None:
+    runner = pspl.PSPLRunner(SOURCE)
+    stats = runner.run(counters=True)
+    assert capsys.readouterr().out == '7\n'
+    data = json.loads(json.dumps(stats.to_dict()))
+    assert data['tokens'] == 43
+    assert data['statements'] == 20
+    assert data['peak_variables'] == 5
+    assert data['folded'] is not None
+    assert data['specialized'] is not None
+    assert data['cached'] is False
+    assert {'lex', 'parse', 'compile', 'execute'} <= set(data['phases'])
+    assert stats.total_time == pytest.approx(sum(stats.phases.values()))
+    assert stats.startup_time == pytest.approx(stats.total_time - stats.phases['execute'])
+
+    # The program compiled by the first run is reused.
+    stats = runner.run(counters=True)
+    assert stats.tokens is None
+    assert stats.statements == 20
+
+
+def test_cli_stats(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'counts.pspl'
+    path.write_text(SOURCE)
+    result = CliRunner().invoke(main, ['run', str(path), '--stats', '--counters'])
+    assert result.exit_code == 0, result.output
+    assert result.stdout == '7\n'
+    rows = {row.split()[0]: row.split()[1:] for row in result.stderr.splitlines() if row}
+    assert rows['statements'] == ['20']
+    assert rows['loop_iterations'] == ['9']
+    assert rows['peak_variables'] == ['5']
+    assert rows['tokens'] == ['43']
+    assert rows['peak_memory'][1] == 'bytes'
+    assert rows['total'][1] == 's'
+
+
+def test_cli_stats_without_counters(tmp_path: pathlib.Path) -> None:
+    path = tmp_path / 'counts.pspl'
+    path.write_text(SOURCE)
+    result = CliRunner().invoke(main, ['run', str(path), '--stats'])
+    assert result.exit_code == 0, result.output
+    assert 'execute' in result.stderr
+    assert 'statements' not in result.stderr
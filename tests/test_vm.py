@@ -0,0 +1,87 @@
+"""Tests for the bytecode compiler of the vm engine."""
+
+from __future__ import annotations
+
+from typing import List
+
+from pspl.vm import Code, opcodes as op
+
+import pspl
+import pytest
+
+
+def compile_code(source: str) -> Code:
+    return pspl.compile(source, engine='vm').code
+
+
+def opnames(code: Code) -> List[str]:
+    return [op.OPNAMES[opcode] for opcode, _ in code.instructions]
+
+
+def test_literal_operands() -> None:
+    code = compile_code('x <- 1\ny <- x + 2\nz <- x * 3\nw <- x * y')
+    assert opnames(code) == [
+        'LOAD_CONST', 'STORE_SLOT',
+        'LOAD_SLOT', 'ADD_CONST', 'STORE_SLOT',
+        'LOAD_SLOT', 'BINARY_OP_CONST', 'STORE_SLOT',
+        'LOAD_SLOT', 'LOAD_SLOT', 'BINARY_OP', 'STORE_SLOT',
+        'HALT',
+    ]
+    assert code.names == ['x', 'y', 'z', 'w']
+
+
+def test_conditional_loop_tests_after_body() -> None:
+    code = compile_code('x <- 1\nWHILE (x < 3) DO\n    x <- x + 1\nENDWHILE')
+    instructions = code.instructions
+
+    # The condition follows the body and jumps back to its start.
+    assert instructions[2] == (op.JUMP, 6)
+    assert instructions[6][0] == op.LOAD_SLOT
+    assert instructions[7][0] == op.BINARY_OP_CONST
+    assert instructions[8] == (op.JUMP_IF_TRUE, 3)
+    assert instructions[-1] == (op.HALT, None)
+
+
+def test_for_loop_slots() -> None:
+    code = compile_code('FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR')
+    start = next(arg for opcode, arg in code.instructions if opcode == op.FOR_START)
+    counter, end, step, ident, target = start
+
+    assert code.names[ident] == 'i'
+    assert [code.names[slot] for slot in (counter, end, step)] == [None, None, None]
+    assert code.nslots == 4
+    assert code.instructions[target - 1][0] == op.FOR_NEXT
+    assert code.instructions[target] == (op.DELETE_SLOT, ident)
+
+
+def test_failing_instructions_have_positions() -> None:
+    code = compile_code('x <- 1\nOUTPUT x / 0\nOUTPUT y')
+    positions = {idx: (pos.lineno, pos.colno) for idx, pos in code.positions.items()}
+
+    # The store can redefine a constant and the loads can read an
+    # undefined identifier.
+    assert positions == {1: (1, 1), 2: (2, 8), 5: (3, 8)}
+    assert [code.instructions[idx][0] for idx in positions] == [op.STORE_SLOT, op.LOAD_SLOT, op.LOAD_SLOT]
+
+
+def test_dis() -> None:
+    listing = compile_code('x <- 1\nOUTPUT x + 2').dis().splitlines()
+    assert [line.split(None, 2)[1:] for line in listing] == [
+        ['LOAD_CONST', '1'],
+        ['STORE_SLOT', '0 (x)'],
+        ['LOAD_SLOT', '0 (x)'],
+        ['ADD_CONST', '2'],
+        ['PRINT'],
+        ['HALT'],
+    ]
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('OUTPUT 1 + 2', ['3']),
+    ('x <- 1\nWHILE (x < 3) DO\n    x <- x + 1\nENDWHILE\nOUTPUT x', ['3']),
+    ('FOR i <- 1 TO 3\n    OUTPUT i\nENDFOR', ['1', '2', '3']),
+])
+def test_run(source: str, expected: List[str]) -> None:
+    output: List[str] = []
+    pspl.compile(source, engine='vm').run(output=output)
+    assert output == expected